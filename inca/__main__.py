@@ -54,18 +54,17 @@ for s in defaultconfig.sections():
 
 
 from celery import Celery, group, chain, chord
+from celery.signals import import_modules
 from . import core
 import configparser
 from .core import search_utils
 from .core import taskmanager
 import datetime
 
-from . import processing # helps celery recognize the processing tasks
-from . import scrapers   # helps celery recognize the scraping tasks
-from . import  rssscrapers
-from . import clients    # helps celery recognize client tasks
-from . import analysis   # helps celery recognize analysis tasks
-from . import importers_exporters # helps celery recognize import/export tasks
+# plugins (scrapers, processors, clients, analyses, importers/exporters) are
+# imported on first use, see core.plugins. Celery workers and beat import all
+# of them (see `_register_tasks`), so they recognize every task.
+from .core import plugins
 
 from optparse import OptionParser
 
@@ -121,17 +120,26 @@ class Inca():
 
     _prompt = "Placeholder"
 
-    def __init__(self, prompt="TLI", distributed=False, verbose=True, debug=False):
+    def __init__(self, prompt="TLI", distributed=False, verbose=True, debug=False, lazy=True):
         self._LOCAL_ONLY = distributed
         self._prompt = getattr(make_interface,prompt).prompt
-        self._construct_tasks('scrapers')
-        self._construct_tasks('processing')
-
-        self._analysis_task_constructor()
-        # self._construct_tasks('analysis')
-        self._construct_tasks('clients')
-        self._construct_tasks('importers_exporters')
-        self._construct_tasks('rssscrapers')
+        if lazy and not distributed:
+            # only index the available tasks, modules are imported on first use
+            manifest = plugins.build_manifest(incadir)
+            for function in plugins.PLUGIN_PACKAGES:
+                setattr(self, function, plugins.TaskNamespace(function, manifest[function],
+                                                              self._construct_task,
+                                                              getattr(self, function).__doc__))
+        else:
+            plugins.import_all()
+            self._construct_tasks('scrapers')
+            self._construct_tasks('processing')
+
+            self._analysis_task_constructor()
+            # self._construct_tasks('analysis')
+            self._construct_tasks('clients')
+            self._construct_tasks('importers_exporters')
+            self._construct_tasks('rssscrapers')
         
         if verbose:
             logger.setLevel('INFO')
@@ -170,34 +178,28 @@ class Inca():
 
         """
 
-        target_functions = ['fit','predict','plot','interpretation','quality']
-
         for k,v in self._taskmaster.tasks.items():
             functiontype = k.split('.')[1]
-            taskname     = k.rsplit('.')[-1]
             if functiontype == "analysis":
+                self._construct_analysis_task(k, getattr(self,"analysis"))
 
-                analysis_class = self._taskmaster.tasks[k]
+    def _construct_analysis_task(self, k, function_class):
+        """Construct the endpoint for the analysis task `k` on `function_class`"""
+
+        target_functions = ['fit','predict','plot','interpretation','quality']
 
-                def makefunc(method):
-                    if inspect.isgeneratorfunction(method):
-                        def endpoint(*args, **kwargs):
-                            for i in method(*args, **kwargs):
-                                yield i
-                    else:
-                        def endpoint(*args, **kwargs):
-                            return method(*args, **kwargs)
-                    return endpoint
+        taskname     = k.rsplit('.')[-1]
+        analysis_class = self._taskmaster.tasks[k]
 
-                class analysis_placeholder:
-                    pass
-                analysis_placeholder.__doc__ = analysis_class.__doc__
+        class analysis_placeholder:
+            pass
+        analysis_placeholder.__doc__ = analysis_class.__doc__
 
-                for method in target_functions:
-                    endpoint = getattr(analysis_class,method)
-                    setattr(analysis_placeholder,method,endpoint)
+        for method in target_functions:
+            endpoint = getattr(analysis_class,method)
+            setattr(analysis_placeholder,method,endpoint)
 
-                setattr(getattr(self,"analysis"), taskname, analysis_placeholder)
+        setattr(function_class, taskname, analysis_placeholder)
 
     class clients():
         '''Clients to access (social media) APIs'''
@@ -228,54 +230,76 @@ class Inca():
         for k,v in self._taskmaster.tasks.items():
             #print(k)
             functiontype = k.split('.')[1]
-            taskname     = k.rsplit('.')[-1]
             # print(functiontype,taskname)
             if functiontype == function:
-                target_task = self._taskmaster.tasks[k]
-                target_task.prompt = self._prompt
-
-                is_client_main_class = hasattr(target_task,"service_name") and target_task.__name__== target_task.service_name
-                if is_client_main_class:
-                    setattr(getattr(self,function),
-                        "{service_name}_create_app".format(service_name=target_task.service_name), target_task.add_application )
-                    setattr(getattr(self,function),
-                        "{service_name}_remove_app".format(service_name=target_task.service_name), target_task.remove_application )
-                    setattr(getattr(self,function),
-                        "{service_name}_create_credentials".format(service_name=target_task.service_name), target_task.add_credentials )
-                else:
-                    setattr(getattr(self,function),taskname,target_task.runwrap)
-                function_class = getattr(self,function)
-                leaf_class = self._taskmaster.tasks[k]
-                method = leaf_class.runwrap
-                def makefunc(method):
-                    if inspect.isgeneratorfunction(method):
-                        def endpoint(*args, **kwargs):
-                            for i in method(*args, **kwargs):
-                                yield i
-                    else:
-                        def endpoint(*args, **kwargs):
-                            return method(*args, **kwargs)
-                    return endpoint
-
-                endpoint = makefunc(method)
-                if function == 'scrapers':
-                    docstring = self._taskmaster.tasks[k].get.__doc__
-                elif function == 'rssscrapers':
-                    docstring = self._taskmaster.tasks[k].get.__doc__
-                elif function == "processing":
-                    docstring = self._taskmaster.tasks[k].process.__doc__
-                elif function == "importers_exporters":
-                    t = self._taskmaster.tasks[k]
-                    if hasattr(t,'load'):
-                        docstring = t.load.__doc__
-                    else:
-                        docstring = t.save.__doc__
-                else:
-                    docstring = self._taskmaster.tasks[k].__doc__
-                endpoint.__doc__  = docstring
-                endpoint.__name__ = leaf_class.__name__
-
-                setattr(function_class,taskname,endpoint)
+                self._construct_task(function, k, getattr(self,function))
+
+    def _construct_task(self, function, k, function_class):
+        """Construct the endpoint(s) for the Celery task `k` on `function_class`
+
+        Parameters
+        ----
+        function : string
+            The type of function to add, such as 'scrapers' or 'processors'
+        k : string
+            The name of the task in the celery taskmaster
+        function_class : class or core.plugins.TaskNamespace
+            The object to add the endpoints to
+
+        Returns
+            None
+
+        """
+        if k not in self._taskmaster.tasks:
+            logger.debug("{k} is not a task".format(**locals()))
+            return
+        if function == "analysis":
+            return self._construct_analysis_task(k, function_class)
+        taskname     = k.rsplit('.')[-1]
+        target_task = self._taskmaster.tasks[k]
+        target_task.prompt = self._prompt
+
+        is_client_main_class = hasattr(target_task,"service_name") and target_task.__name__== target_task.service_name
+        if is_client_main_class:
+            setattr(function_class,
+                "{service_name}_create_app".format(service_name=target_task.service_name), target_task.add_application )
+            setattr(function_class,
+                "{service_name}_remove_app".format(service_name=target_task.service_name), target_task.remove_application )
+            setattr(function_class,
+                "{service_name}_create_credentials".format(service_name=target_task.service_name), target_task.add_credentials )
+        else:
+            setattr(function_class,taskname,target_task.runwrap)
+        leaf_class = self._taskmaster.tasks[k]
+        method = leaf_class.runwrap
+        def makefunc(method):
+            if inspect.isgeneratorfunction(method):
+                def endpoint(*args, **kwargs):
+                    for i in method(*args, **kwargs):
+                        yield i
+            else:
+                def endpoint(*args, **kwargs):
+                    return method(*args, **kwargs)
+            return endpoint
+
+        endpoint = makefunc(method)
+        if function == 'scrapers':
+            docstring = self._taskmaster.tasks[k].get.__doc__
+        elif function == 'rssscrapers':
+            docstring = self._taskmaster.tasks[k].get.__doc__
+        elif function == "processing":
+            docstring = self._taskmaster.tasks[k].process.__doc__
+        elif function == "importers_exporters":
+            t = self._taskmaster.tasks[k]
+            if hasattr(t,'load'):
+                docstring = t.load.__doc__
+            else:
+                docstring = t.save.__doc__
+        else:
+            docstring = self._taskmaster.tasks[k].__doc__
+        endpoint.__doc__  = docstring
+        endpoint.__name__ = leaf_class.__name__
+
+        setattr(function_class,taskname,endpoint)
 
 
     def _summary(self):
@@ -290,6 +314,13 @@ class Inca():
 
 ### COMMANDLINE SPECIFICATION ###
 
+@import_modules.connect
+def _register_tasks(sender=None, **kwargs):
+    '''Imports all plugins when a celery worker (or beat) of the taskmaster starts,
+    as class-based tasks are only registered once their module is imported'''
+    if sender is None or sender is Inca._taskmaster:
+        plugins.import_all()
+
 def commandline():
 
     usage  = "Usage: %prog [options] tasktype task\ne.g. : %prog scrapers diewelt"
@@ -319,7 +350,7 @@ def commandline():
     else:
         prompt="TLI"
 
-    inca = Inca(prompt=prompt)
+    inca = Inca(prompt=prompt, lazy=not options.celery)
     if not len(args)>=2:
         print(inca._summary())
         return
@@ -2,9 +2,15 @@ import os as _os
 from importlib import import_module
 _expected_file_end = "_analysis.py"
 
-__all__ = [fname for fname in _os.listdir('analysis') if fname[-len(_expected_file_end):]==_expected_file_end]
+__all__ = [fname for fname in _os.listdir(_os.path.dirname(__file__)) if fname[-len(_expected_file_end):]==_expected_file_end]
 
-for module in __all__:
-    #__import__('.'.join(['analysis',module.replace('.py','')]))
-    import_module('.'+module.replace('.py',''), package='inca.analysis')
-    
+def import_all():
+    '''Import all analyses, e.g. so celery recognizes them as tasks'''
+    for module in __all__:
+        import_module('.'+module.replace('.py',''), package='inca.analysis')
+
+def __getattr__(name):
+    # analyses are imported on first access, see core.plugins
+    if name+'.py' in __all__:
+        return import_module('.'+name, package='inca.analysis')
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
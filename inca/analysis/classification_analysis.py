@@ -10,6 +10,7 @@ from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.model_selection import train_test_split
 
 from ..core.analysis_base_class import Analysis
+from ..helpers.text_preprocessing import StreamingCorpus
 from scipy.sparse import csr_matrix
 from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score, precision_score, f1_score, recall_score
@@ -25,11 +26,14 @@ class classification(Analysis):
     def __init__(self):
         pass
 
-    def fit(self, documents, x_field, label_field, add_prediction=False, testsize = 0.2, mindf = 0.0, maxdf = 1.0, rand_shuffle = True, tfidf = True, vocabul = None):
+    def fit(self, documents, x_field, label_field, add_prediction=False, testsize = 0.2, mindf = 0.0, maxdf = 1.0, rand_shuffle = True, tfidf = True, vocabul = None, tokenizer = None):
         """
         This method should train a Classifier model on the input documents.\n
-        @param documents: the documents (stored in elasticsearch) to train on
-        @type documents: iterable
+        @param documents: the documents (stored in elasticsearch) to train on, or a StreamingCorpus of them that keeps the label_field
+                          (e.g. StreamingCorpus(docs, tfidf=True, keep=['label'])). The features are then the rows of the corpus matrix,
+                          so the texts never have to be in memory; mindf, maxdf, tfidf, vocabul and tokenizer are then set by the corpus
+                          (no_below, no_above, tfidf and tokenize) instead. Documents without a label are skipped.
+        @type documents: iterable, or StreamingCorpus
         @param x_field: The nested field name that contains the text articles to be classified. Ideally nested within the '_source'
                         field. For instance, to use nested field x2 as text document which is nested as doc['_source']['x1']['x2'], use
                         '_source.x1.x2'
@@ -69,6 +73,9 @@ class classification(Analysis):
                         encountered in the labeled documents are used to form the vocabulary.
         @type vocabul: list, or None type object
         @param one_pass: Keeps all documents in memory instead of retrieving them twice from ElasticSearch
+        @param tokenizer: A Tokenizer (from helpers.text_preprocessing) to tokenize and normalize the texts instead of the default tokenization of scikit-learn.
+                          If it has a token cache, tokens of documents tokenized before (e.g. by an LDA or similarity run) are reused.
+        @type tokenizer: Tokenizer, or None type object
         """
 
 
@@ -85,6 +92,8 @@ class classification(Analysis):
         self.labels = []
         self.documents_fulltext = []
 
+        if isinstance(documents, StreamingCorpus):
+            return self._fit_corpus(documents, label_field, add_prediction, testsize, rand_shuffle)
 
         counter = 0
         invalidchars = set(string.punctuation)
@@ -116,13 +125,41 @@ class classification(Analysis):
         #If tfidf is set to True, it extracts the term-frequency-inverse-document-frequency features from the example documents.
 
 
+        #If a tokenizer is given, the texts are tokenized (or taken from its token cache) beforehand; new texts passed to predict are tokenized by the same tokenizer
+        options = {}
+        texts = self.documents_fulltext
+        if tokenizer is not None:
+            texts = tokenizer.tokenize_many(self.documents_fulltext, ids=self.valid_docs, field=x_field)
+            options['analyzer'] = lambda text: text if isinstance(text, list) else tokenizer.tokenize(text)
+
         if tfidf:
-            self.vectorizer = TfidfVectorizer(min_df = mindf, max_df = maxdf, vocabulary = vocabul)
+            self.vectorizer = TfidfVectorizer(min_df = mindf, max_df = maxdf, vocabulary = vocabul, **options)
         else:
-            self.vectorizer = CountVectorizer(min_df = mindf, max_df = maxdf, vocabulary = vocabul)
-        self.fitted = self.vectorizer.fit_transform(self.documents_fulltext, self.labels)
+            self.vectorizer = CountVectorizer(min_df = mindf, max_df = maxdf, vocabulary = vocabul, **options)
+        self.fitted = self.vectorizer.fit_transform(texts, self.labels)
         self.vocab = np.array(self.vectorizer.get_feature_names())
         logger.info('{} x entries and {} y entries'.format(self.fitted.shape[0], len(self.labels )))
+        return self._train(add_prediction, testsize, rand_shuffle)
+
+    def _fit_corpus(self, corpus, label_field, add_prediction, testsize, rand_shuffle):
+        """Train on the (memory-mapped) matrix of a StreamingCorpus, of which the corpus serves as the vectorizer"""
+        key = label_field[len('_source.'):] if label_field.startswith('_source.') else label_field
+        assert key in corpus.fields, "The StreamingCorpus should keep the label field, e.g. keep=['{}']".format(key)
+        rows = []
+        for row, (_id, label) in enumerate(zip(corpus.ids, corpus.fields[key])):
+            if label is None:
+                self.invalid_docs.append(_id)
+            else:
+                rows.append(row)
+                self.valid_docs.append(_id)
+                self.labels.append(label)
+        self.vectorizer = corpus
+        self.fitted = corpus.matrix if len(rows) == len(corpus) else corpus.matrix[rows]
+        self.vocab = np.array([corpus.dictionary[i] for i in range(len(corpus.dictionary))])
+        logger.info('{} x entries and {} y entries'.format(self.fitted.shape[0], len(self.labels )))
+        return self._train(add_prediction, testsize, rand_shuffle)
+
+    def _train(self, add_prediction, testsize, rand_shuffle):
         X_train, self.X_test, y_train, self.y_test = train_test_split(self.fitted, self.labels, test_size=testsize, shuffle = rand_shuffle, random_state=42)
         self.model =  SGDClassifier(loss='hinge', penalty='l2', alpha=1e-3, max_iter=1000, random_state=42).fit(X_train, y_train)
         if add_prediction ==True:
@@ -20,23 +20,20 @@ config.read('settings.cfg')
 
 DEFAULTLANGUAGE = config.get('inca','default_data_language')
 
-def create_corpus(documents, field='text', normalizing='lemmatize', language = DEFAULTLANGUAGE):
+def create_corpus(documents, field='text', normalizing='lemmatize', language = DEFAULTLANGUAGE, path=None, token_cache=None):
     """
-    :param documents: an iterable of documents (dictionaries)
+    :param documents: an iterable of documents (dictionaries), or a function that returns them (e.g. `lambda: scroll_query(query)`); see `StreamingCorpus`
     :param field: the field from which to extract data
     :param normalizing: if 'lemmatize' then perfoms word net lemmatization with the default pos noun ('n') NOTE: only supported for english
                         if 'stem' perform stemming with the porter stemmer
                         else uses the input words as they are.
+    :param path: optional directory to store the corpus in (defaults to a temporary directory)
+    :param token_cache: optional TokenCache (or True for the default one) to reuse the tokens of documents tokenized before
     """
     print('Creating corpus ...')
-    print('caching token represetation from documents ...')
-    token_lists = [[word for word in generate_word(doc_data, normalize=normalizing, language = language)] for doc_data in get_data_generator(documents, field=field)]
-
-    vocabulary = Dictionary(token_lists)
-    corpus = [vocabulary.doc2bow(token_list) for token_list in token_lists]
-#    gensim.corpora.MmCorpus.serialize('/tmp/lda.mm', corpus)
-
-    return vocabulary, corpus
+    tokenizer = Tokenizer(normalize=normalizing, language=language, cache=token_cache)
+    corpus = StreamingCorpus(documents, field=field, tokenize=tokenizer, path=path)
+    return corpus.dictionary, corpus
 
 
 class Lda(Analysis):
@@ -49,7 +46,7 @@ class Lda(Analysis):
         self.nb_docs_trained = 0
         self.selected_clusters = set()
 
-    def fit(self, documents, add_prediction='', field='text', nb_topics=20,  normalizing='stem', language = DEFAULTLANGUAGE, **kwargs):
+    def fit(self, documents, add_prediction='', field='text', nb_topics=20,  normalizing='stem', language = DEFAULTLANGUAGE, token_cache=None, **kwargs):
         """
         This method trains the Lda model by fitting its parameters to the extracted textual data from the given documents\
         (dictionaries) and selected field key. It infers n number of topics/clusters equal to the given parameter.\
@@ -75,12 +72,14 @@ class Lda(Analysis):
                         else uses the input words as they are.
         :param language: language of the documents to be classified, important for preprocessing
         :type language: str
+        :param token_cache: optional TokenCache (or True for the default one) to reuse the tokens of documents tokenized before, e.g. by an earlier run
+        :type token_cache: TokenCache
 
         :References:
         * https://radimrehurek.com/gensim/models/ldamodel.html : gensim.models.ldamodel
         * https://www.di.ens.fr/~fbach/mdhnips2010.pdf : Hoffman et al
         """
-        self.vocabulary, self.corpus = create_corpus(documents, field=field, normalizing=normalizing, language=language)
+        self.vocabulary, self.corpus = create_corpus(documents, field=field, normalizing=normalizing, language=language, token_cache=token_cache)
         print('Training Lda model ...')
         self.lda = LdaModel(corpus=self.corpus, num_topics=nb_topics, alpha='auto')  # alpha can be also set to 'symmetric' or to an explicit array
         self.nb_docs_trained = len(self.corpus)
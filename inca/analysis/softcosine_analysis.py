@@ -4,19 +4,14 @@ This file contains the basics to determine the overlap based on softcosine simil
 
 from ..core.analysis_base_class import Analysis
 from ..core.database import client, elastic_index, scroll_query
+from ..helpers.text_preprocessing import StreamingCorpus, Tokenizer, TokenCache
+from ..core.sparse_similarity import similarity_edges, candidate_edges, window_edges, date_groups, group_bounds, write_edge_list
+from ..core.lsh_index import lsh_candidates
 import os
 import logging
-import pandas as pd
+import numpy as np
 import gensim
-from gensim.corpora import Dictionary
-from gensim.models import TfidfModel
-from gensim.models import Word2Vec
-from gensim.similarities import SoftCosineSimilarity
 import time
-import datetime
-import networkx as nx
-from itertools import groupby, islice
-from tqdm import tqdm
 
 
 logger = logging.getLogger("INCA")
@@ -24,18 +19,10 @@ logger = logging.getLogger("INCA")
 class softcosine_similarity(Analysis):
     '''Compares documents from source and target, showing their softcosine distance'''
 
-    def window(self, seq, n):
-        it = iter(seq)
-        result = tuple(islice(it, n))
-        if len(result) == n:
-            yield result
-        for elem in it:
-            result = result[1:] + (elem,)
-            yield result
-
     def fit(self, path_to_model, source, target, sourcetext = 'text', sourcedate = 'publication_date',
             targettext = 'text', targetdate = 'publication_date', keyword_source = None, keyword_target = None, keyword_source_must = False, keyword_target_must = False, condition_source = None, condition_target = None, days_before = None,
-            days_after = None, merge_weekend = False, threshold = None, from_time=None, to_time=None, to_csv = False, destination='comparisons', to_pajek = False, filter_above=0.5, filter_below=5):
+            days_after = None, merge_weekend = False, threshold = None, from_time=None, to_time=None, to_csv = False, destination='comparisons', to_pajek = False, filter_above=0.5, filter_below=5,
+            ann = False, ann_index = None, ann_tables = 16, corpus_path = None, tokenizer = None, top_k = None, file_format = None, workers = None, blocksize = 1000):
         '''
         path_to_model = Supply a pre-trained word2vec model. Information on how to train such a model
         can be found here: https://rare-technologies.com/word2vec-tutorial/
@@ -46,14 +33,23 @@ class softcosine_similarity(Analysis):
         keyword_source/_target = optional: specify keywords that need to be present in the textfield; list or string (lowercase)
         keyword_source/_target_must = optional: In case of a list, do all keywords need to appear in the text (logical AND) or does at least one of the words need to be in the text (logical OR). Defaults to False (logical OR)
         condition_source/target = optional: supply the field and its value as a dict as a condition for analysis, e.g. {'topic':1} (defaults to None)
-        days_before = days target is before source (e.g. 2); days_after = days target is after source (e.g. 2) -> either both or none should be supplied. Additionally, merge_weekend = True will merge articles published on Saturday and Sunday. 
+        days_before = days target is before source (e.g. 2); days_after = days target is after source (e.g. 2). Additionally, merge_weekend = True will merge articles published on Saturday and Sunday. All similarities are then written to one edge list. 
         threshold = threshold to determine at which point similarity is sufficient; if supplied only the rows who pass it are included in the dataset
         from_time, to_time = optional: specifying a date range to filter source and target articles. Supply the date in the yyyy-MM-dd format.
         to_csv = if True save the resulting data in a csv file - otherwise a pandas dataframe is returned
         destination = optional: where should the resulting datasets be saved? (defaults to 'comparisons' folder)
-        to_pajek = if True save - in addition to csv/pickle - the result (source, target and similarity score) as pajek file to be used in the Infomap method (defaults to False) - not available in combination with days_before/days_after parameters
+        to_pajek = if True save - in addition to csv/pickle - the result (source, target and similarity score) as pajek file to be used in the Infomap method (defaults to False)
         filter_above = Words occuring in more than this fraction of all documents will be filtered
         filter_below = Words occuring in less than this absolute number of docments will be filtered
+        ann = optional: only score candidate pairs found with locality sensitive hashing on the tfidf vectors instead of all pairs, and write them to one edge list; much faster for large corpora, at the cost of missing a few pairs (in particular pairs that are similar only through related words). Requires a threshold (not for days_before/days_after)
+        ann_index = optional: file to save the hash index of the targets to, and to load it from in later runs (e.g. 'comparisons/lsh_targets.npz')
+        ann_tables = number of hash tables; more tables miss fewer pairs but give more candidates to score (defaults to 16)
+        corpus_path = optional: directory to store the tfidf vectors of the texts in (defaults to a temporary directory)
+        tokenizer = optional: a Tokenizer (from helpers.text_preprocessing) to normalize the texts, e.g. Tokenizer(normalize='stem', cache=True) to also keep the tokens in the token cache (defaults to splitting the texts on whitespace)
+        top_k = optional: only keep the top_k most similar targets of each source
+        file_format = optional: 'csv', 'parquet', 'feather' or 'pkl'. All similarities are written to one edge list in this format (defaults to csv if to_csv, otherwise pkl)
+        workers = number of blocks (or windows) compared in parallel (defaults to the number of cores)
+        blocksize = number of sources compared at once (also within a window); lower it if memory runs out (defaults to 1000)
         '''
         now = time.localtime()
         
@@ -122,259 +118,91 @@ class softcosine_similarity(Analysis):
         if isinstance(condition_source, dict) == True:
             source_query['query']['bool']['filter']['bool']['must'].append({'match':condition_source})
 
-        #Retrieve source and target articles as generators
-        source_query = scroll_query(source_query)
-        target_query = scroll_query(target_query)
-
-        #Make generators into lists and filter out those who do not have the specified keys (preventing KeyError)
-        target_query = [a for a in target_query if targettext in a['_source'].keys() and targetdate in a['_source'].keys()]
-        source_query = [a for a in source_query if sourcetext in a['_source'].keys() and sourcedate in a['_source'].keys()]
-
-        #Target and source texts (split)
-        target_text=[]
-        for doc in target_query:
-            target_text.append(doc['_source'][targettext].split())
-        source_text=[]
-        for doc in source_query:
-            source_text.append(doc['_source'][sourcetext].split())
-        
-        logger.info('Preparing dictionary')
-        dictionary = Dictionary(source_text + target_text)
-        logger.info('Removing all tokens that occur in less than {} documents or in more than {:.1f}% or all documents from dictionary'.format(filter_below,filter_above*100))
-        dictionary.filter_extremes(no_below=filter_below, no_above=filter_above)
-        logger.info('Preparing tfidf model')
-        tfidf = TfidfModel(dictionary=dictionary)
+        #Retrieve source and target articles as generators and filter out those who do not have the specified keys (preventing KeyError)
+        def documents():
+            for doc in scroll_query(source_query, fields=[sourcetext, sourcedate, 'doctype']):
+                if sourcetext in doc['_source'].keys() and sourcedate in doc['_source'].keys():
+                    yield {'_id':doc['_id'], sourcetext:doc['_source'][sourcetext], 'date':doc['_source'][sourcedate], 'doctype':doc['_source'].get('doctype'), 'side':'source'}
+            for doc in scroll_query(target_query, fields=[targettext, targetdate, 'doctype']):
+                if targettext in doc['_source'].keys() and targetdate in doc['_source'].keys():
+                    yield {'_id':doc['_id'], targettext:doc['_source'][targettext], 'date':doc['_source'][targetdate], 'doctype':doc['_source'].get('doctype'), 'side':'target',
+                           'checksum':TokenCache.checksum(doc['_source'][targettext])}
+
+        #Build the dictionary, tfidf model and tfidf vectors of source and target texts (split) in two passes over the documents, instead of keeping them in memory
+        corpus = StreamingCorpus(documents, field=[sourcetext, targettext], tokenize=tokenizer or (lambda text: text.split()), no_below=filter_below, no_above=filter_above, tfidf=True, keep=['date', 'doctype', 'side', 'checksum'], path=corpus_path)
+        dictionary, tfidf = corpus.dictionary, corpus.tfidf
+        n_sources = corpus.fields['side'].count('source')
+        source_matrix, target_matrix = corpus.rows(0, n_sources), corpus.rows(n_sources, len(corpus))
         logger.info('Preparing soft cosine similarity matrix')
-        similarity_matrix = softcosine_model.wv.similarity_matrix(dictionary, tfidf)        
+        similarity_matrix = softcosine_model.wv.similarity_matrix(dictionary, tfidf)
 
         #extract additional information from sources
-        source_dates = [doc['_source'][sourcedate] for doc in source_query]
-        source_ids = [doc['_id'] for doc in source_query]
-        source_doctype = [doc['_source']['doctype'] for doc in source_query]
-        source_dict = dict(zip(source_ids, source_dates))
-        source_dict2 = dict(zip(source_ids, source_doctype))
+        source_dates = corpus.fields['date'][:n_sources]
+        source_ids = corpus.ids[:n_sources]
+        source_doctype = corpus.fields['doctype'][:n_sources]
 
         #extract information from targets
-        target_ids = [doc['_id'] for doc in target_query]
-        target_dates = [doc['_source'][targetdate] for doc in target_query]
-        target_dict = dict(zip(target_ids, target_dates))
-        target_doctype=[doc['_source']['doctype'] for doc in target_query]
-        target_dict2 = dict(zip(target_ids, target_doctype))
-        
+        target_ids = corpus.ids[n_sources:]
+        target_dates = corpus.fields['date'][n_sources:]
+        target_doctype = corpus.fields['doctype'][n_sources:]
+
+        #Make exports folder if it does not exist yet
+        if not os.path.exists(destination):
+            os.makedirs(destination)
+        file_format = file_format or ('csv' if to_csv == True else 'pkl')
+        filename = os.path.join(destination, r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}".format(now=now, target = target, source = source))
+        sources = {'source':np.array(source_ids, dtype=object), 'source_date':np.array(source_dates, dtype=object), 'source_doctype':np.array(source_doctype, dtype=object)}
+        targets = {'target':np.array(target_ids, dtype=object), 'target_date':np.array(target_dates, dtype=object), 'target_doctype':np.array(target_doctype, dtype=object)}
+
         #If specified, comparisons compare docs within sliding date window
         if days_before != None or days_after != None:
             logger.info('Performing sliding window comparisons...')
-            # merge queries including identifier key
-            for i in source_query:
-                i.update({'identifier':'source'})
-            for i in target_query:
-                i.update({'identifier':'target'})
-            source_query.extend(target_query)
-
-            # sourcedate and targetdate need to be the same key (bc everything is done for sourcedate)
-            if targetdate is not sourcedate:
-                logger.info('Make sure that sourcedate and targetdate are the same key.')
-
-            else:
-                # convert dates into datetime objects
-                for a in source_query:
-                    if isinstance(a['_source'][sourcedate], datetime.date) == True:
-                        pass # is already datetime object
-                    else:
-                        a['_source'][sourcedate]=[int(i) for i in a['_source'][sourcedate][:10].split("-")]
-                        a['_source'][sourcedate] = datetime.date(a['_source'][sourcedate][0],a['_source'][sourcedate][1], a['_source'][sourcedate][2])
-             
-                # sort query by date
-                source_query.sort(key = lambda item:item['_source'][sourcedate])
-
-                # create list of all possible dates
-                d1 = source_query[0]['_source'][sourcedate]
-                d2 = source_query[-1]['_source'][sourcedate]
-                delta = d2 - d1
-                date_list = []
-                for i in range(delta.days + 1):
-                    date_list.append(d1 + datetime.timedelta(i))
-                    
-                # create list of docs grouped by date (dates without docs are empty lists)
-                grouped_query = []
-                for d in date_list:
-                    dt = []
-                    for a in source_query:
-                        if a['_source'][sourcedate] == d:
-                            dt.append(a)
-                    grouped_query.append(dt)
-                # Optional: merges saturday and sunday into one weekend group
-                # Checks whether group is Sunday, then merge together with previous (saturday) group.
-                if merge_weekend == True:
-                    grouped_query_new = []
-                    for group in grouped_query:
-                        # if empty, append empty list
-                        if not group:
-                            grouped_query_new.append([])
-                        # if group is sunday, extend previous (saturday) list, except when it is the first day in the data.
-                        elif group[0]['_source'][sourcedate].weekday()==6:
-                            if not grouped_query_new:
-                                grouped_query_new.append(group)
-                            else:
-                                grouped_query_new[-1].extend(group)
-                        # for all other weekdays, append new list
-                        else:
-                            grouped_query_new.append(group)
-                    grouped_query = grouped_query_new
-
-                # Sliding window starts here... How it works:
-                # A sliding window cuts the documents into groups that should be compared to each other based on their publication dates. A list of source documents published on the reference date is created. For each of the target dates in the window, the source list is compared to the targets, the information is put in a dataframe, and the dataframe is added to a list. This process is repeated for each window. We end up with a list of dataframes, which are eventually merged together into one dataframe.
-
-                len_window = days_before + days_after + 1
-                source_pos = days_before # source position is equivalent to days_before (e.g. 2 days before, means 3rd day is source with the index position [2])
-                n_window = 0
-                
-                for e in tqdm(self.window(grouped_query, n = len_window)):
-                    n_window +=1
-                    df_window = []
-
-                    source_texts = []
-                    source_ids = []
-                    if not 'source' in [l2['identifier'] for l2 in e[source_pos]]:
-                        pass
-                                        
-                    else:
-                        for doc in e[source_pos]:
-                            try:
-                                if doc['identifier']=='source':
-                                    # create sourcetext list to compare against
-                                    source_texts.append(doc['_source'][sourcetext].split())
-                                    # extract additional information
-                                    source_ids.append(doc['_id'])
-                            except:
-                                logger.error('This does not seem to be a valid document')
-                                print(doc)
-
-                        # create index of source texts
-                        query = tfidf[[dictionary.doc2bow(d) for d in source_texts]]
-                                
-                        # iterate through targets
-                        for d in e:
-                            target_texts=[]
-                            target_ids = []
-
-                            for doc in d:
-                                try:
-                                    if doc['identifier'] == 'target':
-                                        target_texts.append(doc['_source'][targettext].split())
-                                        # extract additional information
-                                        target_ids.append(doc['_id'])
-                                except:
-                                    logger.error('This does not seem to be a valid document')
-                                    print(doc)  
-                            # do comparison
-                            index = SoftCosineSimilarity(tfidf[[dictionary.doc2bow(d) for d in target_texts]], similarity_matrix)
-                            sims = index[query]
-                            #make dataframe
-                            df_temp = pd.DataFrame(sims, columns=target_ids, index = source_ids).stack().reset_index()
-                            df_window.append(df_temp)
-
-                        df = pd.concat(df_window, ignore_index=True)
-                        df.columns = ['source', 'target', 'similarity']
-                        df['source_date'] = df['source'].map(source_dict)
-                        df['target_date'] = df['target'].map(target_dict)
-                        df['source_doctype'] = df['source'].map(source_dict2)
-                        df['target_doctype'] = df['target'].map(target_dict2)
-
-                        #Optional: if threshold is specified
-                        if threshold:
-                            df = df.loc[df['similarity'] >= threshold]
-
-                        #Make exports folder if it does not exist yet
-                        if not 'comparisons' in os.listdir('.'):
-                            os.mkdir('comparisons')
-
-                        #Optional: save as csv file
-                        if to_csv == True:
-                            df.to_csv(os.path.join(destination,r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}_{n_window}.csv".format(now=now, target = target, source = source, n_window = n_window)))
-                            #Otherwise: save as pickle file
-                        else:
-                            df.to_pickle(os.path.join(destination,r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}_{n_window}.pkl".format(now=now, target = target, source = source, n_window = n_window)))
-
-                #Optional: save as pajek file not for days_before/days_after
-                if to_pajek == True:
-                    logger.info("Does not save as Pajek file with days_before/days_after because of the size of the files.")
-
-                
+
+            # Sliding window starts here... How it works:
+            # Documents are grouped by date (optionally merging saturday and sunday) in one pass, and sources and targets are ordered by that group.
+            # Each document is vectorized once. The sources of a date are compared with the targets from days_before groups before until days_after groups after it,
+            # which is a single range of the ordered targets. Only dates with a complete window are used as source dates.
+            groups, n_groups = date_groups(source_dates + target_dates, merge_weekend=merge_weekend)
+            source_groups, target_groups = groups[:len(source_dates)], groups[len(source_dates):]
+            source_order, target_order = np.argsort(source_groups, kind='stable'), np.argsort(target_groups, kind='stable')
+
+            # the (memory-mapped) matrices are not sorted themselves, window_edges selects the rows of one block at a time
+            comparisons = window_edges(source_matrix, target_matrix, group_bounds(source_groups[source_order], n_groups), group_bounds(target_groups[target_order], n_groups),
+                                       days_before or 0, days_after or 0, threshold=threshold, top_k=top_k, blocksize=blocksize, workers=workers, term_similarity=similarity_matrix,
+                                       source_order=source_order, target_order=target_order)
+
+            #Compute the similarities window by window and write them to a single edge list (optionally also as pajek file)
+            logger.info("Starting comparisons...")
+            write_edge_list(comparisons, filename + '.' + file_format, sources, targets, file_format, pajek=filename + '.net' if to_pajek == True else None)
+
+        #Only compare candidate pairs from the hash index, and write them to a single edge list
+        elif ann and threshold is not None:
+
+
+            logger.info("Finding candidate pairs...")
+            tokens = [dictionary[i] for i in range(len(dictionary))]
+            candidate_rows, candidate_columns = lsh_candidates(source_matrix, target_matrix, tokens, target_ids, threshold, path=ann_index, tables=ann_tables,
+                                                               target_checksums=corpus.fields['checksum'][n_sources:])
+            comparisons = candidate_edges(source_matrix, target_matrix, candidate_rows, candidate_columns, threshold=threshold, top_k=top_k, term_similarity=similarity_matrix)
+
+            logger.info("Starting comparisons...")
+            write_edge_list(comparisons, filename + '.' + file_format, sources, targets, file_format, pajek=filename + '.net' if to_pajek == True else None)
+
         #Same procedure as above, but without specifying a time frame (thus: comparing all sources to all targets)
         else:
-            
-            #Create index out of target texts
-            logger.info("Preparing the index out of target texts...")
-            index = SoftCosineSimilarity(tfidf[[dictionary.doc2bow(d) for d in target_text]],similarity_matrix)
-
-            #Retrieve source IDs and make generator to compute similarities between each source and the index
-            logger.info("Preparing the query out of source texts...")
-            query = tfidf[[dictionary.doc2bow(d) for d in source_text]]
-            query_generator = (item for item in query)
-                            
-            #Retrieve similarities
-            # Makes a separate dataframe for each source doc and saves this.
+            if ann:
+                logger.warning("ann requires a threshold, comparing all pairs instead")
+
+            empty = int((np.diff(source_matrix.indptr) == 0).sum())
+            if empty:
+                logger.info('Skipped {} empty source documents'.format(empty))
+
+            #Compute the similarities block by block and write them to a single edge list (optionally also as pajek file)
+            comparisons = similarity_edges(source_matrix, target_matrix, threshold=threshold, top_k=top_k, blocksize=blocksize, workers=workers, term_similarity=similarity_matrix)
             logger.info("Starting comparisons...")
-            
-            i=0
-            s_ids = 0
-            for doc in query_generator:
-                i+=1 # count each round of comparisons
-                # if doc is empty (which may happen due to pruning)
-                # then we skip this comparison
-                if len(doc) == 0:
-                    s_ids += 1
-                    logger.info('Skipped one empty document')
-                    continue
-                # make comparison
-                sims = index[doc]
-                # make dataframe
-                df = pd.DataFrame([sims]).transpose()
-                logger.debug('Created dataframe of shape {}'.format(df.shape))
-                logger.debug('Length of target_id list: {}'.format(len(target_ids)))
-                df['target'] = target_ids
-                df['source'] = source_ids[s_ids]
-                df.columns = ['similarity', 'target', 'source']
-                df["source_date"] = df["source"].map(source_dict)
-                df["target_date"] = df["target"].map(target_dict)
-                df['source_doctype'] = df['source'].map(source_dict2)
-                df['target_doctype'] = df['target'].map(target_dict2)
-                df = df.set_index('source')
-                
-                #Optional: if threshold is specified
-                if threshold:
-                    df = df.loc[df['similarity'] >= threshold]
-
-                #Make exports folder if it does not exist yet
-                if not 'comparisons' in os.listdir('.'):
-                    os.mkdir('comparisons')
-
-                #Optional: save as csv file
-                if to_csv == True:
-                    df.to_csv(os.path.join(destination,r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}_{i}.csv".format(now=now, target = target, source = source, i = i)))
-                #Otherwise: save as pickle file
-                else:
-                    df.to_pickle(os.path.join(destination,r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}_{i}.pkl".format(now=now, target = target, source = source, i=i)))
-
-                #Optional: additionally save as pajek file
-                if to_pajek == True:
-                    G = nx.Graph()
-                    # change int to str (necessary for pajek format)
-                    df['similarity'] = df['similarity'].apply(str)
-                    # change column name to 'weights' to faciliate later analysis
-                    df.rename({'similarity':'weight'}, axis=1, inplace=True) 
-                    # notes and weights from dataframe
-                    G = nx.from_pandas_edgelist(df, source='source', target='target', edge_attr='weight')
-                    # write to pajek
-                    nx.write_pajek(G, os.path.join(destination, r"INCA_softcosine_{source}_{target}_{now.tm_year}_{now.tm_mon}_{now.tm_mday}_{now.tm_hour}_{now.tm_min}_{now.tm_sec}_{i}.net".format(now=now, target=target, source=source, i=i)))
-
-                s_ids +=1 # move one doc down in source_ids
-                
-                logger.info("Done with source " + str(i) + " out of " + str(len(source_text)))
-
-            
-            
+            write_edge_list(comparisons, filename + '.' + file_format, sources, targets, file_format, pajek=filename + '.net' if to_pajek == True else None)
+
+
     def predict(self, *args, **kwargs):
         pass
 
@@ -8,7 +8,7 @@ requires a functioning elasticsearch instance.
 '''
 from .scraper_class import Scraper
 from ..clients._general_utils import *
-from .database import DATABASE_AVAILABLE
+from .database import DATABASE_AVAILABLE, BulkWriter
 if DATABASE_AVAILABLE:
     from .database import client
     from elasticsearch.exceptions import ConnectionError, ConnectionTimeout, NotFoundError, RequestError
@@ -180,7 +180,7 @@ class Client(Scraper):
         logger.warning("THIS METHOD IS NOT IMPLEMENTED")
         return False
 
-    def run(self,app='default', *args, **kwargs):
+    def run(self,app='default', *args, bulk=False, flush_every=None, **kwargs):
         """Run the .get() method of a class
 
         This is the wrapper that calls the `self.get()` method implemented
@@ -189,6 +189,10 @@ class Client(Scraper):
         See the docstring of that function for explanations about indicating
         selection criteria for classes.
 
+        If `bulk=True` (or `flush_every` is given), documents are buffered in a
+        `core.database.BulkWriter` and written in batches of `flush_every`
+        documents, independent of the batches yielded by `self.get()`.
+
         """
         credentials = self.load_credentials(app=app)
         if credentials:
@@ -199,14 +203,11 @@ class Client(Scraper):
 
         logger.info("Starting client")
         if DATABASE_AVAILABLE == True and kwargs.get('database',True):
-            for docs in self.get(credentials = usable_credentials, *args, **kwargs):
-                # in case the function yields individual rather than batch results
-                if type(docs) == dict:
-                    docs = [docs]
-                for doc in docs:
-                    doc = self._add_metadata(doc)
-                    self._verify(doc)
-                self._save_documents(docs)
+            if bulk or flush_every:
+                with BulkWriter(flush_every=flush_every or 500) as writer:
+                    self._save_results(self.get(credentials = usable_credentials, *args, **kwargs), writer=writer)
+            else:
+                self._save_results(self.get(credentials = usable_credentials, *args, **kwargs))
 
         else:
             results = []
@@ -221,6 +222,17 @@ class Client(Scraper):
 
         logger.info('Done with retrieval')
 
+    def _save_results(self, results, writer=None):
+        """Add metadata to the (batches of) documents yielded by `self.get()` and save them"""
+        for docs in results:
+            # in case the function yields individual rather than batch results
+            if type(docs) == dict:
+                docs = [docs]
+            for doc in docs:
+                doc = self._add_metadata(doc)
+                self._verify(doc)
+            self._save_documents(docs, writer=writer)
+
     @elasticsearch_required
     def store_application(self, app_credentials, appname="default", retries=3,**kwargs):
         """Create a new app to which credentials can be tied
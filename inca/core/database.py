@@ -16,12 +16,19 @@ from elasticsearch.exceptions import ConnectionTimeout
 import time
 from datetime import datetime
 import configparser
-import requests
 from celery import Task
 import os
 from tqdm import tqdm
+import queue
+import threading
 from hashlib import md5
+from itertools import islice, groupby
+import heapq
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from .filenames import id2filename
+from .fingerprints import url_hash
 
 config = configparser.ConfigParser()
 config.read('settings.cfg')
@@ -29,28 +36,112 @@ config.read('settings.cfg')
 logger = logging.getLogger("INCA")
 logging.getLogger("elasticsearch").setLevel(logging.CRITICAL)
 
-try:
-    client = Elasticsearch(
-        host=config.get('elasticsearch','%s.host' %config.get('inca','dependencies')),
-        port=int(config.get('elasticsearch','%s.port'%config.get('inca','dependencies') )),
-        timeout=60
-    )   # should be updated to reflect config
-    elastic_index  = config.get("elasticsearch","document_index")
-    DATABASE_AVAILABLE = True
-    check = int(client.info()['version']['number'][0])
-    if check < 6:
-        logger.warning("Your version of ElasticSearch is not compatible with inca, version 6 or higher is required. More information can be found here: ... Continuing without database. This means you will not be able to SAVE the results of any scraper or processor!")
-        DATABASE_AVAILABLE = False
-    # initialize mappings if index does not yet exist
+elastic_index  = config.get("elasticsearch", "document_index", fallback="inca")
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schema.json')
+
+def client_settings():
+    '''Returns the arguments for the elasticsearch client, as set in settings.cfg
+
+    Besides `<dependencies>.host` and `<dependencies>.port`, the [elasticsearch]
+    section can contain the following (optional) keys:
+
+        <dependencies>.hosts = host1:9200,host2:9200   several nodes, instead of host/port
+        sniff            = false   discover the other nodes of the cluster
+        maxsize          = 25      connections kept open per node
+        http_compress    = false   gzip request bodies (useful for bulk over slow links)
+        timeout          = 60      default timeout per request, in seconds
+        bulk_timeout     = 120     timeout of bulk requests, in seconds
+        retry_on_timeout = true    retry timed out requests on another connection
+        max_retries      = 3
+    '''
+    dependencies = config.get('inca', 'dependencies', fallback='standard')
+    hosts = config.get('elasticsearch', '%s.hosts' %dependencies, fallback=None)
+    if hosts:
+        hosts = [host.strip() for host in hosts.split(',') if host.strip()]
+    else:
+        hosts = [{'host':config.get('elasticsearch', '%s.host' %dependencies, fallback='localhost'),
+                  'port':config.getint('elasticsearch', '%s.port' %dependencies, fallback=9200)}]
+    settings = dict(hosts            = hosts,
+                    timeout          = config.getint('elasticsearch', 'timeout', fallback=60),
+                    maxsize          = config.getint('elasticsearch', 'maxsize', fallback=25),
+                    http_compress    = config.getboolean('elasticsearch', 'http_compress', fallback=False),
+                    retry_on_timeout = config.getboolean('elasticsearch', 'retry_on_timeout', fallback=True),
+                    max_retries      = config.getint('elasticsearch', 'max_retries', fallback=3))
+    if config.getboolean('elasticsearch', 'sniff', fallback=False):
+        settings.update(sniff_on_start=True, sniff_on_connection_fail=True, sniffer_timeout=60)
+    return settings
+
+BULK_TIMEOUT = config.getint('elasticsearch', 'bulk_timeout', fallback=120)
+
+_client = None
+_client_lock = threading.Lock()
+_available = False
+
+def _connect():
+    '''Create the elasticsearch client, check the version and initialize the index'''
+    global _available
+    es = None
     try:
-        #if not elastic_index in client.indices.get_aliases().keys():
-        if not client.indices.exists(elastic_index):
-            client.indices.create(elastic_index, json.load(open('schema.json')))
-    except Exception as e:
-        raise Exception("Unable to communicate with elasticsearch, {}".format(e))
-except:
-    logger.warning("No database functionality available. This means you will not be able to SAVE the results of any scraper or processor!")
-    DATABASE_AVAILABLE = False
+        es = Elasticsearch(**client_settings())
+        _available = True
+        check = int(es.info()['version']['number'][0])
+        if check < 6:
+            logger.warning("Your version of ElasticSearch is not compatible with inca, version 6 or higher is required. More information can be found here: ... Continuing without database. This means you will not be able to SAVE the results of any scraper or processor!")
+            _available = False
+        # initialize mappings if index does not yet exist
+        try:
+            if not es.indices.exists(elastic_index):
+                es.indices.create(elastic_index, json.load(open(SCHEMA_PATH)))
+        except Exception as e:
+            raise Exception("Unable to communicate with elasticsearch, {}".format(e))
+        # indices created before fingerprints (and META.ADDED_KEY) were stored lack their (keyword) mapping
+        try:
+            properties = json.load(open(SCHEMA_PATH))['mappings']['doc']['properties']
+            es.indices.put_mapping(index=elastic_index, doc_type='doc',
+                                   body={'properties':{key:properties[key] for key in ('fingerprint', 'META')}})
+        except Exception as e:
+            logger.warning("Unable to add the fingerprint mapping, fingerprint lookups may fail: {}".format(e))
+    except:
+        logger.warning("No database functionality available. This means you will not be able to SAVE the results of any scraper or processor!")
+        _available = False
+    return es
+
+def get_client():
+    '''Returns the elasticsearch client, connecting on first use'''
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _connect()
+    return _client
+
+class _LazyClient(object):
+    '''Stands in for the elasticsearch client until it is first used, so that
+    importing inca does not wait for elasticsearch'''
+
+    def __getattr__(self, name):
+        es = get_client()
+        if es is None:
+            raise AttributeError("No elasticsearch client available")
+        return getattr(es, name)
+
+class _DatabaseAvailable(object):
+    '''Evaluates to True if elasticsearch can be used, connecting on first use'''
+
+    def __bool__(self):
+        get_client()
+        return _available
+
+    def __eq__(self, other):
+        return bool(self) == other
+
+    def __hash__(self):
+        return hash(bool(self))
+
+    def __repr__(self):
+        return repr(bool(self))
+
+client = _LazyClient()
+DATABASE_AVAILABLE = _DatabaseAvailable()
 
 def get_document(doc_id):
     if not check_exists(doc_id)[0]:
@@ -80,7 +171,7 @@ def check_exists(document_id):
         return check_exists(document_id)
 
         
-def update_document(document, force=False, retry=0, max_retries=10):
+def update_document(document, force=False, retry=0, max_retries=10, partial=False):
     '''
     Documents should usually only be appended, not updated as such.
 
@@ -98,8 +189,30 @@ def update_document(document, force=False, retry=0, max_retries=10):
         counter of the number of tries
     max_retries (optional): integer [default=10]
         number of attempts to insert documents. Compared to retry integer.
+    partial (optional): boolean [default=False]
+        If True, `_source` should contain only the new or changed fields.
+        These are sent as a partial update (with `doc_as_upsert`) in a single
+        request, without retrieving the existing document first. `force` is
+        ignored.
 
     '''
+    if partial:
+        document = _remove_dots(document)
+        try:
+            client.update(index=elastic_index,
+                          doc_type='doc',
+                          id=document['_id'],
+                          body={'doc':document['_source'], 'doc_as_upsert':True},
+                          retry_on_conflict=3
+            )
+        except ConnectionTimeout as e:
+            if retry < max_retries:
+                logging.warning("FAILED TO UPDATE DOCUMENT {document[_id]}, {e} retrying".format(**locals()))
+                time.sleep(1)
+                update_document(document, retry=retry+1, max_retries=max_retries, partial=True)
+            else:
+                raise e
+        return
     exists, old_document = check_exists(document['_id'])
     if exists and not force:
         logging.debug('updating existing document {old_document[_id]}'.format(**locals()))
@@ -134,6 +247,51 @@ def update_document(document, force=False, retry=0, max_retries=10):
         insert_document(document)
     pass
 
+def update_documents(documents, chunksize=500, report=False):
+    """ Partially update a batch of documents in ES
+
+    Each document is sent as a partial `update` action with `doc_as_upsert`
+    through the bulk API, so only the new or changed fields are transferred
+    and no document is retrieved first.
+
+    Parameters
+    ----
+    documents : iterable
+        documents with an `_id` and a `_source` that contains only the
+        fields to add or change
+    chunksize : int (default=500)
+        The number of documents sent per bulk request
+    report : bool (default=False)
+        Whether to return the per-document outcomes instead of the updated
+        ID's
+
+    Returns
+    ----
+    List: the ID's of the updated documents
+    or, if `report=True`,
+    dict: `{'updated':[ids], 'failed':[ids]}`
+    """
+    actions = ({'_op_type':'update',
+                '_index':elastic_index,
+                '_type':'doc',
+                '_id':document['_id'],
+                '_retry_on_conflict':3,
+                'doc':_remove_dots(document['_source']),
+                'doc_as_upsert':True} for document in documents)
+    outcomes = {'updated':[], 'failed':[]}
+    for ok, item in helpers.streaming_bulk(client, actions, chunk_size=chunksize,
+                                           raise_on_error=False, request_timeout=BULK_TIMEOUT):
+        action, result = item.popitem()
+        if ok:
+            outcomes['updated'].append(result['_id'])
+        else:
+            logger.warning("Failed to update {id}: {error}".format(id=result.get('_id'), error=result.get('error')))
+            outcomes['failed'].append(result.get('_id'))
+    logger.debug(outcomes)
+    if report:
+        return outcomes
+    return outcomes['updated']
+
 def delete_document(document_id):
     ''' delete a document
 
@@ -163,6 +321,46 @@ def delete_document(document_id):
     response = client.delete(index=elastic_index, id=document['_id'], doc_type='doc')
     return True
 
+def delete_documents(document_ids, chunksize=500, report=False):
+    """ Delete a batch of documents through the bulk API
+
+    Parameters
+    ----
+    document_ids : iterable
+        The ids (or documents with an `_id`) to delete
+    chunksize : int (default=500)
+        The number of deletions sent per bulk request
+    report : bool (default=False)
+        Whether to return the per-document outcomes instead of the deleted
+        ID's
+
+    Returns
+    ----
+    List: the ID's of the deleted documents
+    or, if `report=True`,
+    dict: `{'deleted':[ids], 'not_found':[ids], 'failed':[ids]}`
+    """
+    actions = ({'_op_type':'delete',
+                '_index':elastic_index,
+                '_type':'doc',
+                '_id':document_id['_id'] if type(document_id) == dict else document_id}
+               for document_id in document_ids)
+    outcomes = {'deleted':[], 'not_found':[], 'failed':[]}
+    for ok, item in helpers.streaming_bulk(client, actions, chunk_size=chunksize,
+                                           raise_on_error=False, request_timeout=BULK_TIMEOUT):
+        action, result = item.popitem()
+        if ok:
+            outcomes['deleted'].append(result['_id'])
+        elif result.get('status') == 404:
+            outcomes['not_found'].append(result['_id'])
+        else:
+            logger.warning("Failed to delete {id}: {error}".format(id=result.get('_id'), error=result.get('error')))
+            outcomes['failed'].append(result.get('_id'))
+    logger.debug(outcomes)
+    if report:
+        return outcomes
+    return outcomes['deleted']
+
 def delete_doctype(doctype):
     '''Delete all documents of a given type'''
     for doc in scroll_query(
@@ -214,9 +412,56 @@ def insert_document(document, custom_identifier=''):
     logger.debug('added new document, content: {document}'.format(**locals()))
     return doc["_id"]
 
-def insert_documents(documents, identifiers='id'):
+def check_exists_many(document_ids, chunksize=1000, retry=0, max_retries=10):
+    """Check for a batch of identifiers whether they are already stored
+
+    Instead of one `check_exists` GET per document, identifiers are resolved
+    with one `mget` request (without `_source`) per chunk.
+
+    Parameters
+    ----
+    document_ids : list
+        The identifiers to look up
+    chunksize : int (default=1000)
+        The number of identifiers resolved per request
+    retry (optional): integer [default=0]
+        counter of the number of tries
+    max_retries (optional): integer [default=10]
+        number of attempts per chunk on timeouts
+
+    Returns
+    ----
+    dict
+        identifier (as string) => bool, indicating whether it exists
+    """
+    document_ids = [str(document_id) for document_id in document_ids
+                    if document_id is not None and str(document_id).strip()]
+    found = {document_id:False for document_id in document_ids}
+    if not DATABASE_AVAILABLE or not document_ids: return found
+    for start in range(0, len(document_ids), chunksize):
+        chunk = document_ids[start:start+chunksize]
+        try:
+            response = client.mget(index=elastic_index, doc_type='doc',
+                                   body={'ids':chunk}, _source=False)
+        except ConnectionTimeout:
+            if retry >= max_retries: raise
+            logger.warning('unable to check for documents in elasticsearch elastic_index [{elastic_index}]'.format(**{'elastic_index':elastic_index}))
+            time.sleep(1)
+            found.update(check_exists_many(chunk, chunksize, retry+1, max_retries))
+            continue
+        for doc in response['docs']:
+            found[doc['_id']] = doc.get('found', False)
+    logger.debug('elastic_index {elastic_index} - {num} of {total} documents found'.format(
+        elastic_index=elastic_index, num=sum(found.values()), total=len(found)))
+    return found
+
+def insert_documents(documents, identifiers='id', report=False, chunksize=500):
     """ Insert a batch of documents in ES
 
+    Existence of the identifiers is checked in bulk (see `check_exists_many`)
+    and documents are written with `op_type=create`, so documents stored by
+    another process in the meantime are skipped rather than overwritten.
+
     Parameters
     ----
     documents : list
@@ -228,9 +473,17 @@ def insert_documents(documents, identifiers='id'):
                used as the id, reverting to ES generated if the id is missing
             2) A list of equal size to the documents, containing the id for
                each document
+    report : bool (default=False)
+        Whether to return the per-document outcomes instead of the inserted
+        ID's
+    chunksize : int (default=500)
+        The number of documents sent per bulk request
+
     Returns
     ----
     List: the ID's under which the documents were inserted
+    or, if `report=True`,
+    dict: `{'inserted':[ids], 'skipped':[ids], 'failed':[ids]}`
 
     Note
     ----
@@ -245,38 +498,97 @@ def insert_documents(documents, identifiers='id'):
             )
             raise Exception("Unable to process document batch")
         for doc, identifier in zip(documents, identifiers):
-            test = check_exists(identifier)
-            if test[0] == True:
-                logger.warning("Identifier %s already exists in database, document is not inserted. Please choose a different identifier."% identifier)
-                identifier = {}
-                doc['_id']    = identifier
-            else:
-                doc['_id']    = identifier
+            doc['_id'] = identifier
 
     if type(identifiers) == str:
         logger.debug("Processing identifiers as key")
         for doc in documents:
             id_value = doc.get(identifiers,"")
             if id_value:
-                test = check_exists(id_value)
-                if test[0] == True:
-                    logger.warning("Identifier %s already exists in database, document is not inserted. Please choose a different identifier."% id_value)
-                    id_value = {}
-                    doc['_id'] = id_value
-                else:
-                    doc['_id'] = id_value
+                doc['_id'] = id_value
             else:
                 logger.warning("Key for identifier not found, reverting to ES generated.")
-                
-    documents = [doc for doc in documents if doc['_id'] != {}]
+
+    outcomes = {'inserted':[], 'skipped':[], 'failed':[]}
+    existing = check_exists_many([doc['_id'] for doc in documents if doc.get('_id')])
+    batch = []
     for doc in documents:
+        if doc.get('_id'):
+            identifier = str(doc['_id'])
+            if existing.get(identifier):
+                logger.warning("Identifier %s already exists in database, document is not inserted. Please choose a different identifier."% identifier)
+                outcomes['skipped'].append(identifier)
+                continue
+            existing[identifier] = True # skip repeated identifiers within the batch
+            doc['_op_type'] = 'create'
         doc['_index'] = elastic_index
         doc['_type']  = 'doc'
+        batch.append(doc)
+
     # Insert documents
-    logger.debug(helpers.bulk(client, documents))
-    return [doc.get('_id','random') for doc in documents]
+    for ok, item in helpers.streaming_bulk(client, batch, chunk_size=chunksize,
+                                           raise_on_error=False, request_timeout=BULK_TIMEOUT):
+        action, result = item.popitem()
+        if ok:
+            outcomes['inserted'].append(result['_id'])
+        elif result.get('status') == 409:
+            logger.warning("Identifier %s already exists in database, document is not inserted."% result['_id'])
+            outcomes['skipped'].append(result['_id'])
+        else:
+            logger.warning("Failed to insert {id}: {error}".format(id=result.get('_id'), error=result.get('error')))
+            outcomes['failed'].append(result.get('_id'))
+    logger.debug(outcomes)
+    if report:
+        return outcomes
+    return outcomes['inserted']
 
 
+def urls_exist(urls, chunksize=1000):
+    """Check for a batch of URLs whether a document with that URL is stored
+
+    URLs are compared by their fingerprint (the hash of the normalized URL,
+    see core.fingerprints) and, for documents stored without fingerprint, by
+    the exact URL. Both are looked up with one terms query per chunk, of
+    which all matching documents are scanned (only their `url` and
+    `fingerprint.url` are retrieved).
+
+    Parameters
+    ----
+    urls : list
+        The URLs to look up
+    chunksize : int (default=1000)
+        The number of URLs resolved per request
+
+    Returns
+    ----
+    dict
+        url => bool, indicating whether it exists
+    """
+    urls = list({url for url in urls if url})
+    found = {url:False for url in urls}
+    if not DATABASE_AVAILABLE or not urls: return found
+    for start in range(0, len(urls), chunksize):
+        chunk = urls[start:start+chunksize]
+        hashes = {url:url_hash(url) for url in chunk}
+        hits = helpers.scan(client, index=elastic_index, size=chunksize, query={
+            'query':{'bool':{'filter':{'bool':{'should':[{'terms':{'fingerprint.url':list(hashes.values())}},
+                                                         {'terms':{'url':chunk}}]}}}},
+            '_source':['url', 'fingerprint.url']})
+        known = set()
+        for hit in hits:
+            source = hit.get('_source', {})
+            if source.get('fingerprint', {}).get('url'):
+                known.add(source['fingerprint']['url'])
+            if source.get('url'):
+                known.add(url_hash(source['url']))
+        for url in chunk:
+            found[url] = hashes[url] in known
+    return found
+
+def url_exists(url):
+    """Check whether a document with this URL is stored (see `urls_exist`)"""
+    return urls_exist([url]).get(url, False)
+
 def update_or_insert_document(document, force=False, use_url = False):
     ''' Check whether a document exists, update if so
     use_url: if set to True it is additionally checked whether the url already exists. In case either only URL or only id exists the document is not inserted'''
@@ -285,8 +597,7 @@ def update_or_insert_document(document, force=False, use_url = False):
         if exists:
             if use_url == True:
                 if 'url' in document['_source'].keys():
-                    search = client.search(index = elastic_index, body = {'query':{'term':{'url':document['_source']['url']}}})
-                    if search['hits']['total'] != 0:
+                    if url_exists(document['_source']['url']):
                         return update_document(document, force=force)
                     else:
                         logger.info("_id found, but no matching URl. Document is not inserted")
@@ -296,8 +607,7 @@ def update_or_insert_document(document, force=False, use_url = False):
             if use_url == True:
                 try:
                     if 'url' in document['_source'].keys():
-                        search = client.search(index = elastic_index, body = {'query':{'term':{'url':document['_source']['url']}}})
-                        if search['hits']['total'] != 0:
+                        if url_exists(document['_source']['url']):
                             logger.info("Another document with the same URL already exists in database. Document is not inserted.")
                         else:
                             return insert_document(document)
@@ -341,6 +651,152 @@ class bulk_upsert(Task):
         return helpers.bulk(client, documents)
 
 
+class BulkWriter(object):
+    '''Buffer new documents and write them to elasticsearch in bulk
+
+    Documents are accumulated by `add` and written when `flush_every`
+    documents, `max_bytes` of (estimated) JSON or `flush_interval` seconds
+    since the last flush are reached. Flushing happens in the calling
+    thread, so a producing generator is paused while the buffer is written
+    (backpressure): memory use stays bounded by the buffer size.
+
+    Items rejected by elasticsearch with a retryable status (e.g. 429 when
+    the bulk queue is full) or a connection error are retried with
+    exponential backoff.
+
+    usage:
+        with BulkWriter(flush_every=500) as writer:
+            for doc in documents:
+                writer.add(doc)
+
+    Parameters
+    ----
+    flush_every : int (default=500)
+        the number of documents to buffer before writing
+    max_bytes : int (default=10MB)
+        the estimated payload size at which to write
+    flush_interval : int or float (default=60)
+        the number of seconds after which buffered documents are written
+    check_url : bool (default=False)
+        skip documents of which the `url` is already stored, checked with one
+        terms query per flush
+    max_retries : int (default=5)
+        number of attempts for failed items
+    initial_backoff : int or float (default=2)
+        seconds to wait before the first retry, doubled for each next retry
+    thread_count : int (default=1)
+        number of threads to write with, uses `helpers.parallel_bulk` if > 1
+    '''
+
+    RETRY_STATUS = (429, 502, 503, 504)
+
+    def __init__(self, flush_every=500, max_bytes=10*1024*1024, flush_interval=60,
+                 check_url=False, max_retries=5, initial_backoff=2, thread_count=1):
+        self.flush_every = flush_every
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.check_url = check_url
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.thread_count = thread_count
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.failed_ids = []
+        self._buffer = []
+        self._bytes = 0
+        self._last_flush = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, document, custom_identifier=None):
+        '''Add a document (or list of documents) to the buffer, flushing when needed'''
+        if type(document) == list:
+            for doc in document:
+                self.add(doc)
+            return
+        document = _remove_dots(document.get('_source', document))
+        action = {'_index':elastic_index, '_type':'doc', '_source':document}
+        if custom_identifier:
+            action['_id'] = custom_identifier
+            action['_op_type'] = 'create'
+        else:
+            action['_op_type'] = 'index'
+        self._buffer.append(action)
+        self._bytes += len(json.dumps(document, default=str))
+        if (len(self._buffer) >= self.flush_every or self._bytes >= self.max_bytes
+            or time.time() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _filter_existing_urls(self, actions):
+        urls = [action['_source']['url'] for action in actions if action['_source'].get('url')]
+        known = {url_hash(url) for url, exists in urls_exist(urls).items() if exists}
+        remaining = []
+        for action in actions:
+            url = action['_source'].get('url')
+            if url and url_hash(url) in known:
+                logger.info('A document with this URL already existed - did not save the new one.')
+                self.skipped += 1
+                continue
+            if url:
+                known.add(url_hash(url))
+            remaining.append(action)
+        return remaining
+
+    def _write(self, actions):
+        if self.thread_count > 1:
+            results = helpers.parallel_bulk(client, actions, thread_count=self.thread_count,
+                                            raise_on_error=False, raise_on_exception=False,
+                                            request_timeout=BULK_TIMEOUT)
+        else:
+            results = helpers.streaming_bulk(client, actions, raise_on_error=False,
+                                             raise_on_exception=False, request_timeout=BULK_TIMEOUT)
+        retry = []
+        for action, (ok, item) in zip(actions, results):
+            op, result = item.popitem()
+            if ok:
+                self.inserted += 1
+            elif result.get('status') == 409:
+                logger.warning("Identifier %s already exists in database, document is not inserted."% result.get('_id'))
+                self.skipped += 1
+            elif result.get('status') in self.RETRY_STATUS or 'exception' in result:
+                retry.append(action)
+            else:
+                logger.warning("Failed to insert {id}: {error}".format(id=result.get('_id'), error=result.get('error')))
+                self.failed += 1
+                self.failed_ids.append(result.get('_id'))
+        return retry
+
+    def flush(self):
+        '''Write all buffered documents'''
+        actions, self._buffer, self._bytes = self._buffer, [], 0
+        self._last_flush = time.time()
+        if not actions: return
+        if self.check_url:
+            actions = self._filter_existing_urls(actions)
+        for attempt in range(self.max_retries+1):
+            if not actions: break
+            if attempt:
+                wait = self.initial_backoff * 2**(attempt-1)
+                logger.warning("Retrying {num} documents in {wait} seconds".format(num=len(actions), wait=wait))
+                time.sleep(wait)
+            actions = self._write(actions)
+        if actions:
+            logger.warning("Giving up on {num} documents after {self.max_retries} retries".format(num=len(actions), self=self))
+            self.failed += len(actions)
+            self.failed_ids.extend(action.get('_id') for action in actions)
+        logger.debug("flushed bulk buffer: {self.inserted} inserted, {self.skipped} skipped, {self.failed} failed".format(self=self))
+
+    def close(self):
+        '''Flush remaining documents'''
+        self.flush()
+        logger.info("Bulk writer: {self.inserted} inserted, {self.skipped} skipped, {self.failed} failed".format(self=self))
+
+
 def _remove_dots(document):
     ''' elasticsearch is allergic to dots like '.' in keys.
     if you're not careful, it may choke!
@@ -352,7 +808,8 @@ def _remove_dots(document):
             document[k.replace('.','_')]= _remove_dots(v)
     return document
 
-def scroll_query(query,scroll_time='30m', log_interval=None):
+def scroll_query(query,scroll_time='30m', log_interval=None, slices=None, fields=None, exclude=None,
+                 pagination='scroll', after=None):
     """Scroll through the results of a query
 
     Parameters
@@ -366,7 +823,24 @@ def scroll_query(query,scroll_time='30m', log_interval=None):
     log_interval : int or float
         The interval to log an 'INFO'-level update of progress, defaults to
         argmin (N_results/1000 ; 100). Set to '0' for no logging, a integer for
-        every Nth-results and a float for every Nth-fraction of the total
+        every Nth-results and a float for every Nth-fraction of the total.
+        The total is retrieved with a `_count` request, set to '0' to skip it.
+    slices : int (default=None)
+        If set, the query is split in `slices` sliced scrolls that are read
+        in parallel threads and merged into one generator. The order of the
+        results is not preserved. Use `sliced_queries` to read the slices in
+        separate (worker) processes instead.
+    fields : list (default=None)
+        If set, only these fields of `_source` are retrieved
+    exclude : list (default=None)
+        Fields of `_source` not to retrieve, such as 'htmlsource' or 'META'
+    pagination : string (default='scroll')
+        'scroll' or 'search_after'. With 'search_after', no scroll context is
+        kept open; results are sorted by PAGINATION_SORT and can be resumed
+        by passing the `sort` values of the last handled document as `after`
+        (see `search_after_query`). Ignored if `slices` is set.
+    after : list (default=None)
+        With pagination='search_after', continue after these `sort` values
 
     yields
     ----
@@ -378,7 +852,7 @@ def scroll_query(query,scroll_time='30m', log_interval=None):
         total = 0
         update_step =  -1
     else:
-        total = client.search(index = elastic_index, body=query)['hits']['total']
+        total = count_query(query)
         if type(log_interval)==int:
             update_step = log_interval
         elif type(log_interval)==float:
@@ -386,9 +860,300 @@ def scroll_query(query,scroll_time='30m', log_interval=None):
         else:
             update_step = min((total/1000), 100)
 
-    for doc in tqdm(helpers.scan(client, index = elastic_index, query=query, scroll=scroll_time), total = total):
+    query = source_filter(query, fields, exclude)
+    if slices and slices > 1:
+        results = _sliced_scan(query, slices, scroll_time)
+    elif pagination == 'search_after':
+        results = search_after_query(query, after=after)
+    else:
+        results = helpers.scan(client, index = elastic_index, query=query, scroll=scroll_time)
+    for doc in tqdm(results, total = total, disable = log_interval == 0):
         yield doc
 
+def source_filter(query, fields=None, exclude=None):
+    """Add `_source` includes/excludes to (a copy of) a query
+
+    Parameters
+    ----
+    query : dict
+        An elasticsearch query
+    fields : list or string (default=None)
+        The `_source` fields to retrieve, all if None
+    exclude : list or string (default=None)
+        The `_source` fields not to retrieve
+
+    Returns
+    ----
+    dict
+        The query, including a `_source` filter if fields or exclude is set
+    """
+    if not fields and not exclude:
+        return query
+    if type(fields) == str: fields = [fields]
+    if type(exclude) == str: exclude = [exclude]
+    _source = {}
+    if fields:
+        _source['includes'] = list(fields)
+    if exclude:
+        _source['excludes'] = list(exclude)
+    return dict(query, _source=_source)
+
+def count_query(query):
+    """Count the results of a query with a `_count` request
+
+    Parameters
+    ----
+    query : dict
+        An elasticsearch query, only the 'query' key is used
+
+    Returns
+    ----
+    int
+        The number of matching documents
+    """
+    body = {'query':query['query']} if 'query' in query else None
+    return client.count(index=elastic_index, body=body)['count']
+
+def sliced_queries(query, slices):
+    """Split a query in `slices` sliced-scroll queries
+
+    Each of the returned queries can be passed to `scroll_query` separately,
+    for instance in different worker processes, to read disjoint parts of
+    the results in parallel.
+
+    Parameters
+    ----
+    query : dict
+        An elasticsearch query
+    slices : int
+        The number of slices
+
+    Returns
+    ----
+    list
+        A list of `slices` elasticsearch queries
+    """
+    return [dict(query, slice={'id':slice_id, 'max':slices}) for slice_id in range(slices)]
+
+def _sliced_scan(query, slices, scroll_time, queue_size=1000):
+    """Read the slices of a query in parallel threads and merge the results"""
+    results = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(sliced_query):
+        try:
+            for doc in helpers.scan(client, index=elastic_index, query=sliced_query, scroll=scroll_time):
+                if not put(doc): return
+        except Exception as e:
+            put((done, e))
+        finally:
+            put(done)
+
+    threads = [threading.Thread(target=worker, args=(sliced_query,), daemon=True)
+               for sliced_query in sliced_queries(query, slices)]
+    for thread in threads:
+        thread.start()
+    finished = 0
+    try:
+        while finished < slices:
+            item = results.get()
+            if item is done:
+                finished += 1
+            elif type(item) == tuple and item[0] is done:
+                raise item[1]
+            else:
+                yield item
+    finally:
+        stop.set()
+
+# Page size and (unique) sort field for search_after pagination, and how long a
+# point in time is kept open between pages, can be set in the [elasticsearch]
+# section of settings.cfg. The sort field should have doc_values: sorting on
+# _id needs fielddata. META.ADDED_KEY is added to new documents by _add_metadata,
+# and to documents stored before that by add_pagination_keys.
+PAGE_SIZE = int(config.get('elasticsearch', 'page_size', fallback=500))
+PAGINATION_FIELD = config.get('elasticsearch', 'pagination_sort', fallback='META.ADDED_KEY')
+PAGINATION_SORT = [{PAGINATION_FIELD:{'order':'asc', 'unmapped_type':'keyword'}}]
+PIT_KEEP_ALIVE = config.get('elasticsearch', 'pit_keep_alive', fallback='10m')
+
+def search_after_query(query, sort=None, after=None, size=None, fields=None, exclude=None, pit=False):
+    """Page through the results of a query with `search_after`
+
+    Unlike a scroll, no search context is kept open between pages, so a
+    consumer can pause (or stop and later resume from the `sort` values of
+    the last document it handled) at no cost to the database, and many
+    consumers can run in parallel without running into search context limits.
+
+    With the default sort (PAGINATION_SORT), documents that lack the sort
+    field (stored before META.ADDED_KEY was added) have no position to page
+    from: they are scrolled through first. When resuming with `after`, they
+    are skipped, and their number is logged. Run `add_pagination_keys` once
+    to give existing documents a sort value.
+
+    Parameters
+    ----
+    query : dict
+        An elasticsearch query
+    sort : list (default=PAGINATION_SORT, or `_shard_doc` with `pit=True`)
+        The sort order, which should be unique per document and use fields
+        with doc_values, e.g. `[{'META.ADDED':'asc'}, {'META.ADDED_KEY':'asc'}]`
+    after : list (default=None)
+        The `sort` values of the document to continue after
+    size : int (default=PAGE_SIZE)
+        The number of documents retrieved per request
+    fields : list (default=None)
+        If set, only these fields of `_source` are retrieved
+    exclude : list (default=None)
+        Fields of `_source` not to retrieve
+    pit : bool (default=False)
+        Page through a point in time, so that changes to the index during the
+        run do not affect the results. Requires elasticsearch (and its python
+        client) 7.10 or higher; otherwise, the live index is used. The point
+        in time is kept open for PIT_KEEP_ALIVE between pages. If it expires,
+        a new one is opened to continue after the last document, unless the
+        sort is on `_shard_doc`, which is only valid within one point in time.
+
+    yields
+    ----
+    dict
+        A stored document, including its `sort` values
+    """
+    size = size or PAGE_SIZE
+    body = source_filter(query, fields, exclude)
+    search = {'index':elastic_index}
+    pit_id = None
+    if pit and hasattr(client, 'open_point_in_time'):
+        pit_id = client.open_point_in_time(index=elastic_index, keep_alive=PIT_KEEP_ALIVE)['id']
+        search = {}
+        sort = sort or [{'_shard_doc':'asc'}]
+    elif pit:
+        logger.info("Points in time are not supported by this elasticsearch client, using the live index")
+    if not sort:
+        sort = PAGINATION_SORT
+    if sort is PAGINATION_SORT and not PAGINATION_FIELD.startswith('_'):
+        exists = {'exists':{'field':PAGINATION_FIELD}}
+        legacy = dict(body, query={'bool':{'filter':body.get('query', {'match_all':{}}), 'must_not':exists}})
+        if after:
+            skipped = count_query(legacy)
+            if skipped:
+                logger.warning("Skipping {} documents without {}, which cannot be resumed from. "
+                               "Run add_pagination_keys to include them".format(skipped, PAGINATION_FIELD))
+        else:
+            legacy_count = 0
+            for hit in helpers.scan(client, index=elastic_index, query=legacy):
+                hit.pop('sort', None) # scroll order, not a position to resume from
+                legacy_count += 1
+                yield hit
+            if legacy_count:
+                logger.warning("Scrolled through {} documents without {}. "
+                               "Run add_pagination_keys to page through them as well".format(legacy_count, PAGINATION_FIELD))
+        body = dict(body, query={'bool':{'filter':[body.get('query', {'match_all':{}}), exists]}})
+    body = dict(body, sort=sort, size=size)
+    try:
+        while True:
+            if after:
+                body['search_after'] = after
+            if pit_id:
+                body['pit'] = {'id':pit_id, 'keep_alive':PIT_KEEP_ALIVE}
+            try:
+                response = client.search(body=body, **search)
+            except NotFoundError:
+                if not pit_id or '_shard_doc' in json.dumps(sort):
+                    raise
+                logger.warning("The point in time expired, continuing in a new one (see pit_keep_alive in settings.cfg)")
+                pit_id = client.open_point_in_time(index=elastic_index, keep_alive=PIT_KEEP_ALIVE)['id']
+                continue
+            pit_id = response.get('pit_id', pit_id)
+            hits = response['hits']['hits']
+            for hit in hits:
+                yield hit
+            if len(hits) < size:
+                break
+            after = hits[-1]['sort']
+    finally:
+        if pit_id:
+            try:
+                client.close_point_in_time(body={'id':pit_id})
+            except NotFoundError:
+                pass
+
+def add_pagination_keys(query=None):
+    """Give documents stored before META.ADDED_KEY was added a sort value for search_after pagination
+
+    New documents get a random META.ADDED_KEY at ingest. For existing ones,
+    it is set to their `_id` (which is unique as well) in an update by query,
+    so that `search_after_query` and incremental processor runs page through
+    them instead of scrolling. Only documents without the key are updated.
+
+    Parameters
+    ----
+    query : dict (default=None)
+        An elasticsearch query, to only update some documents (e.g. one doctype)
+
+    Returns
+    ----
+    int
+        The number of updated documents
+    """
+    missing = {'bool':{'filter':(query or {}).get('query', {'match_all':{}}),
+                       'must_not':{'exists':{'field':'META.ADDED_KEY'}}}}
+    script = {'lang':'painless',
+              'source':"if (ctx._source.META == null) { ctx._source.META = new HashMap(); } "
+                       "ctx._source.META.ADDED_KEY = ctx._id;"}
+    # run as a task and poll it, large indices take longer than any request timeout
+    task = client.update_by_query(index=elastic_index, body={'query':missing, 'script':script},
+                                  conflicts='proceed', refresh=True, wait_for_completion=False)['task']
+    status = client.tasks.get(task_id=task)
+    while not status.get('completed'):
+        time.sleep(5)
+        status = client.tasks.get(task_id=task)
+    updated = status.get('response', {}).get('updated', 0)
+    logger.info("Added META.ADDED_KEY to {} documents".format(updated))
+    return updated
+
+######################
+#
+# State of long-running tasks
+#
+######################
+
+state_index = "{}_state".format(config.get("elasticsearch", "document_index", fallback="inca"))
+
+def get_state(key):
+    """Returns the stored state (a dict) of a long-running task, {} if there is none
+
+    States are kept in a separate index (`<document_index>_state`), e.g. to
+    store the position of a processor so that it can resume after a crash.
+    """
+    if not DATABASE_AVAILABLE: return {}
+    try:
+        return client.get(index=state_index, doc_type='doc', id=key)['_source']
+    except NotFoundError:
+        return {}
+
+def set_state(key, state):
+    """Store the state (a dict) of a long-running task"""
+    if not DATABASE_AVAILABLE: return
+    client.index(index=state_index, doc_type='doc', id=key, body=state)
+
+def delete_state(key):
+    """Remove the stored state of a long-running task, to start it from scratch"""
+    if not DATABASE_AVAILABLE: return
+    try:
+        client.delete(index=state_index, doc_type='doc', id=key)
+    except NotFoundError:
+        pass
+
 
 
 #####################
@@ -453,25 +1218,19 @@ def check_snapshot_settings(snapshot):
     return client.snapshot.status(snapshot)
 
 def list_backups():
-    response = requests.get('http://%s:%s/_snapshot/inca_backup/*' %(config.get('elasticsearch','%s.host' %config.get('inca','dependencies')),
-                                                                     config.get('elasticsearch','%s.port' %config.get('inca','dependencies'))))
-    return response.json()
+    return client.snapshot.get(repository='inca_backup', snapshot='_all')
 
 
 def delete_backup(snapshot=None, dryrun=True):
     if snapshot is None:
         print('You need to specify the name of a snapshot to delete. You can get a list of snapshots with .list_backups()')
         return
-    command = 'http://%s:%s/_snapshot/inca_backup/%s' %(config.get('elasticsearch','%s.host' %config.get('inca','dependencies')),
-                                                  config.get('elasticsearch','%s.port' %config.get('inca','dependencies')),
-                                                  snapshot)
     if dryrun==True:
-        print('This is a dry-run, nothing happens. If you specify dryrun=False, the following DELETE request will be issued:')
-        print(command)
+        print('This is a dry-run, nothing happens. If you specify dryrun=False, the following snapshot will be deleted:')
+        print('inca_backup/{}'.format(snapshot))
         return
     else:
-        response = requests.delete(command)
-        return response.json()
+        return client.snapshot.delete(repository='inca_backup', snapshot=snapshot)
 
 
 def create_backup(name):
@@ -523,75 +1282,170 @@ def restore_backup(name):
 # deduplication
 ################
 
-def deduplicate(g, dryrun=True, check_keys = ["text", "title", "doctype", "publication_date"]):
+def _spill(run):
+    """Write a sorted run of (hash, sequence, id) tuples to a temporary file"""
+    run.sort()
+    spillfile = tempfile.TemporaryFile(mode='w+')
+    for entry in run:
+        spillfile.write(json.dumps(entry) + '\n')
+    spillfile.seek(0)
+    return spillfile
+
+def _exact_duplicate_groups(g, check_keys, max_in_memory=500000):
+    """Yields lists of ids of documents with identical `check_keys`, first seen first
+
+    Only a hash, a sequence number and the id of each document are kept. When
+    more than `max_in_memory` documents are read, the hashes are sorted and
+    spilled to a temporary file, and all sorted runs are merged afterwards.
+    """
+    run, spillfiles = [], []
+    for sequence, doc in enumerate(g):
+        combined_key = ""
+        for mykey in check_keys:
+            combined_key += str(doc['_source'].get(mykey,''))
+        run.append((md5(combined_key.encode('utf-8')).hexdigest(), sequence, doc['_id']))
+        if len(run) >= max_in_memory:
+            spillfiles.append(_spill(run))
+            run = []
+    run.sort()
+    logger.info('Created hashtable, {} runs spilled to disk'.format(len(spillfiles)))
+    runs = [iter(run)] + [(tuple(json.loads(line)) for line in spillfile) for spillfile in spillfiles]
+    try:
+        for hashval, entries in groupby(heapq.merge(*runs), key=lambda entry: entry[0]):
+            ids = [_id for hashval, sequence, _id in entries]
+            if len(ids) > 1:
+                yield ids
+    finally:
+        for spillfile in spillfiles:
+            spillfile.close()
+
+def _near_duplicate_groups(g, near_keys, threshold):
+    """Returns lists of ids of documents whose `near_keys` are near-duplicates"""
+    from .minhash import MinHashLSH
+    lsh = MinHashLSH(threshold=threshold)
+    for doc in g:
+        text = " ".join(str(doc['_source'].get(mykey) or '') for mykey in near_keys).strip()
+        if text:
+            lsh.add(doc['_id'], text)
+    return lsh.groups()
+
+def duplicate_groups_by_field(field, query=None, max_ids=100, page_size=1000):
+    """Yields lists of ids of documents with the same value of a (keyword) field
+
+    The values that occur more than once are found by elasticsearch, with a
+    `composite` aggregation that is paged with its `after_key`, so no
+    documents have to be retrieved to find them and no value is missed. The
+    ids of the groups on a page are then retrieved with one multi-search;
+    groups of more than `max_ids` documents are scrolled through completely.
+    The oldest document (by `META.ADDED`) comes first.
+
+    Parameters
+    ----
+    field : string
+        A keyword field with a hash of the content, such as a fingerprint
+    query : dict (default=None)
+        An elasticsearch query to restrict the documents, e.g. to a doctype
+    max_ids : int (default=100)
+        The number of ids retrieved per group in the multi-search, larger
+        groups are retrieved with a scroll
+    page_size : int (default=1000)
+        The number of values per page of the aggregation
+    """
+    query = (query or {}).get('query', {'match_all':{}})
+    sort = [{'META.ADDED':{'order':'asc', 'unmapped_type':'date'}}]
+    composite = {'size':page_size, 'sources':[{'value':{'terms':{'field':field}}}]}
+    while True:
+        values = client.search(index=elastic_index, body={
+            'size':0, 'query':query, 'aggs':{'values':{'composite':composite}}
+            })['aggregations']['values']
+        buckets = values['buckets']
+        if not buckets:
+            break
+        duplicates = [bucket for bucket in buckets if bucket['doc_count'] > 1]
+        searches = []
+        for bucket in duplicates:
+            searches.append({'index':elastic_index})
+            searches.append({'size':max_ids, '_source':False, 'sort':sort,
+                             'query':{'bool':{'must':query, 'filter':{'term':{field:bucket['key']['value']}}}}})
+        responses = searches and client.msearch(body=searches)['responses'] or []
+        for bucket, search, response in zip(duplicates, searches[1::2], responses):
+            if 'error' in response:
+                logger.warning("Could not retrieve the documents with {field} {value}: {error}".format(
+                    field=field, value=bucket['key']['value'], error=response['error']))
+                continue
+            ids = [hit['_id'] for hit in response['hits']['hits']]
+            if len(ids) < bucket['doc_count']:
+                ids = [hit['_id'] for hit in helpers.scan(client, index=elastic_index, preserve_order=True,
+                                                           query={'query':search['query'], 'sort':sort, '_source':False})]
+            yield ids
+        composite['after'] = values.get('after_key', buckets[-1]['key'])
+
+def deduplicate(g, dryrun=True, check_keys = ["text", "title", "doctype", "publication_date"],
+                near_duplicates=False, near_keys=["title", "text"], threshold=0.8,
+                hash_field=None, query=None, max_in_memory=500000):
     '''
     Takes a document generator `g` as input and lists (if `dryrun=True`)
     or remove (if `dryrun=False`) duplicate documents. 
     With ```check_keys = ['key1', 'key2', ...] ``` you can specify the keys
     on which the documents are compared.
 
+    Only hashes of the documents are kept in memory; beyond `max_in_memory`
+    documents, they are spilled to disk. Duplicates are deleted through the
+    bulk API. Of every group of duplicates, the first document is kept.
+
+    With `near_duplicates=True`, documents whose `near_keys` are similar
+    (estimated Jaccard similarity of their word shingles above `threshold`)
+    rather than identical are considered duplicates, for instance wire copy
+    that is published with small edits (see `core.minhash`).
+
+    With `hash_field` (e.g. 'fingerprint.text'), the duplicates are found by
+    elasticsearch, based on a stored hash of the content, for the documents
+    matching `query`; `g` is
+    not used then and may be None (see `duplicate_groups_by_field`).
+
     Example usage:
     ```
     g = myinca.database.doctype_generator('nu')
-    myinca.database.deduplicate('nu', dryrun = True)
+    myinca.database.deduplicate(g, dryrun = True)
     ```
 
     Functionality inspired by https://www.elastic.co/blog/how-to-find-and-remove-duplicate-documents-in-elasticsearch
     '''
 
+    if hash_field:
+        groups = duplicate_groups_by_field(hash_field, query)
+    elif near_duplicates:
+        groups = _near_duplicate_groups(g, near_keys, threshold)
+    else:
+        groups = _exact_duplicate_groups(g, check_keys, max_in_memory)
+    to_delete = []
+    for array_of_ids in groups:
+        to_delete.extend(array_of_ids[1:]) # let's always keep the first doc
 
-    dict_of_duplicate_docs = {}
-    for doc in g:
-        combined_key = ""
-        for mykey in check_keys:
-            combined_key += str(doc['_source'].get(mykey,''))
-        _id = doc["_id"]
-        hashval = md5(combined_key.encode('utf-8')).digest()
-        dict_of_duplicate_docs.setdefault(hashval, []).append(_id)
-    logger.info('Created hashtable')    
-        # Search through the hash of doc values to see if any
-        # duplicate hashes have been found
-    numdups = 0
     if dryrun:
-        for hashval, array_of_ids in dict_of_duplicate_docs.items():
-            id_to_keep = array_of_ids.pop(0) # let's always keep the first doc
-            if len(array_of_ids) > 0:
-                # print("********** Duplicate docs hash=%s **********" % hashval)
-                # Get the documents that have mapped to the current hashval
-                matching_docs = client.mget(index=elastic_index, doc_type='doc',  body={"ids": array_of_ids})
-     
-                for doc in matching_docs['docs']:
-                    numdups +=1
-                    try: 
-                        print("{}\t{}\t{}".format(
-                            doc['_source'].get('title',' '*20)[:20],
-                            doc['_source'].get('text',' '*20)[:20],
-                            doc['_source'].get('publication_date',' '*10)))
-                    except:
-                        pass
+        numdups = 0
+        for start in range(0, len(to_delete), 1000):
+            matching_docs = client.mget(index=elastic_index, doc_type='doc', body={"ids": to_delete[start:start+1000]},
+                                        _source=['title', 'text', 'publication_date'])
+            for doc in matching_docs['docs']:
+                numdups +=1
+                try: 
+                    print("{}\t{}\t{}".format(
+                        doc['_source'].get('title',' '*20)[:20],
+                        doc['_source'].get('text',' '*20)[:20],
+                        doc['_source'].get('publication_date',' '*10)))
+                except:
+                    pass
         print('\nUse a fresh generator and run again with `dryrun=False` to remove these {} documents'.format(numdups))
     else:
-        deleted = 0
-        to_delete = sum([len(array_of_ids)-1 for array_of_ids in dict_of_duplicate_docs.values()])
-        q = 'Type: Yes, go for it! if you really want to delete {} documents '.format(to_delete)
+        q = 'Type: Yes, go for it! if you really want to delete {} documents '.format(len(to_delete))
         reallydelete = input(q)
         if reallydelete == 'Yes, go for it!':
-            for hashval, array_of_ids in dict_of_duplicate_docs.items():
-                id_to_keep = array_of_ids.pop(0) # let's always keep the first doc
-                for _id in array_of_ids:
-                    try: 
-                        client.delete(index=elastic_index,
-                                      doc_type='doc',
-                                      id=_id)
-                        deleted +=1
-                    except:
-                        print('Could not delete {}.'.format(_id))
-            print('Deleted {} documents'.format(deleted))
-        
-
+            outcome = delete_documents(to_delete, report=True)
+            for _id in outcome['failed']:
+                print('Could not delete {}.'.format(_id))
+            print('Deleted {} documents'.format(len(outcome['deleted'])))
 
-
-    
 ######################
 # FIX BROKEN DOCUMENTS
 ######################
@@ -616,6 +1470,9 @@ def reparse(g, f, force=False):
     g = myinca.database.document_generator('doctype:"nu" AND publication_date:[2017-01-01 TO 2017-03-15]')
     myinca.database.reparse(g, f, force = False)
     ```
+
+    To reparse many documents, use `reparse_bulk`, which parses in parallel
+    processes and writes the results with bulk partial updates.
     '''
 
     # TODO reparse now only repareses the the texts, not other fields (such as author, title etc)
@@ -650,3 +1507,134 @@ def reparse(g, f, force=False):
             doc['_source']['text_old'] = text_old   # to be sure, store old text as well
 
         update_document(doc, force=True) # this force=True has nothing to do with the parameter passed to reparse()
+
+def _reparse_batch(f, batch, fields, force, keep_old):
+    """Reparse a batch of (id, _source) tuples, returns (id, changes, diffs) tuples"""
+    results = []
+    for _id, source in batch:
+        try:
+            parsed = f(None, source['htmlsource']) or {}
+        except Exception as e:
+            logger.warning("Could not reparse {_id}: {e}".format(**locals()))
+            continue
+        changes, diffs = {}, []
+        for field in (fields or parsed.keys()):
+            if field not in parsed: continue
+            old, new = source.get(field), parsed[field]
+            if old == new: continue
+            if old and not force: continue
+            changes[field] = new
+            if keep_old and old and type(old) == str and old.strip():
+                changes[field + '_old'] = old
+            diffs.append({'field':field, 'old':old, 'new':new})
+        results.append((_id, changes, diffs))
+    return results
+
+def _write_checkpoint(checkpoint, state):
+    with open(checkpoint + '.tmp', 'w') as checkpointfile:
+        json.dump(state, checkpointfile)
+    os.replace(checkpoint + '.tmp', checkpoint)
+
+def reparse_bulk(query, f, fields=['text'], force=False, keep_old=True, workers=None,
+                 batchsize=100, slices=16, checkpoint=None, dryrun=False, report=None):
+    '''
+    Reparses the `htmlsource` of all documents matching a query, for instance
+    after a site changed its layout, and writes the changed fields back.
+
+    Only `_id`, `htmlsource` and the reparsed fields are retrieved. Parsing is
+    done in a pool of processes and the changes are written with bulk partial
+    updates (see `update_documents`).
+
+    The query is read in `slices` sliced scrolls, one after the other. After
+    each slice, progress is written to the `checkpoint` file (if given); when
+    the same query is run again with that checkpoint, finished slices are
+    skipped, so an interrupted run resumes where it stopped.
+
+    Arguments
+    ---------
+    query (string or dict): a query string or elasticsearch query
+    f (function): a parse function taken from an INCA-scraper, called as
+        f(None, htmlsource). It needs to be importable by the worker processes,
+        e.g. `news_scraper.nu.parsehtml`
+    fields (list): the fields of the parse result to write back, all if None
+    force (bool): If True, non-empty fields are replaced as well.
+    keep_old (bool): store overwritten (non-empty) text in `<field>_old`
+    workers (int): the number of parsing processes, defaults to the number of CPUs
+    batchsize (int): the number of documents sent to a process at a time
+    slices (int): the number of slices to read (and checkpoint) the query in
+    checkpoint (string): path of a JSON file to store progress in
+    dryrun (bool): if True, nothing is written to the database
+    report (string): path of a file to write the changes to, one JSON line
+        per document with the old and new value of each changed field
+
+    Returns
+    -------
+    dict with the number of documents `processed`, `changed`, `updated` and `failed`
+
+    Example usage:
+    ```
+    from inca.rssscrapers import news_scraper
+    f = news_scraper.nu.parsehtml
+    myinca.database.reparse_bulk('doctype:"nu"', f, force=True,
+                                 checkpoint='reparse_nu.json', dryrun=True, report='reparse_nu.jsonl')
+    ```
+    '''
+    if type(query) == str:
+        query = {"query":{"bool":{"must":{"query_string":{"query":query}}}}}
+    queries = sliced_queries(query, slices) if slices and slices > 1 else [query]
+    source_fields = ['htmlsource'] + fields if fields else None
+
+    state = {'query':query, 'slices':len(queries), 'done':[],
+             'processed':0, 'changed':0, 'updated':0, 'failed':0}
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint) as checkpointfile:
+            previous = json.load(checkpointfile)
+        if previous.get('query') == query and previous.get('slices') == len(queries):
+            state = previous
+            logger.info("Resuming from {checkpoint}, {n} of {total} slices done".format(
+                checkpoint=checkpoint, n=len(state['done']), total=len(queries)))
+        else:
+            logger.warning("Checkpoint {checkpoint} is for another query, starting over".format(**locals()))
+
+    reportfile = open(report, 'a') if report else None
+    workers = workers or os.cpu_count() or 1
+
+    def handle(results):
+        state['processed'] += len(results)
+        updates = []
+        for _id, changes, diffs in results:
+            if not changes: continue
+            state['changed'] += 1
+            updates.append({'_id':_id, '_source':changes})
+            if reportfile:
+                reportfile.write(json.dumps({'_id':_id, 'changes':diffs}, default=str) + '\n')
+        if updates and not dryrun:
+            outcome = update_documents(updates, report=True)
+            state['updated'] += len(outcome['updated'])
+            state['failed'] += len(outcome['failed'])
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for slice_id, slice_query in enumerate(queries):
+                if slice_id in state['done']: continue
+                documents = ((doc['_id'], doc['_source']) for doc in
+                             scroll_query(slice_query, fields=source_fields, log_interval=0)
+                             if doc['_source'].get('htmlsource'))
+                pending = deque()
+                while True:
+                    batch = list(islice(documents, batchsize))
+                    if not batch: break
+                    pending.append(pool.submit(_reparse_batch, f, batch, fields, force, keep_old))
+                    while len(pending) >= 2 * workers:
+                        handle(pending.popleft().result())
+                while pending:
+                    handle(pending.popleft().result())
+                state['done'].append(slice_id)
+                if checkpoint:
+                    _write_checkpoint(checkpoint, state)
+                logger.info("Slice {n} of {total} done: {processed} processed, {changed} changed, {updated} updated".format(
+                    n=len(state['done']), total=len(queries), **state))
+    finally:
+        if reportfile:
+            reportfile.close()
+    return {key:state[key] for key in ['processed', 'changed', 'updated', 'failed']}
@@ -10,11 +10,13 @@ The basic functionality is adding meta-data
 import logging
 import datetime
 import types
+import uuid
 from celery import Task
 from .search_utils import doctype_last, doctype_first
 logger = logging.getLogger("INCA")
 
 from .database import insert_document, insert_documents, update_document, check_exists
+from .fingerprints import fingerprint
 
 class Document(Task):
     '''
@@ -31,6 +33,7 @@ class Document(Task):
     version      = '' # string indicating version of function to track changes (e.g. "0.1")
     date         = datetime.datetime(year=1, day=1, month=1) # last function update date
     doctype      = '' # The doctype of documents generated by this function
+    fingerprint_simhash = False # whether to add a SimHash of the text to the fingerprint of documents
 
     def runwrap(self, action='run', *args, **kwargs):
         '''
@@ -49,7 +52,7 @@ class Document(Task):
         '''
         pass
 
-    def _save_document(self, document, forced=False):
+    def _save_document(self, document, forced=False, writer=None):
         '''
         Documents are saved to the general document collection
         defined in the core.database file.
@@ -60,10 +63,13 @@ class Document(Task):
         Note that by default, documents can only extend, not replace
         old documents.
 
+        If a `core.database.BulkWriter` is passed as `writer`, the document
+        is buffered and written in bulk instead of indexed directly.
+
         '''
         if type(document) == list:
             logger.debug("Detected document batch, forwarding to batch saver")
-            self._save_documents(document, forced=forced)
+            self._save_documents(document, forced=forced, writer=writer)
 
         else:
             logger.debug("Saving individual document")
@@ -77,9 +83,12 @@ class Document(Task):
             else :
                 custom_identifier = None
             self._verify(document)
-            insert_document(document, custom_identifier=custom_identifier)
+            if writer is not None:
+                writer.add(document, custom_identifier=custom_identifier)
+            else:
+                insert_document(document, custom_identifier=custom_identifier)
 
-    def _save_documents(self, documents, forced=False):
+    def _save_documents(self, documents, forced=False, writer=None):
         """
         Handles a batch of multiple documents for efficient processing in ES.
 
@@ -95,10 +104,14 @@ class Document(Task):
             if '_id' in document.keys():
                 custom_identifier = document.pop('_id')
             else :
-                custom_identifier = None
+                # same as insert_documents(identifiers='id'), so reruns do not duplicate documents
+                custom_identifier = document.get('id')
             self._verify(document)
+            if writer is not None:
+                writer.add(document, custom_identifier=custom_identifier)
 
-        insert_documents(documents)
+        if writer is None:
+            insert_documents(documents)
 
     def _update_document(self, new_document_body):
         '''
@@ -117,6 +130,11 @@ class Document(Task):
         All new keys are reflected in the 'META' key with the information
         about the script in question.
 
+        A `fingerprint` key with hashes of the normalized url and text is
+        added as well (see core.fingerprints). `META.ADDED_KEY` is a unique
+        (keyword) key that orders documents added at the same time, e.g. for
+        incremental processing.
+
         '''
         if type(document)==list or isinstance(document, types.GeneratorType):
             return [self._add_metadata(doc) for doc in document]
@@ -127,6 +145,10 @@ class Document(Task):
             
         document['doctype'] = self.doctype
 
+        fingerprints = fingerprint(document, use_simhash=self.fingerprint_simhash)
+        if fingerprints:
+            document['fingerprint'] = fingerprints
+
         meta = dict(
             ADDED_AT              = datetime.datetime.now(),
             ADDED_USING           =str(self.__class__).split(' ')[1],
@@ -138,7 +160,9 @@ class Document(Task):
             )
 
         if not document.get('META',False):
-            document['META']=dict(ADDED=datetime.datetime.now())
+            document['META']={}
+        document['META'].setdefault('ADDED', datetime.datetime.now())
+        document['META'].setdefault('ADDED_KEY', uuid.uuid4().hex)
 
         for key in document.keys():
             if key == 'META': continue
@@ -0,0 +1,81 @@
+'''
+This file provides fingerprints of documents: short hashes of their
+normalized URL and text, stored in the `fingerprint` field at ingest.
+
+Because the fingerprints are keyword fields (see schema.json), checking
+whether a URL or text is already stored is a single term lookup, and many
+of them can be checked at once with a terms query. Duplicates can be found
+with an aggregation on `fingerprint.text` (see `database.deduplicate`).
+
+    fingerprint.url     : hash of the normalized URL
+    fingerprint.text    : hash of the normalized title and text
+    fingerprint.simhash : (optional) 64-bit SimHash of the text, as hex, for
+                          near-duplicate detection
+'''
+
+import re
+from hashlib import md5, blake2b
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMETERS = re.compile(r'^(utm_\w+|fbclid|gclid|ns_\w+|xtor|ref|cmpid)$')
+
+def normalize_url(url):
+    '''Returns a normalized URL: lowercase scheme and host, no default port,
+    "www.", fragment, tracking parameters or trailing slash'''
+    parts = urlsplit(str(url).strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = '{}:{}'.format(host, parts.port)
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAMETERS.match(key)))
+    path = re.sub('/+$', '', parts.path)
+    return urlunsplit(('http', host, path, query, ''))
+
+def normalize_text(text):
+    '''Returns lowercased text without punctuation and with single spaces'''
+    return " ".join(re.findall(r"\w+", str(text).lower()))
+
+def url_hash(url):
+    '''Returns the fingerprint of a URL'''
+    return md5(normalize_url(url).encode('utf-8')).hexdigest()
+
+def text_hash(text, title=''):
+    '''Returns the fingerprint of the title and text of a document'''
+    return md5("{} {}".format(normalize_text(title or ''), normalize_text(text or '')).encode('utf-8')).hexdigest()
+
+def simhash(text, bits=64):
+    '''Returns the SimHash of a text, as a hex string. Texts that differ in
+    only a few words have SimHashes that differ in only a few bits.'''
+    weights = [0] * bits
+    for word in normalize_text(text).split():
+        value = int.from_bytes(blake2b(word.encode('utf-8'), digest_size=bits // 8).digest(), 'little')
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    value = sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+    return '{:0{}x}'.format(value, bits // 4)
+
+def fingerprint(document, use_simhash=False):
+    '''Returns the fingerprints of the (_source of a) document
+
+    Parameters
+    ----
+    document : dict
+        A document with (some of) the keys `url`, `title` and `text`
+    use_simhash : bool (default=False)
+        Whether to include the SimHash of the text
+
+    Returns
+    ----
+    dict
+        The fingerprints, empty if the document has neither url nor text
+    '''
+    fingerprints = {}
+    if document.get('url'):
+        fingerprints['url'] = url_hash(document['url'])
+    if document.get('text') and type(document['text']) == str:
+        fingerprints['text'] = text_hash(document['text'], document.get('title'))
+        if use_simhash:
+            fingerprints['simhash'] = simhash(document['text'])
+    return fingerprints
@@ -5,6 +5,7 @@ import time
 from .document_class import Document
 from collections import Counter
 from .search_utils import document_generator
+from .database import BulkWriter
 from .filenames import id2filename
 import zipfile
 import gzip
@@ -99,7 +100,7 @@ class Importer(BaseImportExport):
 
     functiontype = "importer"
 
-    def _ingest(self, iterable, doctype):
+    def _ingest(self, iterable, doctype, writer=None):
         """Ingest document (batch)
 
         Parameters
@@ -113,6 +114,9 @@ class Importer(BaseImportExport):
         doctype : string
             A string to set the doctype of the added documents
 
+        writer : core.database.BulkWriter (default=None)
+            If provided, documents are buffered and written in bulk
+
         """
         self.doctype = doctype
 
@@ -124,7 +128,7 @@ class Importer(BaseImportExport):
             i = self._add_metadata(iterable.get('_source',iterable))
 
         # Save document(s) using document base-class method
-        self._save_document(i)
+        self._save_document(i, writer=writer)
 
 
     def _apply_mapping(self, document, mapping):
@@ -183,15 +187,27 @@ class Importer(BaseImportExport):
         raise NotImplementedError
         yield document
 
-    def run(self, mapping={}, *args, **kwargs):
-        """uses the documents from the load method in batches """
+    def run(self, mapping={}, *args, bulk=False, flush_every=None, **kwargs):
+        """uses the documents from the load method in batches
+
+        If `bulk=True` (or `flush_every` is given), documents are written in
+        bulk requests of `flush_every` documents instead of one by one.
+        """
         self.processed = 0
-        for batch in self._process_by_batch(self.load(*args,**kwargs)):
+        if bulk or flush_every:
+            with BulkWriter(flush_every=flush_every or 500) as writer:
+                self._ingest_batches(self.load(*args,**kwargs), mapping, writer=writer)
+        else:
+            self._ingest_batches(self.load(*args,**kwargs), mapping)
+        logger.info("Added {} documents to the database.".format(self.processed))
+
+    def _ingest_batches(self, documents, mapping, writer=None):
+        """maps and ingests the documents from the load method in batches"""
+        for batch in self._process_by_batch(documents):
             batch = list(map(lambda doc: self._apply_mapping(doc,mapping), batch))
             for doc in batch:
-                self._ingest(iterable=doc, doctype=doc['doctype'])
+                self._ingest(iterable=doc, doctype=doc['doctype'], writer=writer)
                 self.processed += 1
-        logger.info("Added {} documents to the database.".format(self.processed))
 
 class Exporter(BaseImportExport):
     """Base class for exporting"""
@@ -200,6 +216,9 @@ class Exporter(BaseImportExport):
     # for instance when writing to external databases
     to_file = True
     batchsize = 100
+    # set include_html to `False` for subclasses that do not export the
+    # htmlsource by default, so it is not retrieved from the database
+    include_html = True
 
     def __init__(self,*args, **kwargs):
         BaseImportExport.__init__(self, *args, **kwargs)
@@ -256,8 +275,8 @@ class Exporter(BaseImportExport):
                     logger.warning("Unable to ready field {k} for writing".format(k=k))
         return flat_dict
 
-    def _retrieve(self, query):
-        for doc in document_generator(query):
+    def _retrieve(self, query, fields=None, exclude=None):
+        for doc in document_generator(query, fields=fields, exclude=exclude):
             self.processed += 1
             yield doc
 
@@ -308,12 +327,20 @@ class Exporter(BaseImportExport):
         batchsize : int
             Size of documents to keep in memory for each batch
         *args & **kwargs
-            Subclass specific arguments passed to save method
+            Subclass specific arguments passed to save method. If a `fields`
+            list is passed, only these fields are retrieved from the database.
+            Unless `include_meta=True` is passed, the 'META' field is not
+            retrieved, nor is 'htmlsource' if `include_html` is False.
 
         """
         if not batchsize:
             batchsize = self.batchsize
-        for docbatch in self._process_by_batch(self._retrieve(query), batchsize=batchsize):
+        fields = kwargs.get('fields')
+        exclude = [key for key, include in (('htmlsource', kwargs.get('include_html', self.include_html)),
+                                             ('META', kwargs.get('include_meta', False)))
+                   if not include]
+        documents = self._retrieve(query, fields=fields, exclude=exclude)
+        for docbatch in self._process_by_batch(documents, batchsize=batchsize):
             self.save(docbatch, destination=destination, *args, **kwargs)
         if self.fileobj:
             self.fileobj.close()
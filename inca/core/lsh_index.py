@@ -0,0 +1,260 @@
+'''
+This file provides an approximate nearest-neighbour index for (TF-IDF)
+document vectors, based on random-projection locality sensitive hashing.
+
+Every document vector is projected on `bits` x `tables` random directions.
+The signs of the projections on `bits` directions form a code in each of the
+`tables` hash tables. The probability that two vectors agree on one bit is
+1 - angle/pi, so documents with a high cosine similarity are likely to share
+the code in at least one table. Only the pairs that do become candidates, so
+finding the similar pairs in a corpus takes near-linear instead of quadratic
+time. The candidates still have to be scored exactly (see
+`sparse_similarity.candidate_edges`): the index may miss a few pairs, but it
+never reports a pair that does not pass the threshold.
+
+An index can be saved and extended by later runs: only documents that are
+not in the index yet, or whose text changed (by checksum), are hashed and
+added. The codes of documents hashed in an earlier run are not updated,
+although their vectors depend on the dictionary and idf weights of that run.
+Delete the index file to rebuild it when the corpus changed substantially.
+An index built with another threshold, recall or number of tables is
+rebuilt.
+
+Example
+---
+index = RandomProjectionLSH(threshold=0.8)
+index.update(target_ids, target_matrix, tokens, checksums)
+rows, columns = index.candidates(source_matrix, tokens, target_ids)
+index.save('comparisons/lsh_targets.npz')
+'''
+
+import os
+import logging
+from hashlib import blake2b
+import numpy as np
+
+logger = logging.getLogger("INCA")
+
+class RandomProjectionLSH(object):
+    '''Finds candidate pairs of documents with a high cosine similarity
+
+    Parameters
+    ----
+    threshold : float (default=0.8)
+        The cosine similarity that pairs should have to become candidates.
+        Only used to choose the number of bits per table.
+    bits : int (default=None)
+        The number of bits per hash table (at most 64). By default, the highest
+        number for which pairs at the threshold become candidates with a
+        probability of at least `recall`.
+    tables : int (default=16)
+        The number of hash tables. More tables find more pairs, but also
+        more candidates that have to be scored.
+    recall : float (default=0.95)
+        The probability with which a pair at the threshold should become a
+        candidate, used to choose the number of bits
+    seed : int (default=1)
+        The seed of the random projections
+    '''
+
+    def __init__(self, threshold=0.8, bits=None, tables=16, recall=0.95, seed=1):
+        self.threshold = threshold
+        self.recall = recall
+        self.tables = tables
+        self.bits = bits or self._bits_for(threshold, tables, recall)
+        assert 0 < self.bits <= 64, "bits must be between 1 and 64"
+        self.seed = seed
+        self.ids = []
+        self.checksums = []
+        self.codes = np.zeros((0, tables), dtype=np.uint64)
+        self.empty = np.zeros(0, dtype=bool)
+        self._positions = {}
+        self._projections = {}
+
+    @staticmethod
+    def _bits_for(threshold, tables, recall):
+        '''Choose the number of bits for which 1 - (1 - p^bits)^tables >= recall'''
+        p = 1 - np.arccos(min(max(threshold, -1.0), 1.0)) / np.pi
+        bits = 1
+        while bits < 64 and 1 - (1 - p ** (bits + 1)) ** tables >= recall:
+            bits += 1
+        return bits
+
+    def _projection(self, token):
+        '''Returns the random direction of a word, derived from its hash'''
+        projection = self._projections.get(token)
+        if projection is None:
+            digest = blake2b("{}:{}".format(self.seed, token).encode('utf-8'), digest_size=4).digest()
+            generator = np.random.RandomState(int.from_bytes(digest, 'little'))
+            projection = self._projections[token] = generator.standard_normal(self.bits * self.tables).astype(np.float32)
+        return projection
+
+    def projections(self, tokens):
+        '''Returns the matrix of random directions (one row per word) of a dictionary'''
+        return np.vstack([self._projection(token) for token in tokens]) if len(tokens) else \
+            np.zeros((0, self.bits * self.tables), dtype=np.float32)
+
+    def hash(self, matrix, tokens):
+        '''Returns the codes (one row per document, one column per table) of the rows of a sparse matrix
+
+        Parameters
+        ----
+        matrix : scipy.sparse matrix
+            One row per document, one column per word
+        tokens : list
+            The words of the columns of `matrix`, e.g. `[dictionary[i] for i in range(len(dictionary))]`
+        '''
+        signs = np.asarray(matrix.dot(self.projections(tokens))) > 0
+        signs = signs.reshape(matrix.shape[0], self.tables, self.bits)
+        weights = np.left_shift(np.uint64(1), np.arange(self.bits, dtype=np.uint64))
+        return (signs.astype(np.uint64) * weights).sum(axis=2, dtype=np.uint64)
+
+    def _key(self, position):
+        return self.ids[position], self.checksums[position]
+
+    def update(self, ids, matrix, tokens, checksums=None):
+        '''Add the documents that are not in the index yet, or of which the text changed
+
+        Parameters
+        ----
+        ids : list
+            The identifiers of the rows of `matrix`
+        matrix : scipy.sparse matrix
+            One row per document, one column per word
+        tokens : list
+            The words of the columns of `matrix`
+        checksums : list (default=None)
+            Checksums of the texts of the rows of `matrix`. A document that
+            is in the index with another checksum is hashed again.
+        '''
+        checksums = checksums or [''] * len(ids)
+        new = [row for row, key in enumerate(zip(ids, checksums)) if key not in self._positions]
+        if not new:
+            return
+        changed = {ids[row] for row in new}
+        keep = [position for position, _id in enumerate(self.ids) if _id not in changed]
+        if len(keep) < len(self.ids):
+            logger.info("Hashing {} changed documents again".format(len(self.ids) - len(keep)))
+            self.ids = [self.ids[position] for position in keep]
+            self.checksums = [self.checksums[position] for position in keep]
+            self.codes = self.codes[keep]
+            self.empty = self.empty[keep]
+        codes = self.hash(matrix[new], tokens)
+        self.ids.extend(ids[row] for row in new)
+        self.checksums.extend(checksums[row] for row in new)
+        self.codes = np.vstack([self.codes, codes])
+        # documents without words hash to 0 in every table, they never become candidates
+        self.empty = np.concatenate([self.empty, np.asarray(matrix[new].getnnz(axis=1)) == 0])
+        self._positions = {self._key(position):position for position in range(len(self.ids))}
+        logger.info("Added {} documents to the LSH index, which now has {}".format(len(new), len(self.ids)))
+
+    def candidates(self, matrix, tokens, ids=None, checksums=None):
+        '''Returns the candidate pairs of the rows of a matrix with the documents in the index
+
+        Parameters
+        ----
+        matrix : scipy.sparse matrix
+            One row per (source) document, one column per word
+        tokens : list
+            The words of the columns of `matrix`
+        ids : list (default=None)
+            If given, only return candidates among these indexed documents,
+            and number them by their position in this list instead of in the index
+        checksums : list (default=None)
+            The checksums of the texts of `ids`, as passed to `update`
+
+        Returns
+        ----
+        tuple of numpy arrays
+            (rows of `matrix`, positions of the indexed documents), sorted
+        '''
+        codes = self.hash(matrix, tokens)
+        if ids is not None:
+            keys = zip(ids, checksums or [''] * len(ids))
+            positions = np.array([self._positions.get(key, -1) for key in keys], dtype=np.int64)
+            columns = np.full(len(self.ids), -1, dtype=np.int64)
+            columns[positions[positions >= 0]] = np.nonzero(positions >= 0)[0]
+        else:
+            columns = np.arange(len(self.ids), dtype=np.int64)
+        columns[self.empty] = -1
+        width = max(len(ids) if ids is not None else len(self.ids), 1)
+        empty = np.asarray(matrix.getnnz(axis=1)) == 0
+        keys = []
+        for table in range(self.tables):
+            order = np.argsort(self.codes[:, table], kind='stable')
+            indexed = self.codes[order, table]
+            starts = np.searchsorted(indexed, codes[:, table], side='left')
+            stops = np.searchsorted(indexed, codes[:, table], side='right')
+            counts = np.where(empty, 0, stops - starts)
+            rows = np.repeat(np.arange(len(codes), dtype=np.int64), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            matches = columns[order[np.repeat(starts, counts) + offsets]]
+            keys.append(rows[matches >= 0] * width + matches[matches >= 0])
+        keys = np.unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+        logger.info("Found {} candidate pairs for {} documents".format(len(keys), len(codes)))
+        return keys // width, keys % width
+
+    def save(self, path):
+        '''Save the index to a .npz file (the extension is added if `path` does not have it)'''
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        np.savez(path, ids=np.array(self.ids, dtype=str), checksums=np.array(self.checksums, dtype=str),
+                 codes=self.codes, empty=self.empty, parameters=np.array([self.bits, self.tables, self.seed]),
+                 settings=np.array([self.threshold, self.recall]))
+
+    @classmethod
+    def load(cls, path):
+        '''Load an index saved with `save`'''
+        data = np.load(path if path.endswith('.npz') else path + '.npz')
+        bits, tables, seed = [int(value) for value in data['parameters']]
+        threshold, recall = [float(value) for value in data['settings']] if 'settings' in data else (None, None)
+        index = cls(bits=bits, tables=tables, seed=seed)
+        index.threshold, index.recall = threshold, recall
+        index.ids = [str(_id) for _id in data['ids']]
+        index.checksums = [str(checksum) for checksum in data['checksums']] if 'checksums' in data else [''] * len(index.ids)
+        index.codes = data['codes']
+        index.empty = data['empty'] if 'empty' in data else np.zeros(len(index.ids), dtype=bool)
+        index._positions = {index._key(position):position for position in range(len(index.ids))}
+        logger.info("Loaded an LSH index of {} documents from {}".format(len(index.ids), path))
+        return index
+
+def lsh_candidates(source, target, tokens, target_ids, threshold, path=None, tables=16, recall=0.95, target_checksums=None):
+    '''Returns the candidate pairs (source rows, target rows) of two matrices
+
+    Parameters
+    ----
+    source, target : scipy.sparse matrix
+        One row per document, one column per word
+    tokens : list
+        The words of the columns of the matrices
+    target_ids : list
+        The identifiers of the target documents
+    threshold : float
+        The cosine similarity that pairs should have to become candidates
+    path : string (default=None)
+        If given, the index of the targets is loaded from this file (if it
+        exists and was built with the same threshold, recall and tables),
+        extended with new or changed targets and saved again
+    tables : int (default=16)
+        The number of hash tables
+    recall : float (default=0.95)
+        The probability with which a pair at the threshold should become a candidate
+    target_checksums : list (default=None)
+        Checksums of the target texts, so that changed targets are hashed again
+    '''
+    target_ids = [str(_id) for _id in target_ids]
+    target_checksums = target_checksums and [str(checksum) for checksum in target_checksums]
+    index = None
+    if path and os.path.exists(path if path.endswith('.npz') else path + '.npz'):
+        index = RandomProjectionLSH.load(path)
+        if (index.threshold, index.recall, index.tables) != (threshold, recall, tables):
+            logger.warning("The LSH index in {path} was built with threshold={index.threshold}, recall={index.recall} and "
+                           "tables={index.tables}, rebuilding it".format(path=path, index=index))
+            index = None
+    if index is None:
+        index = RandomProjectionLSH(threshold=threshold, tables=tables, recall=recall)
+    index.update(target_ids, target, tokens, target_checksums)
+    if path:
+        index.save(path)
+    return index.candidates(source, tokens, target_ids, target_checksums)
@@ -0,0 +1,133 @@
+'''
+This file provides MinHash signatures and locality sensitive hashing (LSH)
+to find near-duplicate texts, such as wire copy that is published by several
+outlets with small edits.
+
+Each text is represented by its set of word shingles (sequences of
+`shingle_size` words). The MinHash signature of that set estimates the Jaccard
+similarity between two texts. Signatures are split in bands; texts that share
+any band end up in the same bucket and become candidates, so texts do not
+have to be compared pairwise. Candidates are verified with the estimated
+similarity.
+
+Example
+---
+lsh = MinHashLSH(threshold=0.8)
+for doc in documents:
+    lsh.add(doc['_id'], doc['_source']['text'])
+for group in lsh.groups():
+    print(group)
+'''
+
+import re
+import logging
+from hashlib import blake2b
+import numpy as np
+
+logger = logging.getLogger("INCA")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def shingles(text, shingle_size=5):
+    '''Returns the set of hashed word shingles of a text'''
+    words = re.findall(r"\w+", str(text).lower())
+    if len(words) < shingle_size:
+        words = words + [''] * (shingle_size - len(words))
+    return {int.from_bytes(blake2b(' '.join(words[i:i+shingle_size]).encode('utf-8'), digest_size=4).digest(), 'little')
+            for i in range(len(words) - shingle_size + 1)}
+
+class MinHashLSH(object):
+    '''Finds groups of near-duplicate texts
+
+    Parameters
+    ----
+    threshold : float (default=0.8)
+        The minimal (estimated) Jaccard similarity of the shingles of two
+        texts to consider them near-duplicates
+    num_perm : int (default=128)
+        The length of the MinHash signatures, longer signatures give more
+        accurate estimates but use more memory
+    bands : int (default=None)
+        The number of LSH bands, `num_perm` must be divisible by it. By
+        default, it is chosen such that pairs around the threshold are likely
+        to become candidates.
+    shingle_size : int (default=5)
+        The number of words per shingle
+    seed : int (default=1)
+        The seed for the hash permutations
+    '''
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=None, shingle_size=5, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands or self._optimal_bands(threshold, num_perm)
+        assert num_perm % self.bands == 0, "num_perm must be divisible by the number of bands"
+        self.rows = num_perm // self.bands
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._ids = []
+        self._signatures = []
+        self._buckets = [{} for _ in range(self.bands)]
+
+    @staticmethod
+    def _optimal_bands(threshold, num_perm):
+        '''Choose the number of bands whose S-curve, (1/b)^(1/r), is closest to the threshold'''
+        options = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+        return min(options, key=lambda b: abs((1.0 / b) ** (b / num_perm) - threshold))
+
+    def signature(self, text):
+        '''Returns the MinHash signature of a text'''
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # (a*x + b) mod p, computed in wrapping uint64 arithmetic like the datasketch implementation
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def add(self, _id, text):
+        '''Add a text, under the identifier `_id`'''
+        signature = self.signature(text)
+        index = len(self._ids)
+        self._ids.append(_id)
+        self._signatures.append(signature)
+        for band in range(self.bands):
+            key = signature[band*self.rows:(band+1)*self.rows].tobytes()
+            self._buckets[band].setdefault(key, []).append(index)
+
+    def similarity(self, first, second):
+        '''Returns the estimated Jaccard similarity of two signatures'''
+        return float(np.mean(first == second))
+
+    def groups(self):
+        '''Returns lists of near-duplicate ids, in the order in which they were added'''
+        parent = list(range(len(self._ids)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) < 2: continue
+                # compare each text with one representative of every group seen in this bucket
+                representatives = [members[0]]
+                for other in members[1:]:
+                    for first in representatives:
+                        if find(first) == find(other):
+                            break
+                        if self.similarity(self._signatures[first], self._signatures[other]) >= self.threshold:
+                            parent[find(other)] = find(first)
+                            break
+                    else:
+                        representatives.append(other)
+        groups = {}
+        for index in range(len(self._ids)):
+            groups.setdefault(find(index), []).append(index)
+        result = [[self._ids[index] for index in sorted(members)] for members in groups.values() if len(members) > 1]
+        logger.info("Found {} groups of near-duplicates among {} texts".format(len(result), len(self._ids)))
+        return result
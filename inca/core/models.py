@@ -0,0 +1,116 @@
+'''
+This file provides a registry for models, such as spaCy pipelines, lexicons
+or pretrained classifiers, that are expensive to load.
+
+Each model is loaded once per process, on first use, and shared by all
+processors (and threads) that ask for it:
+
+    nlp = get_model('nl_core_news_sm', lambda: spacy.load('nl_core_news_sm'))
+
+Optionally, a memory budget can be set with `set_max_memory`. When loaded
+models exceed it, the least recently used models are dropped from the
+registry (and reloaded when needed again).
+'''
+
+import logging
+import threading
+import time
+import os
+from collections import OrderedDict
+
+logger = logging.getLogger("INCA")
+
+_models     = OrderedDict() # name => model, in order of last use
+_sizes      = {}            # name => estimated size in bytes
+_load_times = {}            # name => seconds spent loading
+_lock       = threading.RLock()
+_loading    = {}            # name => lock held while loading that model
+_max_memory = None
+
+def _memory_in_use():
+    '''Returns the resident memory of this process in bytes, if known'''
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def get_model(name, loader, size=None):
+    '''Returns the model registered under `name`, loading it on first use
+
+    Parameters
+    ----
+    name : string
+        A key identifying the model, such as a model name or path
+    loader : function
+        A function without arguments that loads and returns the model. It
+        is called at most once per process (unless the model is evicted).
+    size : int (default=None)
+        The size of the model in bytes, used for eviction. If None, it is
+        estimated from the memory use of the process before and after loading.
+
+    Returns
+    ----
+    The model
+    '''
+    with _lock:
+        if name in _models:
+            _models.move_to_end(name)
+            return _models[name]
+        loading = _loading.setdefault(name, threading.Lock())
+
+    # load outside of the registry lock, so other models remain available
+    with loading:
+        with _lock:
+            if name in _models:
+                _models.move_to_end(name)
+                return _models[name]
+        memory_before = _memory_in_use()
+        start = time.time()
+        model = loader()
+        duration = time.time() - start
+        logger.info("Loaded model {name} in {duration:.1f} seconds".format(**locals()))
+        with _lock:
+            _models[name] = model
+            _sizes[name] = size if size is not None else max(_memory_in_use() - memory_before, 0)
+            _load_times[name] = duration
+            _loading.pop(name, None)
+            _evict(keep=name)
+    return model
+
+def _evict(keep=None):
+    '''Drop least recently used models until the memory budget is met'''
+    if not _max_memory:
+        return
+    with _lock:
+        while sum(_sizes.values()) > _max_memory and len(_models) > 1:
+            name = next(iter(_models))
+            if name == keep:
+                break
+            logger.info("Unloading model {name} to stay within memory budget".format(name=name))
+            del _models[name]
+            _sizes.pop(name, None)
+
+def set_max_memory(max_memory):
+    '''Set the memory budget (in bytes) for loaded models, None for no limit'''
+    global _max_memory
+    _max_memory = max_memory
+    _evict()
+
+def unload_model(name=None):
+    '''Drop a model (or all models if no name is given) from the registry'''
+    with _lock:
+        names = [name] if name else list(_models)
+        for name in names:
+            _models.pop(name, None)
+            _sizes.pop(name, None)
+
+def load_times():
+    '''Returns a dict with the number of seconds it took to load each model'''
+    with _lock:
+        return dict(_load_times)
+
+def loaded_models():
+    '''Returns a dict with the (estimated) size in bytes of each loaded model'''
+    with _lock:
+        return {name:_sizes.get(name, 0) for name in _models}
@@ -0,0 +1,182 @@
+'''
+This file provides lazy discovery of INCA plugins (scrapers, processors,
+clients, analyses and importers/exporters).
+
+Importing all plugin modules is slow, as they pull in heavy libraries such
+as spaCy, gensim or sklearn. Instead, the plugin files are scanned with the
+`ast` module for the classes they define and their docstrings. The results
+are cached in a manifest, which is only rescanned for files that changed.
+A `TaskNamespace` lists the tasks from the manifest and imports the module
+of a task on first attribute access.
+'''
+
+import os
+import ast
+import json
+import logging
+from importlib import import_module
+
+logger = logging.getLogger("INCA")
+
+PLUGIN_PACKAGES = ['scrapers', 'rssscrapers', 'processing', 'clients',
+                   'analysis', 'importers_exporters']
+
+MANIFEST_FILENAME = '.plugin_manifest.json'
+
+# The method whose docstring documents the endpoint, per plugin package
+DOC_METHODS = {'scrapers'            : ['get'],
+               'rssscrapers'         : ['get'],
+               'processing'          : ['process'],
+               'importers_exporters' : ['load', 'save']}
+
+# Base classes that do not make a class a task
+NON_TASK_BASES = ['object', 'Exception']
+
+def _base_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ''
+
+def scan_file(path, functiontype):
+    '''Find the task classes defined in a plugin file without importing it
+
+    Parameters
+    ----
+    path : string
+        The path of the python file
+    functiontype : string
+        The plugin package, such as 'scrapers' or 'processing'
+
+    Returns
+    ----
+    list of dicts
+        One dict per class, with the class `name`, its `doc` and, for client
+        classes, its `service_name`
+    '''
+    with open(path, 'rb') as source:
+        try:
+            tree = ast.parse(source.read(), filename=path)
+        except SyntaxError as e:
+            logger.warning("Unable to scan {path}: {e}".format(**locals()))
+            return []
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef): continue
+        bases = [_base_name(base) for base in node.bases]
+        if not bases or all(base in NON_TASK_BASES for base in bases): continue
+        methods = {item.name:item for item in node.body if isinstance(item, ast.FunctionDef)}
+        doc = ast.get_docstring(node, clean=False)
+        for method in DOC_METHODS.get(functiontype, []):
+            if method in methods:
+                doc = ast.get_docstring(methods[method], clean=False)
+                break
+        entry = {'name':node.name, 'doc':doc}
+        for item in node.body:
+            if not isinstance(item, ast.Assign): continue
+            value = getattr(item.value, 'value', getattr(item.value, 's', None))
+            if (isinstance(value, str) and
+                any(isinstance(target, ast.Name) and target.id == 'service_name' for target in item.targets)):
+                entry['service_name'] = value
+        classes.append(entry)
+    return classes
+
+def build_manifest(incadir, cache=True):
+    '''Returns the manifest of all plugins, rescanning only changed files
+
+    Parameters
+    ----
+    incadir : string
+        The directory of the inca package
+    cache : bool (default=True)
+        Whether to read and update the manifest file in `incadir`
+
+    Returns
+    ----
+    dict
+        {functiontype : {module name : {'mtime':float, 'classes':[...]}}}
+    '''
+    manifest_path = os.path.join(incadir, MANIFEST_FILENAME)
+    cached = {}
+    if cache and os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as manifest_file:
+                cached = json.load(manifest_file)
+        except ValueError:
+            logger.debug("Ignoring unreadable plugin manifest")
+    manifest = {}
+    changed = False
+    for functiontype in PLUGIN_PACKAGES:
+        package = import_module('inca.' + functiontype)
+        manifest[functiontype] = {}
+        for filename in package.__all__:
+            if filename == '__init__.py': continue
+            path = os.path.join(incadir, functiontype, filename)
+            module = 'inca.{}.{}'.format(functiontype, filename[:-len('.py')])
+            mtime = os.path.getmtime(path)
+            entry = cached.get(functiontype, {}).get(module)
+            if not entry or entry['mtime'] != mtime:
+                entry = {'mtime':mtime, 'classes':scan_file(path, functiontype)}
+                changed = True
+            manifest[functiontype][module] = entry
+    if cache and (changed or manifest != cached):
+        try:
+            with open(manifest_path, 'w') as manifest_file:
+                json.dump(manifest, manifest_file)
+        except OSError:
+            logger.debug("Unable to write plugin manifest to {manifest_path}".format(**locals()))
+    return manifest
+
+def import_all():
+    '''Import all plugin modules, for instance to register all celery tasks'''
+    for functiontype in PLUGIN_PACKAGES:
+        import_module('inca.' + functiontype).import_all()
+
+class TaskNamespace(object):
+    '''A namespace of tasks that imports the module of a task on first access
+
+    Parameters
+    ----
+    functiontype : string
+        The plugin package, such as 'scrapers' or 'processing'
+    modules : dict
+        The manifest of this plugin package (see `build_manifest`)
+    resolve : function
+        Called as `resolve(functiontype, task_key, namespace)` after the module
+        of a task is imported. It should set the endpoints of the task on the
+        namespace.
+    doc : string
+        The docstring of the namespace
+    '''
+
+    def __init__(self, functiontype, modules, resolve, doc=None):
+        self._functiontype = functiontype
+        self._resolve = resolve
+        self._tasks = {}
+        self.__doc__ = doc
+        for module, entry in modules.items():
+            for cls in entry['classes']:
+                key = '{}.{}'.format(module, cls['name'])
+                self._tasks[cls['name']] = (key, cls['doc'])
+                service_name = cls.get('service_name')
+                if service_name and service_name == cls['name']:
+                    for suffix in ['create_app', 'remove_app', 'create_credentials']:
+                        self._tasks['{}_{}'.format(service_name, suffix)] = (key, cls['doc'])
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._tasks:
+            raise AttributeError(name)
+        key, doc = self._tasks[name]
+        import_module(key.rsplit('.', 1)[0])
+        self._resolve(self._functiontype, key, self)
+        if name not in self.__dict__:
+            raise AttributeError(name)
+        return self.__dict__[name]
+
+    def __dir__(self):
+        return sorted(self._tasks)
+
+    def _doc(self, name):
+        '''Returns the docstring of a task, without importing it'''
+        return self._tasks[name][1]
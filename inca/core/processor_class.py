@@ -11,8 +11,15 @@ yields a key:value pair per document, but does not need to return the old docume
 '''
 
 import logging
+import datetime
+import importlib
+import os
+import json
+import time
+from hashlib import md5
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from .document_class import Document
-from .database import get_document, update_document, check_exists, config
+from .database import get_document, update_document, update_documents, check_exists, config, get_state, set_state
 # from . import *
 from inca import core
 
@@ -46,7 +53,27 @@ class Processer(Document):
         '''CHANGE THIS METHOD, should return the changed document'''
         return updated_field
 
-    def runwrap(self, docs_or_query,field,new_key=None,save=False, force=False, action='run' , *args, **kwargs):
+    def process_batch(self, document_fields, *args, **kwargs):
+        '''
+        Process a list of fields at once, returns a list of results in the
+        same order. By default, `process` is called for each field.
+
+        OVERWRITE THIS METHOD if the processor can handle many documents more
+        efficiently at once (e.g. spaCy's `nlp.pipe` or a sklearn `predict`
+        on a list).
+
+        If `extra_fields` is passed, it is a list with an OrderedDict of
+        extra fields for each document.
+        '''
+        extra_fields = kwargs.pop('extra_fields', None)
+        if extra_fields is None:
+            return [self.process(document_field, *args, **kwargs)
+                    for document_field in document_fields]
+        return [self.process(document_field, *args, extra_fields=extra, **kwargs)
+                for document_field, extra in zip(document_fields, extra_fields)]
+
+    def runwrap(self, docs_or_query,field,new_key=None,save=False, force=False, action='run' , *args, batchsize=100, workers=None, ordered=True,
+                incremental=False, continuous=False, poll_interval=60, **kwargs):
         '''
         Run a processor by supplying a list of documents, a query or a doctype .
         Actions specify the way in which the task should be run.
@@ -55,30 +82,93 @@ class Processer(Document):
         ---
         docs_or_query:
             either a list of documents, an elasticsearch query or a string specifying the doctype
-        action: on of ['run','delay', 'batch' ]
+        action: on of ['run','delay', 'batch', 'parallel' ]
+        batchsize:
+            the number of documents passed to `process_batch` at once when
+            action='batch' or 'parallel'. Results are saved with one bulk
+            request per batch.
+        workers:
+            the number of worker processes when action='parallel' (defaults
+            to the number of cores)
+        ordered:
+            whether documents are yielded in input order when
+            action='parallel'
+        incremental:
+            if True, documents are read in the order in which they were added
+            and the position of the run is stored in the state index (see
+            `core.database.get_state`) for this processor, field and query. An
+            interrupted run then resumes where it stopped. Documents stored
+            without `META.ADDED` or `META.ADDED_KEY` (i.e. before these were
+            added to the metadata) are read first, once per checkpoint.
+        continuous:
+            if True (implies incremental), keep running: after the last document,
+            check for new documents every `poll_interval` seconds
+
+        When results are saved, only the fields used by the processor are
+        retrieved from the database, as the documents are not returned anyway.
 
         '''
-        documents = _doctype_query_or_list(docs_or_query,field=field, force=force)
-
+        source_fields = None
+        if save:
+            source_fields = [field, new_key or "%s_%s" %(field, self.__name__), 'doctype']
+            source_fields.extend(kwargs.get('extra_fields', []))
+
+        checkpoint = None
+        if (incremental or continuous) and type(docs_or_query) != list:
+            query = _selection_query(docs_or_query, force=force, field=field, task=self.__name__, new_key=new_key)
+            checkpoint = _Checkpoint(_checkpoint_key(self.__name__, field, new_key, query), every=batchsize)
+            if checkpoint.after:
+                logger.info("Resuming after {n} processed documents".format(n=checkpoint.state.get('processed', 0)))
+            documents = _incremental_documents(query, checkpoint, source_fields,
+                                               continuous, poll_interval, batchsize)
+            ordered = True
+        else:
+            documents = _doctype_query_or_list(docs_or_query,field=field, force=force, fields=source_fields,
+                                               task=self.__name__, new_key=new_key)
+
+        try:
+            for doc in self._runwrap_actions(documents, field, new_key, save, force, action, checkpoint,
+                                             *args, batchsize=batchsize, workers=workers, ordered=ordered, **kwargs):
+                yield doc
+        finally:
+            if checkpoint:
+                checkpoint.save()
+
+    def _runwrap_actions(self, documents, field, new_key, save, force, action, checkpoint, *args,
+                         batchsize=100, workers=None, ordered=True, **kwargs):
+        '''Runs the processor on `documents` as specified by `action`, see `runwrap`'''
         if action == 'run':
             for doc in documents:
                 if save==False:
                     yield self.run(doc, field, new_key, save, force, *args, **kwargs)
                 elif save==True:     # do not yield documents if saving to database anyway
                     _ = self.run(doc, field, new_key, save, force, *args, **kwargs)
+                if checkpoint:
+                    checkpoint.done([doc])
+
+        elif action == 'parallel':
+            for batch in self.run_parallel(documents, field, new_key, save, force, *args,
+                                           workers=workers, batchsize=batchsize, ordered=ordered, **kwargs):
+                if save==False:
+                    for doc in batch:
+                        yield doc
+                if checkpoint:
+                    checkpoint.done(batch)
 
         elif action == 'delay':
             for doc in documents:
                 for placeholder in self.delay(doc,*args,**kwargs):
                     yield placeholder
         elif action == 'batch':
-            for num, batch in enumerate(_batcher(documents, batchsize=bulksize)):
-                core.database.bulk_upsert().run(documents=[target_func.run(document=doc,
-                                        field=field, force=force, *args, **kwargs) for
-                                       doc in batch ] )
+            for num, batch in enumerate(_batcher(documents, batchsize=batchsize)):
+                batch = self.run_batch(batch, field, new_key, save, force, *args, **kwargs)
                 now = datetime.datetime.now()
                 logger.info("processed batch {num} {now}".format(**locals()))
-                yield batch
+                if save==False:
+                    for doc in batch:
+                        yield doc
+                if checkpoint:
+                    checkpoint.done(batch)
 
 
         elif action == 'celery_batch':
@@ -109,9 +199,9 @@ class Processer(Document):
         save: boolean
             indicates whether the result will be stored in the database
         force:
-            indicates whether the document should replace (true) or only
-            expand existing documents (false). Note that partial updates
-            are not supported when forcing.
+            indicates whether an existing result key should be recomputed
+            (true) or kept (false). When saving, only the result key is
+            sent to the database as a partial update.
         extra_fields: list
             (optional) list of fields that should be passed to the processor
         '''
@@ -157,16 +247,173 @@ class Processer(Document):
         # self._verify(document['_source'])
         # 5. save if requested
         if save:
-            #print('ABOUT TO SAVE')
-            #print(document)
-            update_document(document, force=force)
+            # only send the new key, the rest of the document is unchanged
+            update_document({'_id':document['_id'],
+                             '_source':{new_key:document['_source'][new_key]}},
+                            partial=True)
         # 6. emit dotkey-field
         if masked:
             document = document['_source']
         return document
 
 
-def _doctype_query_or_list(doctype_query_or_list, force=False, field=None, task=None):
+    def run_batch(self, documents, field, new_key=None, save=False, force=False, *args, **kwargs):
+        '''
+        Run a processor on a batch of documents.
+
+        Like `run`, but passes the fields of all documents to `process_batch`
+        at once and saves the results with one bulk partial update.
+
+        Input
+        ---
+        documents: list
+            documents (dicts) to be processed
+        field, new_key, save, force, extra_fields:
+            see `run`
+
+        Returns
+        ---
+        list of documents
+        '''
+        if not new_key:
+            new_key =  "%s_%s" %(field, self.__name__)
+        extra_fieldnames = kwargs.pop('extra_fields', None)
+        todo, masked = self._prepare_batch(documents, field, new_key, force)
+        if todo:
+            fields, extra_fields = self._batch_fields(todo, field, extra_fieldnames)
+            if extra_fields is not None:
+                kwargs['extra_fields'] = extra_fields
+            results = self.process_batch(fields, *args, **kwargs)
+            self._store_batch(todo, results, new_key, save)
+        return self._unmask_batch(documents, masked)
+
+    def run_parallel(self, documents, field, new_key=None, save=False, force=False, *args,
+                     workers=None, batchsize=100, ordered=True, **kwargs):
+        '''
+        Run a processor on batches of documents in a pool of worker processes.
+
+        Each worker creates its own instance of the processor and calls its
+        `setup` method once, so heavy resources (models, parsers) are loaded
+        once per worker rather than per document. Only the fields to process
+        are sent to the workers; results are saved by the calling process
+        with one bulk partial update per batch.
+
+        Input
+        ---
+        documents: iterable
+            documents (dicts) to be processed
+        field, new_key, save, force, extra_fields:
+            see `run`
+        workers: int (default=None)
+            number of worker processes, defaults to the number of cores
+        batchsize: int (default=100)
+            number of documents sent to a worker at once
+        ordered: bool (default=True)
+            whether batches are yielded in input order. If False, batches
+            are yielded as soon as they are done.
+
+        Yields
+        ---
+        list of documents per batch
+        '''
+        if not new_key:
+            new_key =  "%s_%s" %(field, self.__name__)
+        extra_fieldnames = kwargs.pop('extra_fields', None)
+        workers = workers or os.cpu_count()
+        processor = (type(self).__module__, type(self).__name__)
+        pending = OrderedDict()
+
+        def finished():
+            if ordered:
+                future, (batch, todo, masked) = pending.popitem(last=False)
+                results = future.result()
+            else:
+                future = next(iter(wait(list(pending), return_when=FIRST_COMPLETED)[0]))
+                batch, todo, masked = pending.pop(future)
+                results = future.result()
+            self._store_batch(todo, results, new_key, save)
+            return self._unmask_batch(batch, masked)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=processor) as executor:
+            for batch in _batcher(documents, batchsize=batchsize):
+                todo, masked = self._prepare_batch(batch, field, new_key, force)
+                fields, extra_fields = self._batch_fields(todo, field, extra_fieldnames)
+                batch_kwargs = dict(kwargs)
+                if extra_fields is not None:
+                    batch_kwargs['extra_fields'] = extra_fields
+                future = executor.submit(_process_batch_in_worker, fields, args, batch_kwargs)
+                pending[future] = (batch, todo, masked)
+                # keep a limited number of batches in flight (backpressure)
+                while len(pending) >= 2 * workers:
+                    yield finished()
+            while pending:
+                yield finished()
+
+    def setup(self):
+        '''
+        OVERWRITE THIS METHOD to load heavy resources (models, parsers) once.
+        Called once in each worker process when running in parallel.
+        '''
+        pass
+
+    def _prepare_batch(self, documents, field, new_key, force):
+        '''Normalize documents in place, returns the documents to process and masked positions'''
+        masked = []
+        todo = []
+        for num, document in enumerate(documents):
+            if not (type(document)==dict):
+                if check_exists(document)[0]:
+                    document = get_document(document)
+                    documents[num] = document
+                else:
+                    logger.debug("document retrieval failure {document}".format(**locals()))
+                    continue
+            if not "_source" in document:
+                masked.append(num)
+                document = {'_source':document}
+                documents[num] = document
+            if not force and new_key in document['_source'].keys(): continue
+            if not field in document['_source'].keys():
+                logger.warning("Key not found in document")
+                continue
+            todo.append(document)
+        return todo, masked
+
+    def _batch_fields(self, todo, field, extra_fieldnames=None):
+        fields = [doc['_source'][field] for doc in todo]
+        if not extra_fieldnames:
+            return fields, None
+        extra_fields = [OrderedDict((fieldname, doc['_source'].get(fieldname))
+                                    for fieldname in extra_fieldnames)
+                        for doc in todo]
+        return fields, extra_fields
+
+    def _store_batch(self, todo, results, new_key, save):
+        for doc, result in zip(todo, results):
+            doc['_source'][new_key] = result
+        if save and todo:
+            update_documents([{'_id':doc['_id'], '_source':{new_key:doc['_source'][new_key]}}
+                              for doc in todo if '_id' in doc])
+
+    def _unmask_batch(self, documents, masked):
+        for num in masked:
+            documents[num] = documents[num]['_source']
+        return documents
+
+
+_worker_processor = None
+
+def _init_worker(module, name):
+    '''Instantiate the processor once per worker process'''
+    global _worker_processor
+    _worker_processor = getattr(importlib.import_module(module), name)()
+    _worker_processor.setup()
+
+def _process_batch_in_worker(document_fields, args, kwargs):
+    return _worker_processor.process_batch(document_fields, *args, **kwargs)
+
+def _doctype_query_or_list(doctype_query_or_list, force=False, field=None, task=None, fields=None, new_key=None):
     '''
     This function helps other functions dynamically interpret the argument for document selection.
     It allows for either a list of documents, an elasticsearch query, a string-query or a doctype
@@ -187,6 +434,10 @@ def _doctype_query_or_list(doctype_query_or_list, force=False, field=None, task=
     task: string (default=None)
         Function for which the documents are used. Argument is used only to generate the expected outcome
         fieldname, i.e. <field>_<function>
+    fields: list (default=None)
+        If set, only these fields are retrieved for documents from the database
+    new_key: string (default=None)
+        The expected outcome fieldname, if it is not <field>_<function>
 
     Returns
     -------
@@ -194,54 +445,111 @@ def _doctype_query_or_list(doctype_query_or_list, force=False, field=None, task=
     '''
 
     if type(doctype_query_or_list)==list:
-        documents = doctype_query_or_list
-    elif type(doctype_query_or_list)==str:
+        return doctype_query_or_list
+    query = _selection_query(doctype_query_or_list, force=force, field=field, task=task, new_key=new_key)
+    logger.debug(query)
+    return core.database.scroll_query(query, fields=fields)
+
+def _selection_query(doctype_query_or_list, force=False, field=None, task=None, new_key=None):
+    '''
+    Returns the elasticsearch query for a doctype, query string or query (see
+    `_doctype_query_or_list`). If force=False, documents that already have the
+    outcome field (`new_key` or <field>_<task>) are excluded.
+    '''
+    result_key = new_key or '{}_{}'.format(field, task)
+    skip_done = not force and field and (new_key or task)
+    if type(doctype_query_or_list)==str:
         if doctype_query_or_list in core.search_utils.list_doctypes():
             logger.info("assuming documents of given type should be processed")
-            if force or not field:
-                documents = core.database.scroll_query({'query':{'term':{"doctype":"%s"%doctype_query_or_list}}})
-            elif not force and field:
-                logger.info("force=False, ignoring documents where the result key exists (and has non-NULL value)")
-                #documents = core.database.scroll_query(
-                #    {'filter':{'and': [
-                #            {'match':{doctypefield:doctype_query_or_list}},
-                #            {'missing':{'field': '%s_%s' %(field, task)}}]
-                #               }})
-                q = {"query":
-                            {
-                            "bool":
-                                {'must_not':
-                                     {
-                                    'exists':{'field':'{}_{}'.format(field,task)}}, 
-                            "filter":
-                                {
-                                "term" : {
-                                    "doctype" : doctype_query_or_list
-                                    }
-                                }
-                            }}}
-                logger.debug(q)
-                documents = core.database.scroll_query(q)
-
-
+            query = {"term" : {"doctype" : doctype_query_or_list}}
         else:
             logger.info("assuming input is a query_string")
-            if force or not field:
-                documents = core.database.scroll_query({'query':{'query_string':{'query': doctype_query_or_list}}})
-            elif not force and field:
-                logger.info("force=False, ignoring documents where the result key exists (and has non-NULL value)")
-                #documents = core.database.scroll_query({'query':{'and':[
-                #    {'missing':{'field':'%s_%s' %(field, task)}},
-                #    {'query_string':{'query':doctype_query_or_list}}
-                #]}})
-                documents = core.database.scroll_query({'query':{'query_string':{'query': "({}) AND NOT _exists_:{}_{}".format(doctype_query_or_list,field,task)}}})
-
+            query = {'query_string':{'query': doctype_query_or_list}}
+    else:
+        if not skip_done:
+            return doctype_query_or_list
+        query = doctype_query_or_list.get('query', {'match_all':{}})
+    if not skip_done:
+        return {'query':query}
+    logger.info("force=False, ignoring documents where the result key exists (and has non-NULL value)")
+    return dict(doctype_query_or_list if type(doctype_query_or_list)==dict else {},
+                query={"bool":
+                          {'must_not': {'exists':{'field':result_key}},
+                           "filter": query
+                          }})
+
+# incremental runs read documents in the order in which they were added. META.ADDED_KEY
+# is a (doc_values) keyword that breaks ties, sorting on _id would need fielddata
+INCREMENTAL_FIELDS = ['META.ADDED', 'META.ADDED_KEY']
+INCREMENTAL_SORT = [{'META.ADDED':{'order':'asc', 'missing':'_first', 'unmapped_type':'date'}},
+                    {'META.ADDED_KEY':{'order':'asc', 'missing':'_first', 'unmapped_type':'keyword'}}]
+
+def _checkpoint_key(task, field, new_key, query):
+    '''Returns the key under which the position of an incremental run is stored'''
+    spec = json.dumps([task, field, new_key, query], sort_keys=True, default=str)
+    return "processor_{}_{}".format(task, md5(spec.encode('utf-8')).hexdigest())
+
+def _incremental_query(query, legacy=False):
+    '''Restricts a query to documents with (or, if `legacy`, without) the INCREMENTAL_FIELDS'''
+    exist = [{'exists':{'field':field}} for field in INCREMENTAL_FIELDS]
+    if legacy:
+        condition = {'bool':{'should':[{'bool':{'must_not':exists}} for exists in exist]}}
     else:
-        if not force and field and task and not doctype_query_or_list:
-            field = '%s_%s' %(field, task)
-            doctype_query_or_list.update({'query':{'missing':{'field':field}}})
-        documents = core.database.scroll_query(doctype_query_or_list)
-    return documents
+        condition = {'bool':{'filter':exist}}
+    return dict(query, query={'bool':{'filter':[query.get('query', {'match_all':{}}), condition]}})
+
+def _incremental_documents(query, checkpoint, fields, continuous, poll_interval, batchsize):
+    '''Yields the documents of an incremental run, after the position stored in `checkpoint`
+
+    Documents without the INCREMENTAL_FIELDS cannot be read in a stable order,
+    so they are scrolled through first, until the checkpoint marks them done.
+    '''
+    if not checkpoint.state.get('legacy_done'):
+        for doc in core.database.scroll_query(_incremental_query(query, legacy=True), fields=fields):
+            doc.pop('sort', None) # scroll order, not a position to resume from
+            yield doc
+    query = _incremental_query(query)
+    after = checkpoint.after
+    while True:
+        for doc in core.database.search_after_query(query, INCREMENTAL_SORT, after=after,
+                                                    size=max(batchsize, 100), fields=fields):
+            after = doc['sort']
+            yield doc
+        if not continuous:
+            return
+        logger.debug("No new documents, checking again in {poll_interval} seconds".format(**locals()))
+        time.sleep(poll_interval)
+
+class _Checkpoint(object):
+    '''The position of an incremental run, stored every `every` documents'''
+
+    def __init__(self, key, every=100):
+        self.key = key
+        self.every = every
+        self.state = get_state(key)
+        self._pending = 0
+
+    @property
+    def after(self):
+        return self.state.get('search_after')
+
+    def done(self, documents):
+        '''Mark documents as processed, in the order in which they were read'''
+        sort = [doc['sort'] for doc in documents if doc.get('sort')]
+        if not sort: return
+        # documents are sorted after all documents without the INCREMENTAL_FIELDS
+        self.state['legacy_done'] = True
+        self.state['search_after'] = sort[-1]
+        self.state['processed'] = self.state.get('processed', 0) + len(documents)
+        self._pending += len(documents)
+        if self._pending >= self.every:
+            self.save()
+
+    def save(self):
+        if not self._pending: return
+        self.state['updated'] = datetime.datetime.now().isoformat()
+        set_state(self.key, self.state)
+        self._pending = 0
 
 def _batcher(stuff, batchsize=10):
     batch = []
@@ -22,7 +22,7 @@ language  : If you can safely assume the language of specified documents, please
 '''
 import logging
 from .document_class import Document
-from .database import check_exists, client, elastic_index
+from .database import check_exists, BulkWriter, url_exists
 
 logger = logging.getLogger("INCA")
 
@@ -50,6 +50,15 @@ class Scraper(Document):
         logger.warning("You forgot to overwrite the 'get' method of this scraper!")
         yield dict()
 
+    def after_save(self):
+        '''
+        Called by `run` once all documents from `get` are stored.
+
+        OVERWRITE THIS METHOD to keep state (e.g. which version of a feed was
+        processed) that should only be stored when the documents are.
+        '''
+        pass
+
     def sideload(self, doc, doctype, language):
         '''
         This function side-loads documents, basically setting scraper doctype, language
@@ -62,20 +71,35 @@ class Scraper(Document):
         self._verify(doc)
         self._save_document(doc)
 
-    def run(self, save=True, check_if_url_exists=False, *args, **kwargs):
+    def run(self, save=True, check_if_url_exists=False, *args, bulk=False, flush_every=None, **kwargs):
         
         '''
         DO NOT OVERWRITE THIS METHOD
 
         This is an internal function that calls the 'get' method and saves the
         resulting documents.
+
+        If `bulk=True` (or `flush_every` is given), documents are buffered in a
+        `core.database.BulkWriter` and written in batches of `flush_every`
+        documents. URL existence is then checked once per batch.
+
+        `after_save` is called when all documents are stored, i.e. after the
+        last flush, and only if no document failed.
         '''
 
         logger.info("Started scraping")
-        if save == True:
+        if save == True and (bulk or flush_every):
+            with BulkWriter(flush_every=flush_every or 500, check_url=check_if_url_exists) as writer:
+                for doc in self.get(save, *args, **kwargs):
+                    doc = self._add_metadata(doc)
+                    self._save_document(doc, writer=writer)
+            if writer.failed:
+                logger.warning("{writer.failed} documents could not be stored, skipping after_save".format(writer=writer))
+            else:
+                self.after_save()
+        elif save == True:
             for doc in self.get(save, *args, **kwargs):
-                if check_if_url_exists == False or client.search(index=elastic_index, body={
-                    'query': {'term': {'url': doc['url']}}})['hits']['total'] == 0:
+                if check_if_url_exists == False or not url_exists(doc['url']):
                     if type(doc)==dict:
                         doc = self._add_metadata(doc)
                         self._save_document(doc)
@@ -84,6 +108,7 @@ class Scraper(Document):
                         self._save_documents(doc)
                 else:
                     logger.info('A document with this URL already existed - did not save the new one.')
+            self.after_save()
         else:
             return [self._add_metadata(doc) for doc in self.get(save, *args, **kwargs)]
 
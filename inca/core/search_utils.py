@@ -6,7 +6,7 @@ from .database import scroll_query as _scroll_query
 from .database import elastic_index as _elastic_index
 from .database import DATABASE_AVAILABLE as _DATABASE_AVAILABLE
 from .database import delete_doctype, delete_document, insert_document, insert_documents
-from .database import deduplicate, reparse
+from .database import deduplicate, reparse, add_pagination_keys
 import logging as _logging
 from .basic_utils import dotkeys as _dotkeys
 import _datetime as _datetime
@@ -36,7 +36,7 @@ def doctype_generator(doctype):
         if not num%100: _logger.info("returning {num}".format(**locals()))
         yield doc
 
-def document_generator(query="*"):
+def document_generator(query="*", slices=None, fields=None, exclude=None, pagination='scroll', after=None):
     """A generator to get results for a query
 
     Parameters
@@ -44,6 +44,23 @@ def document_generator(query="*"):
     query : string (default="*") or dict
         A string query specifying the documents to return or a dict
         that is a elasticsearch query
+    slices : int (default=None)
+        If set, read the results with this number of parallel sliced
+        scrolls (the order of results is then not preserved)
+    fields : list (default=None)
+        If set, only these fields of each document are retrieved
+    exclude : list (default=None)
+        Fields not to retrieve, such as 'htmlsource' or 'META'
+    pagination : string (default='scroll')
+        'search_after' pages through the results without keeping a scroll
+        context open, so the generator can be paused (or many can run at the
+        same time) cheaply. Documents are sorted on a keyword field with
+        doc_values (META.ADDED_KEY by default, see
+        `core.database.search_after_query`). Documents stored before
+        META.ADDED_KEY was added are still scrolled through, run
+        `add_pagination_keys` once to give them a key.
+    after : list (default=None)
+        Resume after the document with these `sort` values
 
     Yields
     ----
@@ -66,7 +83,8 @@ def document_generator(query="*"):
             es_query = False
         if es_query:
             # total = _client.search(_elastic_index, body=es_query, size=0)['hits']['total']
-            for doc in _scroll_query(es_query):
+            for doc in _scroll_query(es_query, slices=slices, fields=fields, exclude=exclude,
+                                     pagination=pagination, after=after):
                 yield doc
 
 
@@ -0,0 +1,117 @@
+'''
+This file provides a local cache of document identifiers that are known to
+be stored in the database.
+
+Scrapers that run often (such as the rss scrapers, every 30 minutes) mostly
+encounter items they already stored. Looking up these identifiers in a
+local cache avoids a database round trip for each of them.
+
+The cache keeps an 8-byte hash per identifier, both in memory (a set) and on
+disk (an append-only file per index and doctype). Only identifiers that the
+database confirmed to exist are added, so a failed save never causes an
+item to be skipped later on.
+'''
+
+import os
+import logging
+import threading
+from array import array
+from hashlib import blake2b
+from .database import config, check_exists_many
+
+logger = logging.getLogger("INCA")
+
+SEEN_CACHE_DIR = config.get('inca', 'seen_cache_dir', fallback='seen_cache')
+
+def _hash(document_id):
+    return int.from_bytes(blake2b(str(document_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+class SeenCache(object):
+    '''A compact on-disk set of identifiers that are stored in the database
+
+    Parameters
+    ----
+    doctype : string
+        The doctype of the documents, each doctype has its own file
+    directory : string (default=SEEN_CACHE_DIR)
+        The directory in which the cache files are stored, as set by
+        `seen_cache_dir` in the [inca] section of settings.cfg
+    '''
+
+    def __init__(self, doctype, directory=SEEN_CACHE_DIR):
+        filename = "{}_{}.ids".format(config.get('elasticsearch', 'document_index', fallback='inca'),
+                                      "".join(c if c.isalnum() else '_' for c in doctype))
+        self.path = os.path.join(directory, filename)
+        self._lock = threading.Lock()
+        self._hashes = set()
+        if os.path.exists(self.path):
+            hashes = array('Q')
+            with open(self.path, 'rb') as cachefile:
+                data = cachefile.read()
+            hashes.frombytes(data[:len(data) - len(data) % hashes.itemsize])
+            self._hashes.update(hashes)
+            logger.debug("Loaded {} seen identifiers from {}".format(len(self._hashes), self.path))
+
+    def __contains__(self, document_id):
+        return _hash(document_id) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add_many(self, document_ids):
+        '''Add identifiers that are confirmed to be stored in the database'''
+        with self._lock:
+            new = array('Q', {_hash(document_id) for document_id in document_ids} - self._hashes)
+            if not new: return
+            self._hashes.update(new)
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'ab') as cachefile:
+                    cachefile.write(new.tobytes())
+            except OSError as e:
+                logger.warning("Unable to write seen identifiers to {self.path}: {e}".format(**locals()))
+
+    def clear(self):
+        '''Empty the cache, for instance after documents were deleted from the database'''
+        with self._lock:
+            self._hashes = set()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_seen_cache(doctype):
+    '''Returns the seen cache of a doctype, shared within this process'''
+    with _caches_lock:
+        if doctype not in _caches:
+            _caches[doctype] = SeenCache(doctype)
+        return _caches[doctype]
+
+def filter_seen(document_ids, doctype=None):
+    '''Returns the identifiers that are not yet stored in the database
+
+    Identifiers are first looked up in the seen cache of `doctype` (if given);
+    the rest is resolved with one bulk request per chunk
+    (see `core.database.check_exists_many`). Identifiers the database knows
+    are added to the cache.
+
+    Parameters
+    ----
+    document_ids : list
+        The identifiers to check
+    doctype : string (default=None)
+        The doctype whose seen cache to use, or None to always ask the database
+
+    Returns
+    ----
+    set
+        The identifiers (as strings) that are not stored yet
+    '''
+    cache = get_seen_cache(doctype) if doctype else None
+    unknown = [str(document_id) for document_id in document_ids
+               if cache is None or document_id not in cache]
+    found = check_exists_many(unknown)
+    if cache is not None:
+        cache.add_many([document_id for document_id, exists in found.items() if exists])
+    return {document_id for document_id in unknown if not found.get(document_id, False)}
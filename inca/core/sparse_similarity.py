@@ -0,0 +1,448 @@
+'''
+This file provides a blocked sparse-matrix engine to compute the (cosine)
+similarities between many source and target documents.
+
+Documents are rows of a CSR matrix of (TF-IDF) weights. The similarities of
+all sources with all targets are the product of the source matrix with the
+transposed target matrix. That product is computed for one block of source
+rows at a time, and is pruned (to a `threshold` and/or to the `top_k` most
+similar targets per source) within the block, so the full source x target
+matrix never has to fit in memory. Blocks are computed in parallel threads
+(scipy releases the GIL during sparse products).
+
+The result is an edge list: three arrays with the source row, target row
+and similarity of every pair that survives the pruning. Pairs with a
+similarity of zero (no words in common) are never included.
+
+Example
+---
+source = bow_to_csr(tfidf[source_bows], len(dictionary))
+target = bow_to_csr(tfidf[target_bows], len(dictionary))
+with EdgeWriter('comparisons/edges.csv') as writer:
+    for rows, columns, similarities in similarity_edges(source, target, threshold=0.5):
+        writer.write(pd.DataFrame({'source':source_ids[rows], ...}))
+'''
+
+import os
+import logging
+import datetime
+import multiprocessing
+from collections import deque, OrderedDict
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger("INCA")
+
+def bow_to_csr(corpus, num_features, dtype=np.float32):
+    '''Returns a CSR matrix with one row per (bag-of-words or TF-IDF) document
+
+    Parameters
+    ----
+    corpus : iterable
+        Documents as lists of (feature id, weight) tuples, as produced by a
+        gensim `Dictionary.doc2bow` or `TfidfModel`
+    num_features : int
+        The number of columns, i.e. the size of the dictionary
+    '''
+    indptr, indices, data = [0], [], []
+    for document in corpus:
+        for feature, weight in document:
+            indices.append(feature)
+            data.append(weight)
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix((np.array(data, dtype=dtype), np.array(indices, dtype=np.int32),
+                                np.array(indptr, dtype=np.int64)), shape=(len(indptr) - 1, num_features))
+    matrix.sum_duplicates()
+    return matrix
+
+def normalize_rows(matrix):
+    '''Returns the CSR matrix with all (non-empty) rows scaled to unit length'''
+    matrix = sparse.csr_matrix(matrix, copy=True)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(matrix.dtype)
+    return matrix
+
+def prune_pairs(rows, columns, similarities, threshold=None, top_k=None):
+    '''Returns the (rows, columns, similarities) of the pairs that pass the threshold and top_k
+
+    Parameters
+    ----
+    rows, columns, similarities : numpy arrays
+        The source rows, target rows and similarities of pairs, sorted by row
+    threshold : float (default=None)
+        If given, only keep similarities of at least this value
+    top_k : int (default=None)
+        If given, only keep the `top_k` highest similarities per row
+    '''
+    if threshold is not None:
+        keep = similarities >= threshold
+        rows, columns, similarities = rows[keep], columns[keep], similarities[keep]
+    if top_k is not None and len(rows):
+        # sort by row, then by descending similarity, and keep the first top_k of every row
+        order = np.lexsort((-similarities, rows))
+        rows, columns, similarities = rows[order], columns[order], similarities[order]
+        starts = np.searchsorted(rows, rows, side='left')
+        keep = np.arange(len(rows)) - starts < top_k
+        rows, columns, similarities = rows[keep], columns[keep], similarities[keep]
+    return rows, columns, similarities
+
+def prune(block, threshold=None, top_k=None):
+    '''Returns the (rows, columns, similarities) of the non-zero entries of a block of
+    similarities (one row per source, one column per target) that pass the threshold and top_k'''
+    block = sparse.csr_matrix(block)
+    block.eliminate_zeros()
+    rows = np.repeat(np.arange(block.shape[0], dtype=np.int64), np.diff(block.indptr))
+    return prune_pairs(rows, block.indices.astype(np.int64), block.data, threshold, top_k)
+
+def _prepare(source, target, term_similarity=None, normalize=True):
+    '''Returns the left-hand matrix, the transposed target matrix and the norms of the
+    sources and targets (None if the rows are normalized already) of a comparison'''
+    source, target = sparse.csr_matrix(source), sparse.csr_matrix(target)
+    if term_similarity is None:
+        if normalize:
+            source, target = normalize_rows(source), normalize_rows(target)
+        return source, target.T.tocsc(), None, None
+    # gensim >= 3.7 wraps the matrix in a SparseTermSimilarityMatrix
+    term_similarity = sparse.csr_matrix(getattr(term_similarity, 'matrix', term_similarity))
+    left = sparse.csr_matrix(source.dot(term_similarity))
+    source_norms = np.sqrt(np.maximum(np.asarray(left.multiply(source).sum(axis=1)).ravel(), 0))
+    target_norms = np.sqrt(np.maximum(np.asarray(target.dot(term_similarity).multiply(target).sum(axis=1)).ravel(), 0))
+    source_norms[source_norms == 0] = 1
+    target_norms[target_norms == 0] = 1
+    return left, target.T.tocsc(), source_norms, target_norms
+
+def _similarity_block(left, target_transposed, rows, columns, threshold, top_k, source_norms=None, target_norms=None):
+    '''Computes and prunes the similarities of the source rows rows[0]:rows[1] with
+    the target rows columns[0]:columns[1]. Instead of a range, rows and columns
+    can also be arrays of row numbers.'''
+    if type(rows) == tuple:
+        block = left[rows[0]:rows[1]]
+        rows = np.arange(rows[0], rows[1])
+    else:
+        block = left[rows]
+    if type(columns) == tuple:
+        block = sparse.csr_matrix(block.dot(target_transposed[:, columns[0]:columns[1]]))
+        columns = np.arange(columns[0], columns[1])
+    else:
+        block = sparse.csr_matrix(block.dot(target_transposed[:, columns]))
+    if source_norms is not None:
+        block_rows = np.repeat(rows, np.diff(block.indptr))
+        block.data = block.data / (source_norms[block_rows] * target_norms[columns[block.indices]])
+    r, c, similarities = prune(block, threshold, top_k)
+    return rows[r], columns[c], similarities
+
+def _run_blocks(blocks, workers=None):
+    '''Yields the results of `_similarity_block` for the given arguments, in order,
+    computing up to `workers` blocks in parallel'''
+    workers = workers or multiprocessing.cpu_count()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # keep a limited number of blocks in flight, so that results do not pile up in memory
+        pending = deque()
+        for arguments in blocks:
+            pending.append(executor.submit(_similarity_block, *arguments))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def similarity_edges(source, target, threshold=None, top_k=None, blocksize=1000, workers=None, normalize=True, term_similarity=None):
+    '''Yields the similarities of all source rows with all target rows, block by block
+
+    Parameters
+    ----
+    source : scipy.sparse matrix
+        One row per source document
+    target : scipy.sparse matrix
+        One row per target document, with the same columns as `source`
+    threshold : float (default=None)
+        If given, only yield pairs with a similarity of at least this value
+    top_k : int (default=None)
+        If given, only yield the `top_k` most similar targets of every source
+    blocksize : int (default=1000)
+        The number of source rows per block. The memory used per block is at
+        most blocksize x number of targets similarities, before pruning.
+    workers : int (default=None)
+        The number of blocks to compute in parallel, by default the number of cores
+    normalize : bool (default=True)
+        Whether to scale rows to unit length first, so that the dot products
+        are cosine similarities
+    term_similarity : scipy.sparse matrix (default=None)
+        If given, compute soft cosine similarities (see `pair_similarities`)
+
+    Yields
+    ----
+    tuple of numpy arrays
+        (source rows, target rows, similarities) of the pairs in one block,
+        in order of the source rows
+    '''
+    left, target_transposed, source_norms, target_norms = _prepare(source, target, term_similarity, normalize)
+    starts = range(0, left.shape[0], blocksize)
+    logger.info("Comparing {} sources with {} targets in {} blocks".format(left.shape[0], target_transposed.shape[1], len(starts)))
+    blocks = ((left, target_transposed, (start, min(start + blocksize, left.shape[0])), (0, target_transposed.shape[1]),
+               threshold, top_k, source_norms, target_norms) for start in starts)
+    return _run_blocks(blocks, workers)
+
+def date_groups(dates, merge_weekend=False):
+    '''Returns the group (the number of the day since the first date) of every date
+
+    Parameters
+    ----
+    dates : list
+        Dates as datetime.date objects or strings starting with yyyy-MM-dd
+    merge_weekend : bool (default=False)
+        If True, Sundays are in the same group as the preceding Saturday
+
+    Returns
+    ----
+    tuple
+        (numpy array with the group of every date, number of groups)
+    '''
+    days = []
+    for date in dates:
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        elif not isinstance(date, datetime.date):
+            date = datetime.date(*[int(i) for i in str(date)[:10].split("-")])
+        days.append(date.toordinal())
+    if not days:
+        return np.zeros(0, dtype=np.int64), 0
+    days = np.array(days, dtype=np.int64)
+    first = days.min()
+    calendar = np.arange(first, days.max() + 1)
+    if merge_weekend:
+        # every day starts a new group, except Sundays (date.weekday() == 6, ordinal % 7 == 0) after the first day
+        starts = (calendar % 7 != 0)
+        starts[0] = True
+        groups = np.cumsum(starts) - 1
+    else:
+        groups = calendar - first
+    return groups[days - first], int(groups[-1]) + 1
+
+def group_bounds(groups, n_groups):
+    '''Returns the first row of every group (and the number of rows) of rows sorted by group'''
+    return np.searchsorted(groups, np.arange(n_groups + 1), side='left')
+
+def window_edges(source, target, source_bounds, target_bounds, before, after, threshold=None, top_k=None,
+                 blocksize=1000, workers=None, normalize=True, term_similarity=None, source_order=None, target_order=None):
+    '''Yields the similarities of the sources of every group with the targets of the groups around it
+
+    Sources and targets must be sorted by group (e.g. by date, see `date_groups`),
+    or `source_order` and `target_order` give the rows in that order.
+    The sources of group g are compared with the targets of groups g-before up to
+    and including g+after, which are a single range of (sorted) target rows.
+    Only groups with a complete window (at least `before` groups before them and
+    `after` groups after them) are compared. The sources of large groups are
+    split in blocks of at most `blocksize` rows.
+
+    Parameters
+    ----
+    source, target : scipy.sparse matrix
+        One row per document, with the same columns
+    source_bounds, target_bounds : numpy arrays
+        The first (sorted) row of every group, and the number of rows (see `group_bounds`)
+    before, after : int
+        The number of groups before and after the group of the sources to compare with
+    threshold, top_k, blocksize, workers, normalize, term_similarity :
+        See `similarity_edges`
+    source_order, target_order : numpy arrays (default=None)
+        If given, the rows of `source` and `target` sorted by group (e.g. by
+        `np.argsort(groups, kind='stable')`). Only the rows of one block are
+        selected at a time, so unsorted (e.g. memory-mapped) matrices are not
+        copied as a whole. The yielded rows are rows of the unsorted matrices.
+
+    Yields
+    ----
+    tuple of numpy arrays
+        (source rows, target rows, similarities) of the pairs in one block of a window
+    '''
+    left, target_transposed, source_norms, target_norms = _prepare(source, target, term_similarity, normalize)
+    n_groups = len(source_bounds) - 1
+    windows = [group for group in range(before, n_groups - after)
+               if source_bounds[group + 1] > source_bounds[group]
+               and target_bounds[group + after + 1] > target_bounds[group - before]]
+    logger.info("Comparing {} sources with {} targets in {} windows".format(left.shape[0], target_transposed.shape[1], len(windows)))
+    def select(order, start, stop):
+        return (start, stop) if order is None else order[start:stop]
+    blocks = ((left, target_transposed, select(source_order, start, min(start + blocksize, source_bounds[group + 1])),
+               select(target_order, target_bounds[group - before], target_bounds[group + after + 1]),
+               threshold, top_k, source_norms, target_norms)
+              for group in windows for start in range(source_bounds[group], source_bounds[group + 1], blocksize))
+    return _run_blocks(blocks, workers)
+
+def pair_similarities(source, target, rows, columns, term_similarity=None, chunksize=100000):
+    '''Returns the cosine (or soft cosine) similarities of the given pairs of rows
+
+    Parameters
+    ----
+    source, target : scipy.sparse matrix
+        One row per document, with the same columns
+    rows, columns : numpy arrays
+        The rows of `source` and `target` to compare
+    term_similarity : scipy.sparse matrix (default=None)
+        If given, the similarities between words (e.g. from word embeddings),
+        to compute soft cosine similarities
+    chunksize : int (default=100000)
+        The number of pairs to compute at once
+    '''
+    left, target, source_norms, target_norms = _prepare_pairs(source, target, term_similarity)
+    similarities = np.zeros(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), chunksize):
+        similarities[start:start + chunksize] = _pair_block(left, target, rows[start:start + chunksize],
+                                                            columns[start:start + chunksize], source_norms, target_norms)
+    return similarities
+
+def _prepare_pairs(source, target, term_similarity=None):
+    '''Like `_prepare`, but returns the target matrix itself and norms of one for cosine similarities'''
+    left, target_transposed, source_norms, target_norms = _prepare(source, target, term_similarity)
+    if source_norms is None:
+        source_norms, target_norms = np.ones(left.shape[0]), np.ones(target_transposed.shape[1])
+    return left, target_transposed.T.tocsr(), source_norms, target_norms
+
+def _pair_block(left, target, rows, columns, source_norms, target_norms):
+    '''Returns the similarities of the pairs (rows[i], columns[i])'''
+    return np.asarray(left[rows].multiply(target[columns]).sum(axis=1)).ravel() / (source_norms[rows] * target_norms[columns])
+
+def candidate_edges(source, target, rows, columns, threshold=None, top_k=None, blocksize=1000, term_similarity=None):
+    '''Yields the similarities of candidate pairs (see `lsh_index`), block by block
+
+    Like `similarity_edges`, but only the given pairs are scored.
+
+    Parameters
+    ----
+    source, target : scipy.sparse matrix
+        One row per document, with the same columns
+    rows, columns : numpy arrays
+        The candidate pairs of rows of `source` and `target`, sorted by row
+    threshold : float (default=None)
+        If given, only yield pairs with a similarity of at least this value
+    top_k : int (default=None)
+        If given, only yield the `top_k` most similar targets of every source
+    blocksize : int (default=1000)
+        The number of source rows per block
+    term_similarity : scipy.sparse matrix (default=None)
+        If given, compute soft cosine similarities (see `pair_similarities`)
+    '''
+    logger.info("Scoring {} candidate pairs of {} sources and {} targets".format(len(rows), source.shape[0], target.shape[0]))
+    left, target, source_norms, target_norms = _prepare_pairs(source, target, term_similarity)
+    for start in range(0, source.shape[0], blocksize):
+        first, last = np.searchsorted(rows, [start, start + blocksize])
+        if first == last:
+            continue
+        r, c = rows[first:last], columns[first:last]
+        similarities = _pair_block(left, target, r, c, source_norms, target_norms)
+        keep = similarities > 0
+        yield prune_pairs(r[keep], c[keep], similarities[keep], threshold, top_k)
+
+class EdgeWriter(object):
+    '''Writes an edge list (pandas DataFrames with the same columns) to a single file
+
+    Parameters
+    ----
+    path : string
+        The file to write to
+    file_format : string (default=None)
+        One of 'csv', 'parquet', 'feather' or 'pkl', by default taken from the
+        extension of `path`. CSV and parquet files are written block by block,
+        feather and pickle files are written at once when the writer is closed.
+        Parquet and feather require pyarrow.
+    '''
+
+    def __init__(self, path, file_format=None):
+        self.path = path
+        self.file_format = file_format or os.path.splitext(path)[1].lstrip('.') or 'csv'
+        if self.file_format not in ('csv', 'parquet', 'feather', 'pkl'):
+            raise ValueError("Unknown file format: {}".format(self.file_format))
+        self.rows = 0
+        self._frames = []
+        self._parquet = None
+
+    def write(self, df):
+        '''Append the rows of a DataFrame'''
+        if self.file_format == 'csv':
+            df.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        elif self.file_format == 'parquet':
+            import pyarrow
+            import pyarrow.parquet
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            self._frames.append(df)
+        self.rows += len(df)
+
+    def close(self):
+        '''Finish writing the file'''
+        if self._parquet is not None:
+            self._parquet.close()
+        elif self._frames or not self.rows:
+            import pandas as pd
+            df = pd.concat(self._frames, ignore_index=True) if self._frames else pd.DataFrame()
+            if self.file_format == 'feather':
+                df.to_feather(self.path)
+            elif self.file_format == 'parquet':
+                df.to_parquet(self.path)
+            elif self.file_format == 'pkl':
+                df.to_pickle(self.path)
+            elif self.file_format == 'csv':
+                df.to_csv(self.path, index=False)
+        self._frames = []
+        logger.info("Wrote {} edges to {}".format(self.rows, self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def write_edge_list(comparisons, path, sources, targets, file_format=None, pajek=None):
+    '''Writes the pairs yielded by `similarity_edges`, `candidate_edges` or `window_edges` to a single file
+
+    Parameters
+    ----
+    comparisons : iterable
+        (source rows, target rows, similarities) tuples
+    path : string
+        The file to write to (see `EdgeWriter`)
+    sources, targets : dict
+        column name => numpy array with a value for every source (target) row.
+        The first column holds the identifiers, e.g.
+        {'source':source_ids, 'source_date':source_dates}
+    file_format : string (default=None)
+        See `EdgeWriter`
+    pajek : string (default=None)
+        If given, the edges are also written to this pajek file
+
+    Returns
+    ----
+    int
+        The number of edges
+    '''
+    import pandas as pd
+    source_columns, target_columns = list(sources.items()), list(targets.items())
+    edges = []
+    with EdgeWriter(path, file_format) as writer:
+        for rows, columns, similarities in comparisons:
+            data = [(source_columns[0][0], source_columns[0][1][rows]), (target_columns[0][0], target_columns[0][1][columns]),
+                    ('similarity', similarities)]
+            for source_column, target_column in zip_longest(source_columns[1:], target_columns[1:]):
+                if source_column:
+                    data.append((source_column[0], source_column[1][rows]))
+                if target_column:
+                    data.append((target_column[0], target_column[1][columns]))
+            df = pd.DataFrame(OrderedDict(data))
+            writer.write(df)
+            if pajek:
+                edges.append(df.iloc[:, :3])
+    if pajek:
+        import networkx as nx
+        df = pd.concat(edges, ignore_index=True) if edges else \
+            pd.DataFrame(columns=[source_columns[0][0], target_columns[0][0], 'similarity'])
+        # pajek files need the weights as strings
+        df['weight'] = df.pop('similarity').apply(str)
+        G = nx.from_pandas_edgelist(df, source=source_columns[0][0], target=target_columns[0][0], edge_attr='weight')
+        nx.write_pajek(G, pajek)
+    return writer.rows
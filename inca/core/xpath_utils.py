@@ -0,0 +1,106 @@
+'''
+This file provides compiled XPath expressions for scrapers and processors.
+
+Calling `tree.xpath('//p//text()')` compiles the expression every time it is
+evaluated. For scrapers that evaluate dozens of (long) expressions on every
+article, that compilation is a considerable part of the parsing time. Here,
+expressions are compiled once (per thread, as lxml evaluators cannot be
+shared between threads without locking) and reused:
+
+    xpath(tree, '//*/p[@class="article__paragraph"]//text()')
+
+`XPathSpec` describes the fields to extract from a document declaratively, so
+that all of them can be extracted from a parsed tree in one go:
+
+    class myscraper(rss):
+        fields = XPathSpec({'title'  : '//h1//text()',
+                            'text'   : '//p[@class="article"]//text()',
+                            'images' : ('//figure//img', {'url':'./@src'})})
+
+        def parsehtml(self, htmlsource):
+            return self.fields.extract(fromstring(htmlsource))
+'''
+
+import threading
+from lxml import etree
+
+_local = threading.local()
+
+def compile_xpath(expression):
+    '''Returns the compiled `lxml.etree.XPath` of `expression`, compiling it on first use'''
+    try:
+        cache = _local.cache
+    except AttributeError:
+        cache = _local.cache = {}
+    compiled = cache.get(expression)
+    if compiled is None:
+        compiled = cache[expression] = etree.XPath(expression)
+    return compiled
+
+def xpath(node, expression, **variables):
+    '''Evaluates `expression` on `node`, like `node.xpath(expression)` but compiled once'''
+    return compile_xpath(expression)(node, **variables)
+
+class XPathSpec(object):
+    '''A declarative specification of the fields to extract from a document
+
+    Parameters
+    ----
+    spec : dict
+        field => specification, where a specification is either
+
+        string : an XPath expression. Text results are joined with spaces,
+            elements are replaced by their text content.
+        tuple (string, specification) : for every node matched by the XPath
+            expression, extract the (nested) specification relative to that node.
+            The result is a list.
+        tuple (string, function) : the function is called with the raw result of
+            the XPath expression, e.g. `('//h1//text()', lambda r: r[0] if r else '')`
+        dict : a nested dict of specifications
+    default : (default="")
+        The value of fields whose expression does not match anything
+    '''
+
+    def __init__(self, spec, default=""):
+        self.spec = spec
+        self.default = default
+        self._compile(spec)
+
+    def _compile(self, spec):
+        '''Compiles all expressions up front, which also checks them for errors'''
+        if type(spec)==dict:
+            for value in spec.values():
+                self._compile(value)
+        elif type(spec)==tuple:
+            expression, elements = spec
+            compile_xpath(expression)
+            if not callable(elements):
+                self._compile(elements)
+        elif type(spec)==str:
+            compile_xpath(spec)
+        else:
+            raise ValueError("Invalid XPath specification: {spec}".format(**locals()))
+
+    def extract(self, node, spec=None):
+        '''Returns a dict with the extracted fields of a parsed document (or node)'''
+        spec = self.spec if spec is None else spec
+        if type(spec)==dict:
+            return {k:self.extract(node, v) for k,v in spec.items()}
+        elif type(spec)==tuple:
+            expression, elements = spec
+            result = compile_xpath(expression)(node)
+            if callable(elements):
+                return elements(result)
+            return [self.extract(child, elements) for child in result]
+        else:
+            return self._value(compile_xpath(spec)(node))
+
+    def _value(self, result):
+        if type(result)!=list:
+            return result
+        if len(result)<1:
+            return self.default
+        if isinstance(result[0], str):
+            return ' '.join(result)
+        return ' '.join([e.text_content() if hasattr(e, 'text_content') else "".join(e.itertext())
+                         for e in result])
@@ -1,4 +1,14 @@
 import os
+import json
+import shutil
+import sqlite3
+import logging
+import tempfile
+import weakref
+import threading
+from hashlib import blake2b
+from functools import lru_cache
+import numpy as np
 import nltk
 from nltk.corpus import stopwords
 from gensim.utils import tokenize
@@ -9,6 +19,8 @@ config.read('settings.cfg')
 
 DEFAULTLANGUAGE = config.get('inca','default_data_language')
 
+logger = logging.getLogger("INCA")
+
 
 def get_normalizer(norm_type, language = DEFAULTLANGUAGE):
     """
@@ -39,7 +51,7 @@ def get_normalizer(norm_type, language = DEFAULTLANGUAGE):
 
 def generate_word(text_data, normalize='lemmatize', word_filter=True, language = DEFAULTLANGUAGE):
     """
-    Given input text_data, a normalize 'command' and a stopwords filtering flag, generates a normalized, lowercased word/token provided that it passes the filter and that its length is bigger than 2 characters.\n
+    Given input text_data, a normalize 'command' and a stopwords filtering flag, generates a normalized, lowercased word/token provided that it passes the filter and that its length is bigger than 2 characters. Uses a shared Tokenizer per normalize/word_filter/language (see `get_tokenizer`).\n
     :param text_data: the text from which to generate (i.e. doc['text'])
     :type text_data: str
     :param normalize: the type of normalization to perform. Recommended 'lemmatize'
@@ -51,16 +63,171 @@ def generate_word(text_data, normalize='lemmatize', word_filter=True, language =
     :return: the generated word/token
     :rtype: str
     """
-    stop_words = set(stopwords.words(language))
-    normalizer = get_normalizer(normalize, language = language)
-    if word_filter:
-        print("  stopwords are being filtered")
-    for word in (_.lower() for _ in tokenize(text_data)):
-        if len(word) < 3:
-            continue
-        if word_filter and word in stop_words:
-            continue
-        yield normalizer(word)
+    for word in get_tokenizer(normalize, word_filter, language).tokenize(text_data):
+        yield word
+
+
+# relative paths are resolved against the INCA directory (where settings.cfg is), not the working directory
+TOKEN_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           config.get('inca', 'token_cache', fallback='token_cache.sqlite'))
+
+class TokenCache(object):
+    """
+    A persistent cache of the tokens of documents, keyed by (document id, field, normalizer), so that analyses of the same documents (e.g. LDA, similarity and classification runs) do not have to tokenize them again.\n
+    The cache is an sqlite database. A checksum of the text is stored with the tokens, so that documents whose text changed are tokenized again.\n
+    :param path: the database file (defaults to `token_cache` in the [inca] section of settings.cfg, or token_cache.sqlite in the INCA directory)
+    :type path: str
+    """
+
+    def __init__(self, path=TOKEN_CACHE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS tokens (doc_id TEXT, field TEXT, normalizer TEXT, checksum TEXT, tokens TEXT, PRIMARY KEY (doc_id, field, normalizer))")
+
+    @staticmethod
+    def checksum(text):
+        return blake2b(str(text).encode('utf-8'), digest_size=8).hexdigest()
+
+    @staticmethod
+    def field(name):
+        """Returns the cache key of a field, so that `_source.text` and `text` share their tokens"""
+        return name[len('_source.'):] if name.startswith('_source.') else name
+
+    def get_many(self, keys, texts, normalizer, chunksize=500):
+        """
+        Returns the cached tokens of documents.\n
+        :param keys: (document id, field) tuples
+        :type keys: list
+        :param texts: the current texts of the documents, to check whether the cached tokens are up to date
+        :type texts: list
+        :param normalizer: the name of the tokenizer (see `Tokenizer.name`)
+        :type normalizer: str
+        :return: (document id, field) => tokens, for the documents that are in the cache
+        :rtype: dict
+        """
+        wanted = {(str(doc_id), field):self.checksum(text) for (doc_id, field), text in zip(keys, texts)}
+        ids = list({doc_id for doc_id, _ in wanted})
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), chunksize):
+                chunk = ids[start:start + chunksize]
+                rows = self._connection.execute("SELECT doc_id, field, checksum, tokens FROM tokens WHERE normalizer = ? AND doc_id IN ({})".format(",".join("?" * len(chunk))),
+                                                [normalizer] + chunk)
+                for doc_id, field, checksum, tokens in rows:
+                    if wanted.get((doc_id, field)) == checksum:
+                        found[(doc_id, field)] = json.loads(tokens)
+        return found
+
+    def put_many(self, keys, texts, tokens, normalizer):
+        """
+        Stores the tokens of documents.\n
+        :param keys: (document id, field) tuples
+        :type keys: list
+        :param texts: the texts of the documents
+        :type texts: list
+        :param tokens: the tokens of the documents
+        :type tokens: list
+        :param normalizer: the name of the tokenizer (see `Tokenizer.name`)
+        :type normalizer: str
+        """
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?)",
+                                         [(str(doc_id), field, normalizer, self.checksum(text), json.dumps(token_list))
+                                          for (doc_id, field), text, token_list in zip(keys, texts, tokens)])
+
+    def clear(self, normalizer=None):
+        """Removes all tokens (of the given normalizer) from the cache"""
+        with self._lock, self._connection:
+            if normalizer:
+                self._connection.execute("DELETE FROM tokens WHERE normalizer = ?", [normalizer])
+            else:
+                self._connection.execute("DELETE FROM tokens")
+
+
+class Tokenizer(object):
+    """
+    Tokenizes texts into normalized, lowercased words/tokens of at least `min_length` characters that pass the stopword filter.\n
+    The stopword set and the normalizer are created once, and normalized word forms are memoized, so tokenizing many documents does not normalize the same word form over and over again.\n
+    :param normalize: the type of normalization to perform (see `get_normalizer`). Recommended 'lemmatize'
+    :type normalize: {'stem', 'lemmatize'}, else does not normalize
+    :param word_filter: switch/flag to control stopwords filtering
+    :type word_filter: boolean
+    :param language: choose language of stopwords and normalizer
+    :type language: str
+    :param min_length: the minimal length of a word
+    :type min_length: int
+    :param cache: an optional TokenCache (or True for the default one) to store and reuse the tokens of documents with an id
+    :type cache: TokenCache
+    :param maxsize: the number of normalized word forms to memoize
+    :type maxsize: int
+    """
+
+    def __init__(self, normalize='lemmatize', word_filter=True, language=DEFAULTLANGUAGE, min_length=3, cache=None, maxsize=2**18):
+        self.stop_words = set(stopwords.words(language)) if word_filter else set()
+        if word_filter:
+            logger.info("stopwords are being filtered")
+        self.normalizer = lru_cache(maxsize=maxsize)(get_normalizer(normalize, language=language))
+        self.min_length = min_length
+        self.name = "{}:{}:{}:{}".format(normalize, language, 'stopwords' if word_filter else 'all', min_length)
+        self.cache = TokenCache() if cache is True else cache
+
+    def __call__(self, text):
+        return self.tokenize(text)
+
+    def tokenize(self, text):
+        """
+        Returns the tokens of a text.\n
+        :param text: the text to tokenize
+        :type text: str
+        :rtype: list
+        """
+        return [self.normalizer(word) for word in (_.lower() for _ in tokenize(text or ""))
+                if len(word) >= self.min_length and word not in self.stop_words]
+
+    def tokenize_many(self, texts, ids=None, field='text'):
+        """
+        Returns the tokens of many texts. With a cache and the ids of the documents, tokens are taken from and added to the cache.\n
+        :param texts: the texts to tokenize
+        :type texts: list
+        :param ids: the ids of the documents of the texts
+        :type ids: list
+        :param field: the field of the texts, or a list with the field of every text (a leading `_source.` is ignored)
+        :type field: str or list
+        :return: a list of tokens per text
+        :rtype: list
+        """
+        texts = list(texts)
+        if self.cache is None or ids is None:
+            return [self.tokenize(text) for text in texts]
+        fields = [TokenCache.field(field)] * len(texts) if isinstance(field, str) else [TokenCache.field(name) for name in field]
+        keys = list(zip(ids, fields))
+        # documents without an id cannot be cached
+        cacheable = [position for position, _id in enumerate(ids) if _id is not None]
+        cached = self.cache.get_many([keys[i] for i in cacheable], [texts[i] for i in cacheable], self.name)
+        result, missing = [], []
+        for position, (key, text) in enumerate(zip(keys, texts)):
+            tokens = cached.get((str(key[0]), key[1])) if key[0] is not None else None
+            if tokens is None:
+                tokens = self.tokenize(text)
+                if key[0] is not None:
+                    missing.append(position)
+            result.append(tokens)
+        if missing:
+            self.cache.put_many([keys[i] for i in missing], [texts[i] for i in missing], [result[i] for i in missing], self.name)
+        logger.debug("Tokenized {} texts, {} from the token cache".format(len(texts), len(cached)))
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(normalize='lemmatize', word_filter=True, language=DEFAULTLANGUAGE):
+    """
+    Returns a shared Tokenizer for the given settings, creating it on first use.\n
+    :rtype: Tokenizer
+    """
+    return Tokenizer(normalize=normalize, word_filter=word_filter, language=language)
 
 
 def extract_data(document, field='text'):
@@ -111,3 +278,229 @@ def dir2docs(dir):
         with open(root_dir + '/' + dir + '/' + text_file, 'r') as f:
             docs.append({'text': f.read()})
     return docs
+
+
+class StreamingCorpus(object):
+    """
+    A bag-of-words (or tf-idf) corpus that is built in two passes over the documents, so that the documents, their tokens and their bag-of-words never have to be in memory at once.\n
+    The first pass builds the dictionary. The second pass writes the (tf-idf weighted) bag-of-words of every document to a sparse matrix on disk (numpy files in `path`), which is memory-mapped. Peak memory is therefore bounded by the vocabulary rather than by the size of the corpus.\n
+    The corpus can be iterated as a gensim corpus (e.g. to train an LdaModel), and its rows are available as a scipy CSR matrix (e.g. for similarity analyses or scikit-learn classifiers).\n
+    Example:\n
+        corpus = StreamingCorpus(lambda: scroll_query(query), no_below=5, no_above=0.5, tfidf=True, keep=['doctype'])
+        matrix = corpus.matrix
+
+    :param documents: a function that returns the documents (e.g. `lambda: scroll_query(query)`), or an iterable of documents. Generators can only be read once: their tokens are then spilled to a temporary file during the first pass
+    :type documents: callable or iterable
+    :param field: the field from which to extract the text (see `extract_data`), a list of fields (the first one a document has is used), or a function that returns the text of a document
+    :type field: str, list or callable
+    :param tokenize: a Tokenizer (whose token cache is used for documents with an id), or a function that returns the tokens of a text (defaults to splitting on whitespace)
+    :type tokenize: Tokenizer or callable
+    :param path: the directory to store the corpus in, to reuse it later with `StreamingCorpus.load`. By default, a temporary directory that is removed with the corpus
+    :type path: str
+    :param no_below: if given, remove tokens that occur in less than this number of documents from the dictionary
+    :type no_below: int
+    :param no_above: if given, remove tokens that occur in more than this fraction of the documents from the dictionary
+    :type no_above: float
+    :param keep_n: when filtering the dictionary, keep at most this number of tokens
+    :type keep_n: int
+    :param tfidf: whether to weight the bag-of-words with a tf-idf model (available as `.tfidf`)
+    :type tfidf: boolean
+    :param keep: fields of the documents to keep in memory (as lists in `.fields`), e.g. dates to group documents by
+    :type keep: list
+    """
+
+    def __init__(self, documents, field='text', tokenize=None, path=None, no_below=None, no_above=None, keep_n=100000, tfidf=False, keep=None):
+        self.field = field
+        self.tokenize = tokenize or (lambda text: text.split())
+        self.keep = keep or []
+        self.path = path or tempfile.mkdtemp(prefix='inca_corpus_')
+        if not path:
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.path, True)
+        elif not os.path.exists(path):
+            os.makedirs(path)
+        self.ids = []
+        self.fields = {key:[] for key in self.keep}
+        self.tfidf = None
+        self._build(documents, no_below, no_above, keep_n, tfidf)
+
+    def _text(self, document):
+        """Returns the field and the text of a document"""
+        if callable(self.field):
+            return getattr(self.field, '__name__', 'text'), self.field(document)
+        if isinstance(self.field, str):
+            return self.field, extract_data(document, field=self.field)
+        source = document.get('_source', document)
+        field = next((field for field in self.field if field in source), self.field[0])
+        return field, source.get(field, "")
+
+    def _tokens(self, documents, batchsize=1000):
+        """Yields the tokens of every document, and keeps its id and the requested fields"""
+        batch = []
+        for document in documents:
+            source = document.get('_source', document)
+            self.ids.append(document.get('_id'))
+            for key in self.keep:
+                self.fields[key].append(source.get(key))
+            batch.append((document.get('_id'),) + self._text(document))
+            if len(batch) >= batchsize:
+                for tokens in self._tokenize_batch(batch):
+                    yield tokens
+                batch = []
+        for tokens in self._tokenize_batch(batch):
+            yield tokens
+
+    def _tokenize_batch(self, batch):
+        if isinstance(self.tokenize, Tokenizer):
+            return self.tokenize.tokenize_many([text or "" for _, _, text in batch], ids=[_id for _id, _, _ in batch],
+                                               field=[field for _, field, _ in batch])
+        return [list(self.tokenize(text or "")) for _, _, text in batch]
+
+    def _build(self, documents, no_below, no_above, keep_n, tfidf, batchsize=10000):
+        from gensim.corpora import Dictionary
+        from gensim.models import TfidfModel
+        spill = None
+        if callable(documents):
+            first_pass = documents()
+        elif iter(documents) is documents:
+            # a generator can only be read once, so keep its tokens on disk for the second pass
+            spill = open(os.path.join(self.path, 'tokens.jsonl'), 'w+', encoding='utf-8')
+            first_pass = documents
+        else:
+            first_pass = documents
+
+        logger.info('Preparing dictionary')
+        self.dictionary = Dictionary()
+        batch = []
+        for tokens in self._tokens(first_pass):
+            if spill:
+                spill.write(json.dumps(tokens) + '\n')
+            batch.append(tokens)
+            if len(batch) >= batchsize:
+                self.dictionary.add_documents(batch, prune_at=None)
+                batch = []
+        self.dictionary.add_documents(batch, prune_at=None)
+        if no_below is not None or no_above is not None:
+            logger.info('Removing all tokens that occur in less than {} documents or in more than {:.1f}% or all documents from dictionary'.format(no_below or 0, (no_above or 1.0)*100))
+            self.dictionary.filter_extremes(no_below=no_below or 0, no_above=no_above or 1.0, keep_n=keep_n)
+        if tfidf:
+            logger.info('Preparing tfidf model')
+            self.tfidf = TfidfModel(dictionary=self.dictionary)
+
+        logger.info('Writing the {} documents of the corpus to {}'.format(len(self.ids), self.path))
+        if spill:
+            spill.seek(0)
+            second_pass = (json.loads(line) for line in spill)
+        else:
+            ids, self.ids = self.ids, []
+            fields, self.fields = self.fields, {key:[] for key in self.keep}
+            second_pass = self._tokens(documents() if callable(documents) else documents)
+        indptr = [0]
+        with open(os.path.join(self.path, 'data.bin'), 'wb') as data, open(os.path.join(self.path, 'indices.bin'), 'wb') as indices:
+            for tokens in second_pass:
+                bow = self.dictionary.doc2bow(tokens)
+                if self.tfidf:
+                    bow = self.tfidf[bow]
+                indices.write(np.array([i for i, _ in bow], dtype=np.int64).tobytes())
+                data.write(np.array([w for _, w in bow], dtype=np.float32).tobytes())
+                indptr.append(indptr[-1] + len(bow))
+        if spill:
+            spill.close()
+            os.remove(spill.name)
+        elif len(self.ids) != len(ids):
+            raise ValueError('The documents changed between the two passes over the corpus ({} and {} documents)'.format(len(ids), len(self.ids)))
+        np.save(os.path.join(self.path, 'indptr.npy'), np.array(indptr, dtype=np.int64))
+        self.dictionary.save(os.path.join(self.path, 'dictionary'))
+        if self.tfidf:
+            self.tfidf.save(os.path.join(self.path, 'tfidf'))
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({'ids':self.ids, 'fields':self.fields}, f, default=str)
+        self._open()
+
+    def _open(self):
+        """Memory-maps the matrix of the corpus"""
+        self.indptr = np.load(os.path.join(self.path, 'indptr.npy'))
+        nnz = int(self.indptr[-1])
+        self.data = np.memmap(os.path.join(self.path, 'data.bin'), dtype=np.float32, mode='r', shape=(nnz,)) if nnz else np.zeros(0, dtype=np.float32)
+        self.indices = np.memmap(os.path.join(self.path, 'indices.bin'), dtype=np.int64, mode='r', shape=(nnz,)) if nnz else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a corpus that was stored with the `path` parameter.\n
+        :param path: the directory of the corpus
+        :type path: str
+        :return: the corpus
+        :rtype: StreamingCorpus
+        """
+        from gensim.corpora import Dictionary
+        from gensim.models import TfidfModel
+        corpus = cls.__new__(cls)
+        corpus.path = path
+        corpus.dictionary = Dictionary.load(os.path.join(path, 'dictionary'))
+        corpus.tfidf = TfidfModel.load(os.path.join(path, 'tfidf')) if os.path.exists(os.path.join(path, 'tfidf')) else None
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        corpus.ids, corpus.fields = meta['ids'], meta['fields']
+        corpus.keep = list(corpus.fields)
+        corpus._open()
+        return corpus
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __iter__(self):
+        return self.bows()
+
+    def bows(self, start=0, stop=None):
+        """
+        Yields the (tf-idf weighted) bag-of-words of the documents start:stop, as lists of (token id, weight) tuples.\n
+        :param start: the first document
+        :type start: int
+        :param stop: the document after the last one (defaults to the end of the corpus)
+        :type stop: int
+        """
+        stop = len(self) if stop is None else stop
+        for row in range(start, stop):
+            a, b = self.indptr[row], self.indptr[row + 1]
+            yield list(zip(self.indices[a:b].tolist(), self.data[a:b].tolist()))
+
+    def rows(self, start=0, stop=None):
+        """
+        Returns the documents start:stop as a scipy CSR matrix (one column per token in the dictionary) that shares the memory-mapped data of the corpus.\n
+        :param start: the first document
+        :type start: int
+        :param stop: the document after the last one (defaults to the end of the corpus)
+        :type stop: int
+        :rtype: scipy.sparse.csr_matrix
+        """
+        from scipy.sparse import csr_matrix
+        stop = len(self) if stop is None else stop
+        a, b = self.indptr[start], self.indptr[stop]
+        return csr_matrix((self.data[a:b], self.indices[a:b], self.indptr[start:stop + 1] - a), shape=(stop - start, len(self.dictionary)), copy=False)
+
+    @property
+    def matrix(self):
+        """All documents as a scipy CSR matrix, see `rows`"""
+        return self.rows()
+
+    def transform(self, texts, tokenize=None):
+        """
+        Returns the (tf-idf weighted) bag-of-words of new texts as a scipy CSR matrix with the columns of the corpus, e.g. to classify them with a model trained on `.matrix`.\n
+        :param texts: the texts
+        :type texts: iterable
+        :param tokenize: a Tokenizer or function that returns the tokens of a text (defaults to the one the corpus was built with, or splitting on whitespace for a loaded corpus)
+        :type tokenize: Tokenizer or callable
+        :rtype: scipy.sparse.csr_matrix
+        """
+        from scipy.sparse import csr_matrix
+        tokenize = tokenize or getattr(self, 'tokenize', None) or (lambda text: text.split())
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            bow = self.dictionary.doc2bow(list(tokenize(text or "")))
+            if self.tfidf:
+                bow = self.tfidf[bow]
+            indices.extend(i for i, _ in bow)
+            data.extend(w for _, w in bow)
+            indptr.append(len(indices))
+        return csr_matrix((np.array(data, dtype=np.float32), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+                          shape=(len(indptr) - 1, len(self.dictionary)))
@@ -2,9 +2,15 @@ import os as _os
 from importlib import import_module
 _expected_file_end = ".py"
 
-__all__ = [fname for fname in _os.listdir('importers_exporters') if fname[-len(_expected_file_end):]==_expected_file_end and not fname.startswith('.')]
+__all__ = [fname for fname in _os.listdir(_os.path.dirname(__file__)) if fname[-len(_expected_file_end):]==_expected_file_end and not fname.startswith('.')]
 
-for module in __all__:
-    #__import__('.'.join(['importers_exporters',module.replace('.py','')]))
-    import_module('.'+module.replace('.py',''), package='inca.importers_exporters')
-    
+def import_all():
+    '''Import all importers and exporters, e.g. so celery recognizes them as tasks'''
+    for module in __all__:
+        import_module('.'+module.replace('.py',''), package='inca.importers_exporters')
+
+def __getattr__(name):
+    # importers and exporters are imported on first access, see core.plugins
+    if name+'.py' in __all__:
+        return import_module('.'+name, package='inca.importers_exporters')
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -98,6 +98,7 @@ class export_csv(Exporter):
     """Writes documents to csv file"""
 
     batchsize = 1000
+    include_html = False
 
     def save(self, documents, destination, fields=None, include_meta=False, include_html=False, remove_linebreaks=True, *args, **kwargs):
         """
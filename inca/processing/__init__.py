@@ -1,11 +1,16 @@
 import os as _os
 from importlib import import_module
-
 _expected_file_end = "_processing.py"
 
-__all__ = [fname for fname in _os.listdir('processing') if fname[-len(_expected_file_end):]==_expected_file_end]
+__all__ = [fname for fname in _os.listdir(_os.path.dirname(__file__)) if fname[-len(_expected_file_end):]==_expected_file_end]
+
+def import_all():
+    '''Import all processors, e.g. so celery recognizes them as tasks'''
+    for module in __all__:
+        import_module('.'+module.replace('.py',''), package='inca.processing')
 
-# print(__all__)
-for module in __all__:
-    #__import__('.'.join(['processing',module.replace('.py','')]))
-    import_module('.'+module.replace('.py',''), package='inca.processing')
+def __getattr__(name):
+    # processors are imported on first access, see core.plugins
+    if name+'.py' in __all__:
+        return import_module('.'+name, package='inca.processing')
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -15,6 +15,10 @@ import string
 import shlex
 import json
 import pandas
+import queue
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from ..core.database import config
 
 logger = logging.getLogger("INCA")
@@ -27,6 +31,8 @@ if sys.version_info.major==2:
 CMD_PARSE    = ["bin/Alpino", "end_hook=dependencies", "-parse"]
 CMD_TOKENIZE = ["Tokenization/tok"]
 ALPINO_HOME  = config.get("alpino", "alpino.home")
+# every Alpino process takes several hundred MB, so pools are kept small
+MAX_WORKERS  = 4
 os.environ['ALPINO_HOME'] = os.path.join(os.getcwd(),ALPINO_HOME)
 
 QUOTE_PAIRS = [("„","“"),("“","”"),("‘","’"),("‛","’"),("«","»"),("‚","’"),("“","”"),("‹","›"),("‘","’"),
@@ -49,21 +55,13 @@ def split_lines(text):
     return lines
 
 class alpino(Processer):
-    def process(self, document_field, splitlines=True):
+    def process(self, document_field, splitlines=True, pool=True):
         """Alpino based tokenization and dependency parsing of Dutch texts"""
+        if pool:
+            return parse_many([document_field], splitlines=splitlines, parallel=False)[0]
 
-        if splitlines:
-            document_field = split_lines(document_field)
-        else:
-            document_field = [document_field]
-
-        punct_re = re.compile('[„”|%s]' %re.escape(''.join(set(string.punctuation))))
-        fix_puntc = lambda x: punct_re.sub(' \g<0> ', x.replace(',,','„').replace('|',''))
         line_parses = []
-        for line in document_field:
-            line = fix_puntc(line)
-            line = encode_or_drop(line)
-            if not line: continue # skip emtpy lines that may result from repeated delimitters
+        for line in _prepare_lines(document_field, splitlines):
             p = subprocess.Popen(["bin/Alpino","end_hook=dependencies","-parse"],
                                  shell=False,
                                  stdin=subprocess.PIPE,
@@ -87,6 +85,7 @@ class alpino(Processer):
                 except:
                     p.terminate()
                     line_parses.append({})
+                    continue
             except Exception as e:
                 p.terminate()
                 raise e
@@ -95,6 +94,16 @@ class alpino(Processer):
             line_parses.append(tree)
         return line_parses
 
+    def process_batch(self, document_fields, splitlines=True, pool=True):
+        """Alpino based tokenization and dependency parsing of Dutch texts"""
+        if not pool:
+            return [self.process(document_field, splitlines, pool) for document_field in document_fields]
+        return parse_many(document_fields, splitlines=splitlines)
+
+    def setup(self):
+        # called in each worker of `run_parallel`, which already parallelizes over documents
+        get_pool(workers=1)
+
     def _test_function(self):
         '''tests whether alpino works'''
         try:
@@ -103,6 +112,227 @@ class alpino(Processer):
         except:
             return {self.__name__ : {'status':False, 'message':'Alpino is unavailable' }}
 
+def _prepare_lines(text, splitlines=True):
+    '''Split a text in lines and encode them for Alpino, dropping empty lines'''
+    if splitlines:
+        lines = split_lines(text)
+    else:
+        lines = [text]
+
+    punct_re = re.compile('[„”|%s]' %re.escape(''.join(set(string.punctuation))))
+    fix_puntc = lambda x: punct_re.sub(' \g<0> ', x.replace(',,','„').replace('|',''))
+    prepared = []
+    for line in lines:
+        line = fix_puntc(line)
+        line = encode_or_drop(line)
+        if not line: continue # skip emtpy lines that may result from repeated delimitters
+        prepared.append(line)
+    return prepared
+
+def parse_many(texts, splitlines=True, workers=None, parallel=True):
+    '''Parse many texts at once through the pool of Alpino processes
+
+    The lines of all texts are parsed in batches by long-lived Alpino
+    processes (see `AlpinoPool`), instead of starting Alpino for every line.
+
+    Parameters
+    ----
+    texts : list of strings
+        The texts to parse
+    splitlines : bool (default=True)
+        Whether to split texts in lines (sentences) before parsing
+    workers : int (default=None)
+        The number of Alpino processes, only used when the pool is created
+        (see `pool_size`)
+    parallel : bool (default=True)
+        Whether to parse the batches of sentences in parallel. If False, they
+        are parsed one after the other by a single Alpino process.
+
+    Returns
+    ----
+    list
+        For each text, a list with the parse (dict) of each line, or an empty
+        dict for lines that could not be parsed
+    '''
+    lines = [_prepare_lines(text, splitlines) for text in texts]
+    parses = get_pool(workers).parse([line for text_lines in lines for line in text_lines], parallel=parallel)
+    results = []
+    position = 0
+    for text_lines in lines:
+        results.append([parse and interpret_parse(parse) or {}
+                        for parse in parses[position:position+len(text_lines)]])
+        position += len(text_lines)
+    return results
+
+class AlpinoServer(object):
+    '''A long-lived Alpino process that parses sentences sent over stdin
+
+    Sentences are written as `key|sentence` lines. Alpino processes them in
+    order and ends every dependency line with the key, so the output can be
+    assigned to sentences. A sentinel sentence marks the end of each batch.
+    If no output arrives for `timeout` seconds, the sentence being parsed is
+    given up and the process is restarted for the remaining sentences.
+    '''
+
+    SENTINEL = b"de kat slaapt ."
+
+    def __init__(self, timeout=None, max_sentences=5000):
+        self.timeout = timeout or int(config.get('alpino','alpino.timeout'))
+        self.max_sentences = max_sentences
+        self.process = None
+        self.start()
+
+    def start(self):
+        self.close()
+        self.process = subprocess.Popen(CMD_PARSE,
+                                        shell=False,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL,
+                                        cwd=os.environ['ALPINO_HOME'])
+        self.output = queue.Queue()
+        self.key = 0
+        self.parsed = 0
+        reader = threading.Thread(target=self._read, args=(self.process.stdout, self.output), daemon=True)
+        reader.start()
+
+    def _read(self, stdout, output):
+        for line in iter(stdout.readline, b''):
+            output.put(line)
+        output.put(None)
+
+    def close(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def parse(self, sentences):
+        '''Parse a list of (encoded) sentences, returns the raw parse of each'''
+        if self.parsed >= self.max_sentences:
+            logger.debug("recycling Alpino process after {self.parsed} sentences".format(self=self))
+            self.start()
+        keys = {}
+        for num, sentence in enumerate(sentences):
+            self.key += 1
+            keys[self.key] = num
+            self.process.stdin.write(b"%d|%s\n" %(self.key, sentence.replace(b"\n", b" ")))
+        self.key += 1
+        sentinel = self.key
+        self.process.stdin.write(b"%d|%s\n" %(sentinel, self.SENTINEL))
+        self.process.stdin.flush()
+
+        parses = [[] for sentence in sentences]
+        last = 0
+        while True:
+            try:
+                line = self.output.get(timeout=self.timeout)
+            except queue.Empty:
+                line = None
+            if line is None:
+                # give up on the sentence after the last one that was parsed
+                # and parse the remaining sentences with a fresh process
+                failed = min([num for key, num in keys.items() if key > last] or [len(sentences)])
+                logger.info("timeout trying to parse line {failed}, restarting Alpino".format(failed=failed))
+                self.start()
+                if failed+1 < len(sentences):
+                    rest = self.parse(sentences[failed+1:])
+                    parses[failed+1:] = [[parse] for parse in rest]
+                break
+            try:
+                key = int(line.rstrip().rsplit(b"|", 1)[-1])
+            except ValueError:
+                continue # not a dependency line
+            if key == sentinel:
+                break
+            if key in keys:
+                last = max(last, key)
+                # number sentences as if they were parsed separately
+                parses[keys[key]].append(line.rstrip().rsplit(b"|", 1)[0] + b"|1")
+        self.parsed += len(sentences)
+        return [b"\n".join(parse) for parse in parses]
+
+class AlpinoPool(object):
+    '''A pool of long-lived Alpino processes
+
+    Sentences are divided in batches of `batchsize` which are parsed in
+    parallel, one batch per Alpino process at a time. Processes are started
+    when needed, up to `workers` (see `pool_size`), and restarted after
+    `max_sentences` sentences to limit memory growth.
+    '''
+
+    def __init__(self, workers=None, timeout=None, batchsize=20, max_sentences=5000):
+        self.workers = pool_size(workers)
+        self.timeout = timeout
+        self.batchsize = batchsize
+        self.max_sentences = max_sentences
+        self.servers = queue.Queue()
+        self.started = 0
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def _get_server(self):
+        '''Returns an idle Alpino process, starting one if all are busy and the pool is not full'''
+        with self._lock:
+            start = self.servers.empty() and self.started < self.workers
+            if start:
+                self.started += 1
+        if start:
+            return AlpinoServer(timeout=self.timeout, max_sentences=self.max_sentences)
+        return self.servers.get()
+
+    def _parse_batch(self, sentences):
+        server = self._get_server()
+        try:
+            return server.parse(sentences)
+        except Exception:
+            server.start()
+            raise
+        finally:
+            self.servers.put(server)
+
+    def parse(self, sentences, parallel=True):
+        '''Parse a list of (encoded) sentences, returns the raw parse of each
+
+        If `parallel` is False, the batches are parsed one after the other,
+        so only one Alpino process is needed.
+        '''
+        batches = [sentences[start:start+self.batchsize]
+                   for start in range(0, len(sentences), self.batchsize)]
+        if parallel and len(batches) > 1:
+            parsed = self.executor.map(self._parse_batch, batches)
+        else:
+            parsed = map(self._parse_batch, batches)
+        return [parse for batch in parsed for parse in batch]
+
+    def close(self):
+        self.executor.shutdown()
+        while not self.servers.empty():
+            self.servers.get().close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_size(workers=None):
+    '''Returns the number of Alpino processes of a pool
+
+    Defaults to the `alpino.workers` setting or, if that is not set, to the
+    number of cores with a maximum of `MAX_WORKERS`. Never more than the
+    number of cores.
+    '''
+    cores = os.cpu_count() or 1
+    workers = workers or config.getint('alpino', 'alpino.workers', fallback=min(cores, MAX_WORKERS))
+    return max(1, min(workers, cores))
+
+def get_pool(workers=None):
+    '''Returns the Alpino pool of this process, creating it on first use'''
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AlpinoPool(workers=workers)
+            atexit.register(_pool.close)
+    return _pool
+
 def encode_or_drop(line):
     safeline = []
     for char in line:
@@ -0,0 +1,35 @@
+'''
+This file contains a processor to add fingerprints (hashes of the
+normalized url and text, see core.fingerprints) to documents that were
+stored before fingerprints were added at ingest.
+'''
+
+from ..core.processor_class import Processer
+from ..core.fingerprints import fingerprint as _fingerprint
+import logging
+
+logger = logging.getLogger("INCA")
+
+class fingerprint(Processer):
+    '''Adds fingerprints of the url and text of documents, for fast existence and duplicate checks'''
+
+    def process(self, document_field, extra_fields=None, simhash=False, **kwargs):
+        '''
+        Fingerprints of the url and the title and text were added
+
+        Parameters
+        ---
+        document_field: string
+            the text of the document
+        extra_fields: dict
+            the `title` and `url` of the document, pass extra_fields=['title','url']
+        simhash: bool (default=False)
+            whether to add a SimHash of the text as well
+
+        Example
+        ---
+        p = myinca.processing.fingerprint('nu', 'text', new_key='fingerprint',
+                                          extra_fields=['title', 'url'], save=True, action='batch')
+        '''
+        document = dict(extra_fields or {}, text=document_field)
+        return _fingerprint(document, use_simhash=simhash)
@@ -5,14 +5,19 @@ import logging
 import re
 import sys
 
-import spacy
-import nl_core_news_sm
-
-nlp = nl_core_news_sm.load()
+from ..core.models import get_model
 
 
 logger = logging.getLogger("INCA")
 
+def _load_nlp():
+    import nl_core_news_sm
+    return nl_core_news_sm.load()
+
+def get_nlp():
+    '''Returns the Dutch spaCy pipeline, loaded once per process on first use'''
+    return get_model('nl_core_news_sm', _load_nlp)
+
 
 
 
@@ -21,7 +26,16 @@ class ner(Processer):
 
     def process(self, document_field):
         '''NER based on spacy.io'''
-        doc = nlp(document_field)
+        return self._entities(get_nlp()(document_field))
+
+    def process_batch(self, document_fields):
+        '''NER based on spacy.io, parsing the batch with nlp.pipe'''
+        return [self._entities(doc) for doc in get_nlp().pipe(document_fields)]
+
+    def setup(self):
+        get_nlp()
+
+    def _entities(self, doc):
         nes = []
         for ent in doc.ents:
             nes.append({'text': ent.text, 
@@ -4,8 +4,10 @@ from ..core.basic_utils import dotkeys
 import logging
 import re
 import sys
+import os
 
 from sklearn.externals import joblib
+from ..core.models import get_model
 from numpy import ndarray, int64
 
 
@@ -15,11 +17,8 @@ class pretrained(Processer):
     
     def process(self, document_field, path_to_model):
         '''classification based on pretrained model'''
-        try:
-            prediction = self.clf.predict([document_field])
-        except AttributeError:
-            self.load_model(path_to_model)
-            prediction = self.clf.predict([document_field])
+        self.load_model(path_to_model)
+        prediction = self.clf.predict([document_field])
 
         if type(prediction) is ndarray and len(prediction)==1:
             prediction = prediction[0]
@@ -27,5 +26,14 @@ class pretrained(Processer):
             prediction = int(prediction)
         return prediction
 
+    def process_batch(self, document_fields, path_to_model):
+        '''classification based on pretrained model, predicting the batch at once'''
+        self.load_model(path_to_model)
+        predictions = self.clf.predict(document_fields)
+        return [int(prediction) if type(prediction) is int64 else prediction
+                for prediction in predictions]
+
     def load_model(self, path_to_model):
-        self.clf = joblib.load(path_to_model)
+        '''gets the model from the model registry, loading it once per process'''
+        path_to_model = os.path.abspath(path_to_model)
+        self.clf = get_model(path_to_model, lambda: joblib.load(path_to_model))
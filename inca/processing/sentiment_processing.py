@@ -5,6 +5,7 @@ import logging
 import re
 import sys
 from nltk.sentiment import vader
+from ..core.models import get_model
 
 
 logger = logging.getLogger("INCA")
@@ -27,7 +28,7 @@ class sentiment_vader_en(Processer):
     def process(self, document_field):
         '''Added sentiment based on Vader'''
         try:
-            senti=vader.SentimentIntensityAnalyzer()
+            senti=get_model('vader', vader.SentimentIntensityAnalyzer)
             sentimentscores = senti.polarity_scores(document_field)
             return sentimentscores
         except LookupError:
@@ -35,6 +36,17 @@ class sentiment_vader_en(Processer):
             download('vader_lexicon')
             logger.error("Couldn't find Vader Lexicon, downloaded it\nYou will have to re-run the processor")           
 
+    def process_batch(self, document_fields):
+        '''Added sentiment based on Vader'''
+        try:
+            senti=get_model('vader', vader.SentimentIntensityAnalyzer)
+        except LookupError:
+            from nltk import download
+            download('vader_lexicon')
+            logger.error("Couldn't find Vader Lexicon, downloaded it\nYou will have to re-run the processor")
+            return [None for document_field in document_fields]
+        return [senti.polarity_scores(document_field) for document_field in document_fields]
+
 
 class sentiment_pattern(Processer):
     '''Sentiment-analyses using Pattern'''
@@ -1,6 +1,7 @@
 from lxml.html import fromstring as parser
 from ..core.processor_class import Processer
 from ..core.basic_utils import dotkeys
+from ..core.xpath_utils import XPathSpec
 import logging
 
 logger = logging.getLogger("INCA")
@@ -63,18 +64,8 @@ def parse_dict(dom, parsedict):
     using:
     
     { 'speakers' :  ('//speakers',{'fn':'.//fn', 'gender':'.//gender'})}
+
+    The expressions are compiled once and reused for all documents (see
+    `core.xpath_utils.XPathSpec`).
     '''
-    if type(parsedict)==dict:
-        return {k:parse_dict(dom,v) for k,v in parsedict.items()}
-    elif type(parsedict)==tuple:
-        listnode, elements = parsedict
-        return [parse_dict(node, elements) for node in dom.xpath(listnode)]
-    elif type(parsedict)==list:
-        if len(parsedict)<1:
-            return "None"
-        if type(parsedict[0])==str or 'Unicode' in str(type(parsedict[0])):
-            return ' '.join(parsedict)
-        else:
-            return ' '.join([e.text_content() for e in parsedict])
-    elif type(parsedict)==str:
-        return parse_dict(dom,dom.xpath(parsedict))
+    return XPathSpec(parsedict, default="None").extract(dom)
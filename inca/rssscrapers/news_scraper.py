@@ -3,6 +3,7 @@ from lxml.html import fromstring
 from inca.core.scraper_class import Scraper
 from inca.scrapers.rss_scraper import rss
 from inca.core.database import check_exists
+from inca.core.xpath_utils import xpath, XPathSpec
 import feedparser
 import re
 import logging
@@ -55,47 +56,47 @@ class ad(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        paywall = tree.xpath('//*[@class ="fjs-paywall--personal"]')
+        paywall = xpath(tree, '//*[@class ="fjs-paywall--personal"]')
         if paywall:
             paywall_na = True
         else:
             paywall_na = False
         try:
-            title = tree.xpath('//*/h1[@class="article__title"]//text()')[0]
+            title = xpath(tree, '//*/h1[@class="article__title"]//text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            category = tree.xpath('//*/a[@class="sub-nav__link"]//text()')[0]
+            category = xpath(tree, '//*/a[@class="sub-nav__link"]//text()')[0]
         except:
             category=""
             logger.debug("Could not parse article category")
         #1. path: regular intro
         #2. path: intro when in <b>; found in a2014 04 130
-        teaser=tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro"]//span//text() | //*/p[@class="article__intro"]/span[@class="tag"]//text() | //*/p[@class="article__intro"]//b//text()') [0]
+        teaser=xpath(tree, '//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro"]//span//text() | //*/p[@class="article__intro"]/span[@class="tag"]//text() | //*/p[@class="article__intro"]//b//text()') [0]
         if teaser=="":
             logger.debug("Could not parse article teaser")
         #1. path: regular text
         #2. path: text with link behind (shown in blue underlined); found in 2014 12 1057
         #3. path: second hadings found in 2014 11 1425
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/h2[@class="article__subheader"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
+        text=" ".join(xpath(tree, '//*/p[@class="article__paragraph"]//text() | //*/h2[@class="article__subheader"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
         try:
-            author_door = tree.xpath('//*[@class="author"]/text()')[0].strip().lstrip("Bewerkt").lstrip(" door:").lstrip("Door:").strip()
+            author_door = xpath(tree, '//*[@class="author"]/text()')[0].strip().lstrip("Bewerkt").lstrip(" door:").lstrip("Door:").strip()
         except:
             author_door=""
         if author_door=="":
             try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
+                author_door = xpath(tree, '//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door==""
         if author_door=="":
             try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
+                author_door=xpath(tree, '//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door=""
                 logger.debug("Could not parse article author")
         try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
+            brun_text = xpath(tree, '//*[@class="author"]/text()')[1].replace("\n", "")
             author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
         except:
             author_bron=""
@@ -117,13 +118,13 @@ class ad(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      # 'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -170,29 +171,29 @@ class nu(rss):
 
         tree = fromstring(htmlsource)
         try:
-            category = tree.xpath('//*/li[@class=" active"]/a[@class="trackevent"]//text()')
+            category = xpath(tree, '//*/li[@class=" active"]/a[@class="trackevent"]//text()')
             if category == "":
                 logger.debug("Could not parse article category.")
         except:
             category=""
             logger.debug("Could not parse article category.")
         try:
-            teaser=tree.xpath('//*[@class="item-excerpt"]//text()')[0]
+            teaser=xpath(tree, '//*[@class="item-excerpt"]//text()')[0]
         except:
             logger.debug("Could not parse article teaser.")
             teaser=""
         try:
-            text=" ".join(tree.xpath('//*[@class="block-wrapper"]/div[@class="block-content"]/p//text()')).strip()
+            text=" ".join(xpath(tree, '//*[@class="block-wrapper"]/div[@class="block-content"]/p//text()')).strip()
         except:
             text = ""
             logger.warning("Could not parse article text")
         try:
             #regular author-xpath:
-            author_door = tree.xpath('//*[@class="author"]/text()')[0].strip().lstrip("Door:").strip()
+            author_door = xpath(tree, '//*[@class="author"]/text()')[0].strip().lstrip("Door:").strip()
             if author_door == "":
                 # xpath if link to another hp is embedded in author-info
                 try:
-                    author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
+                    author_door = xpath(tree, '//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
                 except:
                     author_door=""
                     logger.debug("Could not parse article author.")
@@ -202,12 +203,12 @@ class nu(rss):
         author_bron = ""
         text=polish(text)
         try:
-            category = tree.xpath('//*/li[@class=" active"]/a[@class="trackevent"]//text()')[0]
+            category = xpath(tree, '//*/li[@class=" active"]/a[@class="trackevent"]//text()')[0]
         except:
             category=""
             logger.debug("Could not parse article category.")
         try:
-            title = tree.xpath('//h1/text()')[0].strip()
+            title = xpath(tree, '//h1/text()')[0].strip()
         except:
             title = None
             logger.warning("Could not parse article title.")
@@ -226,13 +227,13 @@ class nu(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//div[@class="item-image"]//img')
+            img_list = xpath(element, '//div[@class="item-image"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -274,33 +275,33 @@ class nos(rss):
         except:
             logger.error("HTML tree cannot be parsed")
         try:
-            title = tree.xpath('//h1')[0].text
+            title = xpath(tree, '//h1')[0].text
         except:
             title = ""
             logger.warning("Could not parse article title")
         try:
-            category="".join(tree.xpath('//*/a[@id="link-grey"]//text()'))
+            category="".join(xpath(tree, '//*/a[@id="link-grey"]//text()'))
         except:
             category=""
             logger.debug("Could not parse article title")
         if category=="":
             try:
-                category="".join(tree.xpath('//*[@id="content"]/article/header/div/div/div/div/div/div/span/a/text()'))
+                category="".join(xpath(tree, '//*[@id="content"]/article/header/div/div/div/div/div/div/span/a/text()'))
             except:
                 category=""
                 logger.debug("Could not parse article category")
         try:
-            teaser=tree.xpath('//*[@class="article_textwrap"]/p/em//text()')[0]
+            teaser=xpath(tree, '//*[@class="article_textwrap"]/p/em//text()')[0]
         except:
             logger.debug("Could not parse article teaser")
             teaser=""
         try:
-            text=" ".join(tree.xpath('//*[@class="article_textwrap"]/p//text()')).strip()
+            text=" ".join(xpath(tree, '//*[@class="article_textwrap"]/p//text()')).strip()
         except:
             text = ""
             logger.warning("Could not parse article text")
         try:
-            author_door=tree.xpath('//*[@id="content"]/article/section/div/div/div/span/text()')[0]
+            author_door=xpath(tree, '//*[@id="content"]/article/section/div/div/div/span/text()')[0]
         except:
             author_door=""
             logger.debug("Could not parse article source")
@@ -324,11 +325,11 @@ class nos(rss):
         images = []
         for element in dom_nodes:
             try:
-                img = element.xpath('//figure[@class="article_head_image block_largecenter"]//img')[0]
+                img = xpath(element, '//figure[@class="article_head_image block_largecenter"]//img')[0]
                 image = {'url' : img.attrib['src'],
                  #'height' : img.attrib['height'],
                  #'width' : img.attrib['width'],
-                 #'caption' : element.xpath(element.xpath('.//div[@Class="caption_content"]/text()')),
+                 #'caption' : xpath(element, './/div[@Class="caption_content"]/text()'),
                  'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -377,28 +378,28 @@ class volkskrant(rss):
 
 
         tree = fromstring(htmlsource)
-        paywall = tree.xpath('//*[@class ="fjs-paywall--personal"]')
+        paywall = xpath(tree, '//*[@class ="fjs-paywall--personal"]')
         if paywall:
             paywall_na = True
         else:
             paywall_na = False
         try:
-            title = tree.xpath('//*/h1[@class="artstyle__header-title artstyle__header-title--white artstyle__header-title--light"]//text() | //*/h1[@class="artstyle__header-title"]//text() | //*/h1[@class="artstyle__header-title artstyle__header-title--white"]//text() | //*[@class="artstyle__header-title artstyle__header-title--hero-bleed artstyle__header-title--light"]/text()')[0]
+            title = xpath(tree, '//*/h1[@class="artstyle__header-title artstyle__header-title--white artstyle__header-title--light"]//text() | //*/h1[@class="artstyle__header-title"]//text() | //*/h1[@class="artstyle__header-title artstyle__header-title--white"]//text() | //*[@class="artstyle__header-title artstyle__header-title--hero-bleed artstyle__header-title--light"]/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            category=tree.xpath('//*/span[@class="artstyle__labels__section"]//text()')[0]
+            category=xpath(tree, '//*/span[@class="artstyle__labels__section"]//text()')[0]
         except:
             category=""
         if category=="":
             try:
-                category=tree.xpath('//*[@class="action-bar__primary"]/a/text()')[0]
+                category=xpath(tree, '//*[@class="action-bar__primary"]/a/text()')[0]
             except:
                 category=""
                 logger.debug("Could not parse article category")
         try:
-            teaser=tree.xpath('//*/p[@class="artstyle__intro artstyle__intro--center"]//text() | //*/p[@class="artstyle__intro artstyle__intro--center"]/span//text() | //*/p[@class="artstyle__intro artstyle__intro--center"]/a//text() | //*/p[@class="artstyle__intro"]//text() | //*/p[@class="artstyle__intro"]//text()')[0]
+            teaser=xpath(tree, '//*/p[@class="artstyle__intro artstyle__intro--center"]//text() | //*/p[@class="artstyle__intro artstyle__intro--center"]/span//text() | //*/p[@class="artstyle__intro artstyle__intro--center"]/a//text() | //*/p[@class="artstyle__intro"]//text() | //*/p[@class="artstyle__intro"]//text()')[0]
         except:
             logger.debug("Could not parse article teaser")
             teaser=""
@@ -410,45 +411,45 @@ class volkskrant(rss):
             #5. path: old design regular text
             #6. path: old design second heading
             #7. path:old design text with link
-            textrest=tree.xpath('//*/p[@class="artstyle__text artstyle__text--drop-cap"]//text() | //*/p[@class="artstyle__text"]//text() | //*/h3[@class="artstyle__title"]//text()')
+            textrest=xpath(tree, '//*/p[@class="artstyle__text artstyle__text--drop-cap"]//text() | //*/p[@class="artstyle__text"]//text() | //*/h3[@class="artstyle__title"]//text()')
         except:
             logger.warning("Could not parse article text")
             textrest=""
         text = "\n".join(textrest)
         try:
-            author_door=tree.xpath('//*/a[@class="artstyle__byline__author"]/text()')[0]
+            author_door=xpath(tree, '//*/a[@class="artstyle__byline__author"]/text()')[0]
         except:
             author_door=""
         if author_door=="":
             try:
-                author_door=" ".join(tree.xpath('//*[@class="article__meta--v2"]/span/span[2]/text()')).strip().lstrip("Bewerkt").lstrip(" door:").lstrip("Door:")
+                author_door=" ".join(xpath(tree, '//*[@class="article__meta--v2"]/span/span[2]/text()')).strip().lstrip("Bewerkt").lstrip(" door:").lstrip("Door:")
             except:
                 logger.debug("Could not parse article author")
         try:
-            author_bron=" ".join(tree.xpath('//*/span[@class="article__meta"][*]/text()')).strip().lstrip("Bron:").strip()
+            author_bron=" ".join(xpath(tree, '//*/span[@class="article__meta"][*]/text()')).strip().lstrip("Bron:").strip()
             # geeft het tweede veld: "Bron: ANP"
         except:
             author_bron=""
         if author_bron=="":
             try:
-                author_bron=" ".join(tree.xpath('//*/span[@class="author-info__source"]/text()')).strip().lstrip("- ").lstrip("Bron: ").strip()
+                author_bron=" ".join(xpath(tree, '//*/span[@class="author-info__source"]/text()')).strip().lstrip("- ").lstrip("Bron: ").strip()
             except:
                 author_bron=""
         if author_bron=="":
             try:
-                bron_text=tree.xpath('//*[@class="time_post"]/text()')[1].replace("\n", "")
+                bron_text=xpath(tree, '//*[@class="time_post"]/text()')[1].replace("\n", "")
                 author_bron=re.findall(".*?bron:(.*)", bron_text)[0]
             except:
                 author_bron=""
             if author_bron=="":
                 try:
-                    bron_text=tree.xpath('//*[@class="time_post"]/text()')[0].replace("\n", "")
+                    bron_text=xpath(tree, '//*[@class="time_post"]/text()')[0].replace("\n", "")
                     author_bron=re.findall(".*?bron:(.*)", bron_text)[0]
                 except:
                     author_bron=""
             if author_bron=="":
                 try:
-                    bron_text=tree.xpath('//*[@class="article__meta--v2"]/span/text()')[0].replace("\n","")
+                    bron_text=xpath(tree, '//*[@class="article__meta--v2"]/span/text()')[0].replace("\n","")
                     author_bron=re.findall(".*?Bron:(.*)", bron_text)[0]
                 except:
                     author_bron=""
@@ -473,13 +474,13 @@ class volkskrant(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article-photo fjs-gallery-item"]//img | //figure[@class="top-media--back fjs-gallery-item"]//img')
+            img_list = xpath(element, '//figure[@class="article-photo fjs-gallery-item"]//img | //figure[@class="top-media--back fjs-gallery-item"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))}
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))}
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -526,58 +527,58 @@ class nrc(rss):
         tree=fromstring(htmlsource)
 
         try:
-            title = tree.xpath('//*[@class="center-block intro-col article__header"]/h1/text() | //*[@class="liveblog__header__inner"]/h1/text()')[0]
+            title = xpath(tree, '//*[@class="center-block intro-col article__header"]/h1/text() | //*[@class="liveblog__header__inner"]/h1/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            category = tree.xpath('//*[@id="broodtekst"]/a[1]/text() | //*[@class="article__flag"]//text() | //*[@class="keyword"]//text()')[0]
+            category = xpath(tree, '//*[@id="broodtekst"]/a[1]/text() | //*[@class="article__flag"]//text() | //*[@class="keyword"]//text()')[0]
         except:
             category = ""
             logger.debug("Could not parse article category")
         if category=="":
             try:
-                category=tree.xpath('//*[@class="article__section-branding"]/text()')[0]
+                category=xpath(tree, '//*[@class="article__section-branding"]/text()')[0]
             except:
                 category=""
         try:
-            teaser=tree.xpath('//*[@class="intro article__intro"]/p//text() | //*[@class="intro article__intro"]//text()')[0]
+            teaser=xpath(tree, '//*[@class="intro article__intro"]/p//text() | //*[@class="intro article__intro"]//text()')[0]
         except:
             logger.info("OOps - geen eerste alinea?")
             teaser=""
-        text=" ".join(tree.xpath('//*[@class="content article__content"]/p//text() | //*[@class="content article__content"]/h2//text()')).strip()
+        text=" ".join(xpath(tree, '//*[@class="content article__content"]/p//text() | //*[@class="content article__content"]/h2//text()')).strip()
         if text=="":
             logger.warning("Could not parse article text")
         textnew=re.sub("Follow @nrc_opinie","",text)
         try:
-            author_door = tree.xpath('//*[@class="author"]/span/a/text()')[0]
+            author_door = xpath(tree, '//*[@class="author"]/span/a/text()')[0]
         except:
             author_door = ""
         if author_door == "":
             try:
-                author_door = tree.xpath('//*[@class="auteur"]/span/a/text()')[0]
+                author_door = xpath(tree, '//*[@class="auteur"]/span/a/text()')[0]
             except:
                 author_door = ""
         if author_door == "":
             try:
-                author_door = tree.xpath('//*[@class="authors"]/ul/li/text()')[0]
+                author_door = xpath(tree, '//*[@class="authors"]/ul/li/text()')[0]
             except:
                 author_door = ""
         if author_door=="":
             try:
-                author_door=tree.xpath('//*[@class="article__byline__author-and-date"]/a/text()')[0]
+                author_door=xpath(tree, '//*[@class="article__byline__author-and-date"]/a/text()')[0]
             except:
                 author_door = ""
         if author_door=="":
             try:
-                author_door=tree.xpath('//*[@class="content article__content"]/span[@class="byline"]//text()')[0]
+                author_door=xpath(tree, '//*[@class="content article__content"]/span[@class="byline"]//text()')[0]
             except:
                 author_door = ""
         author_bron=""
         if textnew=="" and category=="" and author_door=="":
             logger.debug("No article-page?")
             try:
-                if tree.xpath('//*[@class="kies show clearfix"]/h2/text()')[0] == 'Lees dit hele artikel':
+                if xpath(tree, '//*[@class="kies show clearfix"]/h2/text()')[0] == 'Lees dit hele artikel':
                     text="THIS SEEMS TO BE AN ARTICLE ONLY FOR SUBSCRIBERS"
                     logger.warning("This seems to be a subscribers-only article")
             except:
@@ -600,13 +601,13 @@ class nrc(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="responsive-img-div img-b1bc3f75894aebe980b93536058622c9  loaded"]//img | //*[@class="responsive-img-div__click-catcher"]//img')
+            img_list = xpath(element, '//*[@class="responsive-img-div img-b1bc3f75894aebe980b93536058622c9  loaded"]//img | //*[@class="responsive-img-div__click-catcher"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))}
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))}
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -660,24 +661,24 @@ class parool(rss):
         '''
 
         tree = fromstring(htmlsource)
-        paywall = tree.xpath('//*[@class ="fjs-paywall--personal"]')
+        paywall = xpath(tree, '//*[@class ="fjs-paywall--personal"]')
         if paywall:
             paywall_na = True
         else:
             paywall_na = False
         try:
-            title = tree.xpath('//*/h1[@class="article__title"]//text()')[0]
+            title = xpath(tree, '//*/h1[@class="article__title"]//text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
             category=""
         try:
-            teaser = tree.xpath('//*/p[@class="article__intro"]')[0].text_content().strip()
+            teaser = xpath(tree, '//*/p[@class="article__intro"]')[0].text_content().strip()
         except:
             teaser=""
             logger.debug("Could not parse article teaser")
-        text=" ".join(tree.xpath('//*/p[@class="article__body__paragraph first"]//text() | //*/p[@class="article__body__paragraph"]//text() | //*/h2[@class="article__body__title"]//text()')).strip()
-        author_text=tree.xpath('//*[@class=" article__author"]//text()')
+        text=" ".join(xpath(tree, '//*/p[@class="article__body__paragraph first"]//text() | //*/p[@class="article__body__paragraph"]//text() | //*/h2[@class="article__body__title"]//text()')).strip()
+        author_text=xpath(tree, '//*[@class=" article__author"]//text()')
         try:
             author_door=[e for e in author_text if e.find("Door")>=0][0].strip().replace("(","").replace(")","").replace("Door:","")
         except:
@@ -689,13 +690,13 @@ class parool(rss):
                 author_door=""
                 logger.debug("Could not parse article author")
         try:
-            bron_text=tree.xpath('//*[@id="page-main-content"]//*[@class="article__footer"]/span/span/text()')[0]
+            bron_text=xpath(tree, '//*[@id="page-main-content"]//*[@class="article__footer"]/span/span/text()')[0]
             author_bron=re.findall(".*?Bron:(.*)", bron_text)[0]
         except:
             author_bron=" "
         if author_bron=="":
             try:
-                bron_text=tree.xpath('//*/span[@class="author-info__source"]/text()')[0]
+                bron_text=xpath(tree, '//*/span[@class="author-info__source"]/text()')[0]
                 author_bron=re.findall(".*?Bron:(.*)",bron_text)[0]
             except:
                 author_bron=""
@@ -717,13 +718,13 @@ class parool(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article-photo fjs-gallery-item"]//img')
+            img_list = xpath(element, '//figure[@class="article-photo fjs-gallery-item"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))}
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))}
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -770,33 +771,33 @@ class trouw(rss):
         '''
 
         tree = fromstring(htmlsource)
-        paywall = tree.xpath('//*[@class ="paywall-notice__body"]')
+        paywall = xpath(tree, '//*[@class ="paywall-notice__body"]')
         if paywall:
             paywall_na = True
         else:
             paywall_na = False
         try:
-            title = tree.xpath('//*/h1[@class="article__header__title"]/text()')[0]
+            title = xpath(tree, '//*/h1[@class="article__header__title"]/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            teaser = tree.xpath('//*/p[@class="article__introduction__text"]//text() | //*/section[@class="article__introduction layout__stage--center"]//text()')[0]
+            teaser = xpath(tree, '//*/p[@class="article__introduction__text"]//text() | //*/section[@class="article__introduction layout__stage--center"]//text()')[0]
         except:
             teaser=" "
             logger.debug("Could not parse article teaser")
         try:
-            category=tree.xpath('//*[@id="subnav_nieuws"]/li/a/span/text() | //*/a[@class="article__header__meta__section-link"]//text()')[0]
+            category=xpath(tree, '//*[@id="subnav_nieuws"]/li/a/span/text() | //*/a[@class="article__header__meta__section-link"]//text()')[0]
         except:
             category=""
         if category=="":
             try:
-                category=tree.xpath('//*[@id="str_cntr2"]//*[@class="dos_default dos_film"]/h2/text()')[0]
+                category=xpath(tree, '//*[@id="str_cntr2"]//*[@class="dos_default dos_film"]/h2/text()')[0]
             except:
                 category=""
         if category=="":
             try:
-                category=tree.xpath('//*[@id="str_cntr2"]//*[@class="dos_default dos_vluchtelingen"]/span/text()')[0]
+                category=xpath(tree, '//*[@id="str_cntr2"]//*[@class="dos_default dos_vluchtelingen"]/span/text()')[0]
             except:
                 category=""
                 logger.debug("Could not parse article category")
@@ -809,24 +810,24 @@ class trouw(rss):
         #6. Link text
         #7. Explanantion box text
         #8. italics
-            textrest=tree.xpath('//*[@class="article__section-title__text heading-3"]/text() | //*/p[@class="article__paragraph"]//text() | //*/figcaption[@class="article__photo__caption"]//text() | //*[@class="article__paragraph"]/text() | //*[@class="article__quote__text"]/text() | //*[@class="article__framed-text__title"]/text() | //*[@id="art_box2"]/section/p/text() |  //*[@id="art_box2"]/p/a/text() |  //*[@id="art_box2"]//*[@class="embedded-context embedded-context--inzet"]/text() |  //*[@id="art_box2"]/p/em/text()')
+            textrest=xpath(tree, '//*[@class="article__section-title__text heading-3"]/text() | //*/p[@class="article__paragraph"]//text() | //*/figcaption[@class="article__photo__caption"]//text() | //*[@class="article__paragraph"]/text() | //*[@class="article__quote__text"]/text() | //*[@class="article__framed-text__title"]/text() | //*[@id="art_box2"]/section/p/text() |  //*[@id="art_box2"]/p/a/text() |  //*[@id="art_box2"]//*[@class="embedded-context embedded-context--inzet"]/text() |  //*[@id="art_box2"]/p/em/text()')
         except:
             textrest=" "
             logger.warning("Could not parse article text")
         text = "\n".join(textrest)
         try:
-             author_door=tree.xpath('//*[@class="author"]/text() | //*/strong[@class="article__header__meta__author"]/text()')[0]
+             author_door=xpath(tree, '//*[@class="author"]/text() | //*/strong[@class="article__header__meta__author"]/text()')[0]
         except:
              author_door=" "
              logger.debug("Could not parse article author")
         try:
-             bron_text=tree.xpath('//*[@class="time_post"]/text()')[1].replace("\n", "")
+             bron_text=xpath(tree, '//*[@class="time_post"]/text()')[1].replace("\n", "")
              author_bron=re.findall(".*?bron:(.*)", bron_text)[0]
         except:
             author_bron=""
             if author_bron=="":
                 try:
-                    bron_text=tree.xpath('//*[@class="time_post"]/text()')[0].replace("\n", "")
+                    bron_text=xpath(tree, '//*[@class="time_post"]/text()')[0].replace("\n", "")
                     author_bron=re.findall(".*?bron:(.*)", bron_text)[0]
                 except:
                     author_bron=""
@@ -850,13 +851,13 @@ class trouw(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__cover layout__stage--center"]//img')
+            img_list = xpath(element, '//figure[@class="article__cover layout__stage--center"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))}
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))}
                      # 'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -902,28 +903,28 @@ class telegraaf(rss):
 
 
         tree = fromstring(htmlsource)
-        paywall = tree.xpath('//*[@class ="bg-premium all-paddings-6"]')
+        paywall = xpath(tree, '//*[@class ="bg-premium all-paddings-6"]')
         if paywall:
             paywall_na = True
         else:
             paywall_na = False
         try:
-            title = tree.xpath('//*/h1[@class="article-title playfair-bold-l no-top-margin no-bottom-margin gray1"]/text()|//*/h1[@class="article-title playfair-bold-l playfair-bold-xl--m playfair-bold-g--l no-top-margin no-bottom-margin gray1"]/text()|//*/h2[@class="ui-tab-gothic-bold ui-text-medium"]/text() | //*/h1[@class="ui-stilson-bold ui-text-large ui-break-words ui-dark3 ui-no-top-margin ui-bottom-margin-2 ui-top-padding-2"]/text()|//*/h2[@class="no-top-margin bottom-margin-3 bottom-margin-4--l roboto-black-l roboto-black-xl--l gray2"]/text() | //*/h1[@class="ArticleTitle__title"]/text()')[0] 
+            title = xpath(tree, '//*/h1[@class="article-title playfair-bold-l no-top-margin no-bottom-margin gray1"]/text()|//*/h1[@class="article-title playfair-bold-l playfair-bold-xl--m playfair-bold-g--l no-top-margin no-bottom-margin gray1"]/text()|//*/h2[@class="ui-tab-gothic-bold ui-text-medium"]/text() | //*/h1[@class="ui-stilson-bold ui-text-large ui-break-words ui-dark3 ui-no-top-margin ui-bottom-margin-2 ui-top-padding-2"]/text()|//*/h2[@class="no-top-margin bottom-margin-3 bottom-margin-4--l roboto-black-l roboto-black-xl--l gray2"]/text() | //*/h1[@class="ArticleTitle__title"]/text()')[0] 
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            category = tree.xpath('//*/a[@class="inline-block gray1 roboto-black-s uppercase-text no-underline bottom-padding-1 bottom-border-thin"]/text()' )[0]
+            category = xpath(tree, '//*/a[@class="inline-block gray1 roboto-black-s uppercase-text no-underline bottom-padding-1 bottom-border-thin"]/text()' )[0]
         except:
             category = ""
             logger.debug("Could not parse article category")
         try:
-            teaser=tree.xpath('//*/p[@class="abril-bold no-top-margin"]//text()')[0]
+            teaser=xpath(tree, '//*/p[@class="abril-bold no-top-margin"]//text()')[0]
         except:
             logger.debug("Could not parse article teaser")
             teaser=""
         try:
-            text=" ".join(tree.xpath('//*/p[@class="false bottom-margin-6"]//text() | //*/p[@class="false bottom-margin-6"]/span[class="bold"]//text() | //*[@class="ArticleBodyHtmlBlock__body"]/text()')).strip()
+            text=" ".join(xpath(tree, '//*/p[@class="false bottom-margin-6"]//text() | //*/p[@class="false bottom-margin-6"]/span[class="bold"]//text() | //*[@class="ArticleBodyHtmlBlock__body"]/text()')).strip()
         except:
             text = ""
             logger.warning("Could not parse article text")
@@ -931,7 +932,7 @@ class telegraaf(rss):
             #logger.warning("Trying alternative method....")
             # htmlsource has text included like so: "articleBody":"HERE IS THE TEXT.","author":
         try:
-            author_door = tree.xpath('//*[@class="auteur"]/text() | //*[@class="ui-table ui-gray3"]/span[2]/text()')[0].strip().lstrip("Van ").lstrip("onze").lstrip("door").strip()
+            author_door = xpath(tree, '//*[@class="auteur"]/text() | //*[@class="ui-table ui-gray3"]/span[2]/text()')[0].strip().lstrip("Van ").lstrip("onze").lstrip("door").strip()
         except:
             author_door = ""
             logger.debug("Could not parse article source")
@@ -954,13 +955,13 @@ class telegraaf(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="__picture picture height-100 absolute top-left-corner width-100 no-borders"]//img')
+            img_list = xpath(element, '//*[@class="__picture picture height-100 absolute top-left-corner width-100 no-borders"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : self.rss_url[:-4] + img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']
                 }
                 if image['url'] not in [i['url'] for i in images]:
@@ -1003,12 +1004,12 @@ class metro(rss):
 
         tree = fromstring(htmlsource)
         try:
-            title = tree.xpath('//*[@class="row"]/h1/text() | //*[@class="css-1edvzmo css-b21mdf"]/text()')[0]
+            title = xpath(tree, '//*[@class="row"]/h1/text() | //*[@class="css-1edvzmo css-b21mdf"]/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            category = tree.xpath('//*[@class="active"]/text() | //*/a[@title class="active"]/text()')[0]
+            category = xpath(tree, '//*[@class="active"]/text() | //*/a[@title class="active"]/text()')[0]
         except:
             category = ""
             logger.debug("Could not parse article category")
@@ -1031,7 +1032,7 @@ class metro(rss):
         #13. path: regular text
         
         #14. path: new layout. TO DO: -- also includes "invisible" text after 'bekijk ook'
-            textrest=tree.xpath('//*[@class="field-item even"]/p/text() | //*[@class="field-item even"]/p/a/text() | //*[@class="field-item even"]/p/em/text() | //*[@class="field-item even"]/h2/text() | //*[@class="field-item even"]/p/span/text() | //*[@class="field-item even"]/h2/span/text() | //*[@class="field-item even"]/p/span/em/a/text() | //*[@class="field-item even"]/p/em/a/text() | //*[@class="field-item even"]/p/em/strong/text() | //*[@class="field-item even"]/p/b/text() | //*[@class="field-item even"]/div/text() | //*[@class="field-item even"]/p/strong/text() | //*[@class="css-1uqapas  "]/p[@class="css-1qs30e6"]/descendant-or-self::text()')
+            textrest=xpath(tree, '//*[@class="field-item even"]/p/text() | //*[@class="field-item even"]/p/a/text() | //*[@class="field-item even"]/p/em/text() | //*[@class="field-item even"]/h2/text() | //*[@class="field-item even"]/p/span/text() | //*[@class="field-item even"]/h2/span/text() | //*[@class="field-item even"]/p/span/em/a/text() | //*[@class="field-item even"]/p/em/a/text() | //*[@class="field-item even"]/p/em/strong/text() | //*[@class="field-item even"]/p/b/text() | //*[@class="field-item even"]/div/text() | //*[@class="field-item even"]/p/strong/text() | //*[@class="css-1uqapas  "]/p[@class="css-1qs30e6"]/descendant-or-self::text()')
         except:
             logger.debug("Could not parse article text")
             textrest = ""
@@ -1039,14 +1040,14 @@ class metro(rss):
         text=re.sub("Lees ook:"," ",text)
         try:
         #new layout author:
-            author_door = tree.xpath('//*[@class="username"]/text()')[0].strip().lstrip("door ").lstrip("© ").lstrip("2014 ").strip()
+            author_door = xpath(tree, '//*[@class="username"]/text()')[0].strip().lstrip("door ").lstrip("© ").lstrip("2014 ").strip()
         except:
             author_door = ""
             logger.debug("Could not parse article source")
         if author_door=="":
         #try old layout author
             try:
-                author_door = tree.xpath('//*[@class="article-options"]/text()')[0].split("|")[0].replace("\n", "").replace("\t","").strip()
+                author_door = xpath(tree, '//*[@class="article-options"]/text()')[0].split("|")[0].replace("\n", "").replace("\t","").strip()
             except:
                 author_door = ""
         author_bron=""
@@ -1066,13 +1067,13 @@ class metro(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="image row"]//img')
+            img_list = xpath(element, '//*[@class="image row"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1109,22 +1110,22 @@ class geenstijl(rss):
 
 
         tree = fromstring(htmlsource)
-        textrest=tree.xpath('//*[@class="article_content"]/p//text() | //*[@class="article_content"]/p/strong//text() | //*[@class="article_content"]/p/em//text() | //*/h2[@class="content-title"]//text()')
+        textrest=xpath(tree, '//*[@class="article_content"]/p//text() | //*[@class="article_content"]/p/strong//text() | //*[@class="article_content"]/p/em//text() | //*/h2[@class="content-title"]//text()')
         if textrest=="":
             logger.warning("Could not parse article text")
         text="\n".join(textrest)
         try:
-            title = tree.xpath('//*[@class="col-xs-12"]/h1/text()')[0]
+            title = xpath(tree, '//*[@class="col-xs-12"]/h1/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            teaser=tree.xpath('//*[@class="article-intro"]/p/text()')[0]
+            teaser=xpath(tree, '//*[@class="article-intro"]/p/text()')[0]
         except:
             teaser=""
             logger.warning("Could not parse article teaser")
         try:
-            author_door=tree.xpath('//*[@class="col-xs-12 col-sm-7"]/a[@rel="author"]//text()')[0].replace("|","")
+            author_door=xpath(tree, '//*[@class="col-xs-12 col-sm-7"]/a[@rel="author"]//text()')[0].replace("|","")
         except:
             author_door=""
             logger.warning("Could not parse article source")
@@ -1144,13 +1145,13 @@ class geenstijl(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="article_img_container"]//img')
+            img_list = xpath(element, '//*[@class="article_img_container"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1197,46 +1198,46 @@ class fok(rss):
 
         tree = fromstring(htmlsource)
         try:
-            title = tree.xpath('//*/header[@class="hasHidden"]/h1/text()')
+            title = xpath(tree, '//*/header[@class="hasHidden"]/h1/text()')
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
-            teaser=tree.xpath('//*/article[@class="single"]/p[0]//text()')
+            teaser=xpath(tree, '//*/article[@class="single"]/p[0]//text()')
         except:
             teaser=""
             logger.debug("Could not parse article teaser")
         try:
-            category="".join(tree.xpath('//*[@id="crumbs"]/ul/li/a/text()'))
+            category="".join(xpath(tree, '//*[@id="crumbs"]/ul/li/a/text()'))
         except:
             category = ""
             logger.category("Could not parse article category")
         if len(category.split(" ")) >1:
             category=""
         try:
-            textrest=tree.xpath('//*/article[@class="single"]/p//text() | //*/article[@class="single"]/p/em//text() | //*[@role="main"]/article/p//text() | //*[@role="main"]/article/p/strong//text() | //*[@role="main"]/article/p/strong/a//text() | //*[@role="main"]/article/p/a//text() | //*[@role="main"]/article/p/em//text() | //*[@id="mainContent"]//*[@role="main"]/article/p//text() | //*[@id="mainContent"]/div[5]/main/article/p//text()')
+            textrest=xpath(tree, '//*/article[@class="single"]/p//text() | //*/article[@class="single"]/p/em//text() | //*[@role="main"]/article/p//text() | //*[@role="main"]/article/p/strong//text() | //*[@role="main"]/article/p/strong/a//text() | //*[@role="main"]/article/p/a//text() | //*[@role="main"]/article/p/em//text() | //*[@id="mainContent"]//*[@role="main"]/article/p//text() | //*[@id="mainContent"]/div[5]/main/article/p//text()')
         except:
             print("geen text")
             logger.warning("Could not parse article text")
             textrest = ""
         text = "\n".join(textrest)
         try:
-             author_door = tree.xpath('//*[@class="mainFont"]/text()')[0].strip()
+             author_door = xpath(tree, '//*[@class="mainFont"]/text()')[0].strip()
         except:
             author_door = ""
             logger.debug("Could not parse article source")
         if author_door=="":
             try:
-                author_door = tree.xpath('//*[@class="article-options"]/text()')[0].split("|")[0].replace("\n", "").replace("\t","").strip()
+                author_door = xpath(tree, '//*[@class="article-options"]/text()')[0].split("|")[0].replace("\n", "").replace("\t","").strip()
             except:
                 author_door = ""
         try:
-            author_bron=tree.xpath('//*[@class="bron"]/strong/text()')[0]
+            author_bron=xpath(tree, '//*[@class="bron"]/strong/text()')[0]
         except:
             author_bron=""
         if author_bron=="":
             try:
-                author_bron=tree.xpath('//*[@class="bron"]/strong/a/text()')[0]
+                author_bron=xpath(tree, '//*[@class="bron"]/strong/a/text()')[0]
             except:
                 author_bron=""
                 logger.debug("Could not parse article source byline")
@@ -1257,13 +1258,13 @@ class fok(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="col-4 first"]//img')
+            img_list = xpath(element, '//*[@class="col-4 first"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1276,9 +1277,66 @@ if __name__=="__main__":
     print('Please use these scripts from within inca. EXAMPLE: BLA BLA BLA')
 
 
+def _first(result):
+    '''The first result of an XPath expression, or "" if it did not match'''
+    return result[0] if result else ""
+
+def _second(result):
+    return result[1] if len(result)>1 else ""
+
+# The fields of the regional newspapers that share one site layout (bd, ed, pzc, ...)
+# 1. title
+# 2. category: normal articles, video articles, articles that are tagged 'Home'
+# 3. teaser: regular and video articles
+# 4. text: regular text, live blogs (time, intro and body text)
+# 5. byline: the source line, then the author link, then the source span
+# 6. byline_source: the second text of the author line, such as "bron: ANP"
+REGIONAL_FIELDS = {'title'         : ('//*/h1[@class="article__title"]/text()', _first),
+                   'category'      : ('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()', _first),
+                   'teaser'        : '//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()',
+                   'text'          : '//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()',
+                   'byline'        : ('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()', _first),
+                   'byline_link'   : ('//*[@class="author"]/a/text()', _first),
+                   'byline_span'   : ('//*[@class="article__source"]/span/text()', _first),
+                   'byline_source' : ('//*[@class="author"]/text()', _second)}
+
+def _regional_article(fields, images):
+    '''Turns the fields extracted with (a variant of) REGIONAL_FIELDS into the parsed article'''
+    if fields['title']=="":
+        logger.warning("Could not parse article title")
+    if fields['category']=="":
+        logger.debug("Could not parse article category")
+    if fields['teaser']=="":
+        logger.debug("Could not parse article teaser")
+    text = fields['text'].strip()
+    if text=="":
+        logger.warning("Could not parse article text")
+    author_door = fields['byline'] or fields['byline_link'].strip().lstrip("Door:").strip() or \
+        fields['byline_span'].strip().lstrip("Door:").strip()
+    if author_door=="":
+        logger.debug("Could not parse article author")
+    author_bron = re.findall(".*?bron:(.*)", fields['byline_source'].replace("\n", ""))
+    author_bron = author_bron[0] if author_bron else ""
+    if author_bron=="":
+        logger.debug("Could not parse article source byline")
+
+    # text=polish(text)
+
+    extractedinfo={"title":fields['title'].strip(),
+                   "category":fields['category'].strip(),
+                   "teaser":fields['teaser'].strip(),
+                   "text":text,
+                   "byline":author_door.replace("\n", " "),
+                   "byline_source":author_bron.replace("\n"," ").strip(),
+                   "images":images}
+
+    return extractedinfo
+
 class destentor(rss):
     """Scrapes destentor.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "destentor (www)"
         self.rss_url="http://www.destentor.nl/home/rss.xml"
@@ -1312,82 +1370,18 @@ class destentor(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-    #        teaser = tree.xpath('//*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/span/text() |  //*/p[@class="article__intro"]/span/b/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-
-        # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/time[@class="liveblog__time-text"]/text() | //*/p[@class="liveblog__intro"]/text() | //*/p[@class="liveblog__paragraph"]/text() | //*/p[@class="liveblog__paragraph"]/strong/text() | //*/p[@class="liveblog__paragraph"]/a/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-            logger.debug("Could not parse article source")
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-
-        images = destentor._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), destentor._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      # 'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1406,6 +1400,8 @@ class destentor(rss):
 class bd(rss):
     """Scrapes bd.nl"""
 
+    fields = XPathSpec(dict(REGIONAL_FIELDS, byline=('//*/span[@class="article__source"]/b/text() | //*/span[@class="article__source"]/span/text()| //*/p[@class="article__paragraph"]/b/i/text()', _first)))
+
     def __init__(self):
         self.doctype = "bd (www)"
         self.rss_url="http://www.bd.nl/home/rss.xml"
@@ -1439,81 +1435,18 @@ class bd(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/span[@class="article__source"]/span/text()| //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article author")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article source byline")
-
-        # text=polish(text)
-
-        images = bd._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images": images
-                       }
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), bd._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1530,6 +1463,8 @@ class bd(rss):
 class gelderlander(rss):
     """Scrapes gelderlander.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "gelderlander (www)"
         self.rss_url="http://www.gelderlander.nl/home/rss.xml"
@@ -1563,78 +1498,18 @@ class gelderlander(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        #text = tree.xpath('//*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/h2[@class="article__subheader"]/text() | //*/p[@class="article__paragraph"]/b/text() | //*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/i/text() | //*/p[@class="article__paragraph"]/a/i/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article byline source")
-
-        # text=polish(text)
-
-        images = gelderlander._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), gelderlander._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1651,6 +1526,8 @@ class gelderlander(rss):
 class ed(rss):
     """Scrapes ed.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "ed (www)"
         self.rss_url="http://www.ed.nl/home/rss.xml"
@@ -1684,85 +1561,18 @@ class ed(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/time[@class="liveblog__time-text"]/text() | //*/p[@class="liveblog__intro"]/text() | //*/p[@class="liveblog__paragraph"]/text() | //*/p[@class="liveblog__paragraph"]/strong/text() | //*/p[@class="liveblog__paragraph"]/a/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article source byline")
-
-        # text=polish(text)
-
-        images = ed._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), ed._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1780,6 +1590,8 @@ class ed(rss):
 class bndestem(rss):
     """Scrapes bndestem.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "bndestem (www)"
         self.rss_url="http://www.bndestem.nl/home/rss.xml"
@@ -1813,95 +1625,18 @@ class bndestem(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        # 1. path = normal intro
-        # 2. path = normal intro version 2
-        # 3. path = normal intro version 3
-        # 4. path = bold intro
-        # 5. path = bold intro version 2
-        # 6. path = intro video
-        # 7. path = intro video version 2
-        # 8. path = links in intro video
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() |  //*/p[@class="article__intro"]/span/b/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: bold paragraph headings - version 2
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/h2[@class="article__subheader"]/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/p[@class="article__paragraph"]/i/text() | //*[@class="s-element-content s-text emojify"]/text() | //*[@class="s-element-content s-text emojify"]/b/text() | //*[@class="s-element-content s-text emojify"]/u/text() | //*[@class="s-element-content s-text emojify"]/u/b/text() | //*[@class="s-element-content s-text emojify"]/a/text() | //*[@class="s-element-content s-text emojify"]/b/a/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article source byline")
-
-
-        # text=polish(text)
-
-        images = bndestem._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), bndestem._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -1918,6 +1653,8 @@ class bndestem(rss):
 class pzc(rss):
     """Scrapes pzc.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "pzc (www)"
         self.rss_url="http://www.pzc.nl/home/rss.xml"
@@ -1951,93 +1688,18 @@ class pzc(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        # 1. path = normal intro
-        # 2. path = normal intro version 2
-        # 3. path = normal intro version 3
-        # 4. path = bold intro
-        # 5. path = bold intro version 2
-        # 6. path = intro video
-        # 7. path = intro video version 2
-        # 8. path = links in intro video
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() |  //*/p[@class="article__intro"]/span/b/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-       # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/time[@class="liveblog__time-text"]/text() | //*/p[@class="liveblog__intro"]/text() | //*/p[@class="liveblog__paragraph"]/text() | //*/p[@class="liveblog__paragraph"]/strong/text() | //*/p[@class="liveblog__paragraph"]/a/text()')
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article source byline")
-
-        # text=polish(text)
-
-        images = pzc._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), pzc._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -2055,6 +1717,8 @@ class pzc(rss):
 class tubantia(rss):
     """Scrapes tubantia.nl"""
 
+    fields = XPathSpec(REGIONAL_FIELDS)
+
     def __init__(self):
         self.doctype = "tubantia (www)"
         self.rss_url="http://www.tubantia.nl/home/rss.xml"
@@ -2088,93 +1752,18 @@ class tubantia(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@class="article__title"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        # 1. path = normal intro
-        # 2. path = normal intro version 2
-        # 3. path = normal intro version 3
-        # 4. path = bold intro
-        # 5. path = bold intro version 2
-        # 6. path = intro video
-        # 7. path = intro video version 2
-        # 8. path = links in intro video
-        try:
-            teaser=" ".join(tree.xpath('//*/p[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() |  //*/p[@class="article__intro"]/span/b/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-        text=" ".join(tree.xpath('//*/p[@class="article__paragraph"]//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/time[@class="liveblog__time-text"]/text() | //*/p[@class="liveblog__intro"]/text() | //*/p[@class="liveblog__paragraph"]/text() | //*/p[@class="liveblog__paragraph"]/strong/text() | //*/p[@class="liveblog__paragraph"]/a/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article source byline")
-
-        # text=polish(text)
-
-        images = tubantia._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), tubantia._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__figure"]//img')
+            img_list = xpath(element, '//figure[@class="article__figure"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -2192,6 +1781,10 @@ class tubantia(rss):
 class limburger(rss):
     """Scrapes limburger.nl"""
 
+    fields = XPathSpec(dict(REGIONAL_FIELDS, title=('//*/h1[@itemprop="name"]/text()', _first),
+                            teaser='//*[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()',
+                            text='//*[@class="article__body"]/p//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()'))
+
     def __init__(self):
         self.doctype = "limburger (www)"
         self.rss_url="http://feeds.feedburner.com/Limburgernl-nieuws?format=xml"
@@ -2225,93 +1818,18 @@ class limburger(rss):
             logger.warning("Could not parse HTML tree",type(doc),len(doc))
             #print(doc)
             return("","","", "")
-        try:
-            title = tree.xpath('//*/h1[@itemprop="name"]/text()')[0]
-        except:
-            title=""
-            logger.warning("Could not parse article title")
-        try:
-        # 1. path = normal articles
-        # 2. path = video articles
-        # 3. path = articles that are tagged 'Home'
-            category = tree.xpath('//*[@class="container"]/ul/li[@class="sub-nav__list-item active"]/a/text() | //*[@class="article__section-text"]/a/text() | //*/span[@class="mobile-nav__list-text"]/text()')[0]
-        except:
-            category=""
-            logger.debug("Could not parse article category")
-        # 1. path = normal intro
-        # 2. path = normal intro version 2
-        # 3. path = normal intro version 3
-        # 4. path = bold intro
-        # 5. path = bold intro version 2
-        # 6. path = intro video
-        # 7. path = intro video version 2
-        # 8. path = links in intro video
-        try:
-            teaser=" ".join(tree.xpath('//*[@class="article__intro"]//text() | //*/p[@class="article__intro video"]//text()')).strip()
-#            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() |  //*/p[@class="article__intro"]/span/b/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
-        except:
-            teaser=""
-            logger.debug("Could not parse article teaser")
-        #1. path: regular text
-        #2. path: text with link behind (shown in blue underlined);
-        #3. path: second headings
-        #4. path: span paragraphs
-        #5. path: bold paragraph headings
-        #6. path: live blogs time
-        #7. path: live blogs intro or heading
-        #8. path: live blogs body text
-        #9. path: live blogs strong body text
-        #10. path: live blogs link body text
-        text=" ".join(tree.xpath('//*[@class="article__body"]/p//text() | //*/p[@class="liveblog_time-text"]//text() | //*/time[@class="liveblog__time-text"]//text() | //*/p[@class="liveblog__intro"]//text() | //*/p[@class="liveblog__paragraph"]//text()')).strip()
-        # text = tree.xpath('//*/p[@class="article__paragraph"]/text() | //*/p[@class="article__paragraph"]/a/text() | //*/p[@class="article__paragraph"]/h2/text() | //*/p[@class="article__paragraph"]/span/text() | //*/p[@class="article__paragraph"]/b/text() | //*/time[@class="liveblog__time-text"]/text() | //*/p[@class="liveblog__intro"]/text() | //*/p[@class="liveblog__paragraph"]/text() | //*/p[@class="liveblog__paragraph"]/strong/text() | //*/p[@class="liveblog__paragraph"]/a/text()')
-        if text=="":
-            logger.warning("Could not parse article text")
-        try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
-        except:
-            author_door=""
-        if author_door=="":
-            try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door==""
-        if author_door=="":
-            try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
-            except:
-                author_door=""
-                logger.debug("Could not parse article source")
-        try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
-            author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
-        except:
-            author_bron=""
-            logger.debug("Could not parse article byline source")
-
-        # text=polish(text)
-
-        images = limburger._extract_images(self,tree)
-
-        extractedinfo={"title":title.strip(),
-                       "category":category.strip(),
-                       "teaser":teaser.strip(),
-                       "text":text.strip(),
-                       "byline":author_door.replace("\n", " "),
-                       "byline_source":author_bron.replace("\n"," ").strip(),
-                       "images":images}
-
-        return extractedinfo
+        return _regional_article(self.fields.extract(tree), limburger._extract_images(self,tree))
 
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//figure[@class="article__image"]//img')
+            img_list = xpath(element, '//figure[@class="article__image"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src'],
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
@@ -2357,44 +1875,44 @@ class frieschdagblad(rss):
             #print(doc)
             return("","","", "")
         try:
-            title = tree.xpath('//*[@class="ArtKopStd"]/b/text()')[0]
+            title = xpath(tree, '//*[@class="ArtKopStd"]/b/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
         # 1. path = normal articles
-            category = tree.xpath('//*/span[@class="rubriek"]/text()')[0]
+            category = xpath(tree, '//*/span[@class="rubriek"]/text()')[0]
         except:
             category=""
             logger.debug("Could not parse article category")
         #no teaser
         try:
-            teaser=tree.xpath('//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
+            teaser=xpath(tree, '//*/p[@class="article__intro"]/span[@class="tag"]/text() | //*/p[@class="article__intro"]/text() | //*/p[@class="article__intro"]/span/text() | //*/p[@class="article__intro"]/b/text() | //*/p[@class="article__intro video"]/text() | //*/p[@class="article__intro video"]/span/text() | //*/p[@class="article__intro video"]/span/a/text()')[0]
         except:
             teaser=""
             logger.debug("Could not parse article teaser")
         #1. path: regular text
-        text = tree.xpath('//*[@class="ArtTekstStd"]/text()')
+        text = xpath(tree, '//*[@class="ArtTekstStd"]/text()')
         if text=="":
             logger.warning("Could not parse article text")
         #no author
         try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
+            author_door = xpath(tree, '//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
         except:
             author_door=""
         if author_door=="":
             try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
+                author_door = xpath(tree, '//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door==""
         if author_door=="":
             try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
+                author_door=xpath(tree, '//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door=""
                 logger.debug("Could not parse article source")
         try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
+            brun_text = xpath(tree, '//*[@class="author"]/text()')[1].replace("\n", "")
             author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
         except:
             author_bron=""
@@ -2449,43 +1967,43 @@ class zwartewaterkrant(rss):
             #print(doc)
             return("","","", "")
         try:
-            title = tree.xpath('//*[@id="containerContent"]/h2/text()')[0]
+            title = xpath(tree, '//*[@id="containerContent"]/h2/text()')[0]
         except:
             title=""
             logger.warning("Could not parse article title")
         try:
         # 1. path = normal articles
-            category = tree.xpath('//*/span[@class="rubriek"]/text()')[0]
+            category = xpath(tree, '//*/span[@class="rubriek"]/text()')[0]
         except:
             category=""
             logger.debug("Could not parse article category")
         try:
-            teaser=tree.xpath('//*/span[@class="blackbold"]/text()')[0]
+            teaser=xpath(tree, '//*/span[@class="blackbold"]/text()')[0]
         except:
             teaser=""
             logger.debug("Could not parse article teaser")
         #1. path: regular text
-        text = tree.xpath('//*[@id="containerContent"]/p/text() | //*[@id="containerContent"]/p/a/text()')
+        text = xpath(tree, '//*[@id="containerContent"]/p/text() | //*[@id="containerContent"]/p/a/text()')
         if text=="":
             logger.warning("Could not parse article text")
         #no author
         try:
-            author_door = tree.xpath('//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
+            author_door = xpath(tree, '//*/span[@class="article__source"]/b/text() | //*/p[@class="article__paragraph"]/b/i/text()') [0]
         except:
             author_door=""
         if author_door=="":
             try:
-                author_door = tree.xpath('//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
+                author_door = xpath(tree, '//*[@class="author"]/a/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door==""
         if author_door=="":
             try:
-                author_door=tree.xpath('//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
+                author_door=xpath(tree, '//*[@class="article__source"]/span/text()')[0].strip().lstrip("Door:").strip()
             except:
                 author_door=""
                 logger.debug("Could not parse article source")
         try:
-            brun_text = tree.xpath('//*[@class="author"]/text()')[1].replace("\n", "")
+            brun_text = xpath(tree, '//*[@class="author"]/text()')[1].replace("\n", "")
             author_bron = re.findall(".*?bron:(.*)", brun_text)[0]
         except:
             author_bron=""
@@ -2506,13 +2024,13 @@ class zwartewaterkrant(rss):
     def _extract_images(self, dom_nodes):
         images = []
         for element in dom_nodes:
-            img_list = element.xpath('//*[@class="containerContent"]//img')
+            img_list = xpath(element, '//*[@class="containerContent"]//img')
             if len(img_list)>0:
                 img = img_list[0]
                 image = {'url' : img.attrib['src']}
                      #'height' : img.attrib['height'],
                      #'width' : img.attrib['width'],
-                     #'caption' : _fon(element.xpath('.//p[@Class="imageCaption"]/text()'))
+                     #'caption' : _fon(xpath(element, './/p[@Class="imageCaption"]/text()'))
                      #'alt' : img.attrib['alt']}
                 if image['url'] not in [i['url'] for i in images]:
                     images.append(image)
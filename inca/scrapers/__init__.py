@@ -2,9 +2,15 @@ import os as _os
 from importlib import import_module
 _expected_file_end = "_scraper.py"
 
-__all__ = [fname for fname in _os.listdir('scrapers') if fname[-len(_expected_file_end):]==_expected_file_end and not fname.startswith('.')]
+__all__ = [fname for fname in _os.listdir(_os.path.dirname(__file__)) if fname[-len(_expected_file_end):]==_expected_file_end and not fname.startswith('.')]
 
-for module in __all__:
-    #__import__('.'.join(['scrapers',module.replace('.py','')]))
-    import_module('.'+module.replace('.py',''), package='inca.scrapers')
-    
+def import_all():
+    '''Import all scrapers, e.g. so celery recognizes them as tasks'''
+    for module in __all__:
+        import_module('.'+module.replace('.py',''), package='inca.scrapers')
+
+def __getattr__(name):
+    # scrapers are imported on first access, see core.plugins
+    if name+'.py' in __all__:
+        return import_module('.'+name, package='inca.scrapers')
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
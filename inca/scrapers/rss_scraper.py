@@ -1,12 +1,23 @@
 #import requests
 import datetime
+import threading
+import atexit
+import time
+import os
+import json
+from hashlib import md5
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
 from lxml.html import fromstring
 from ..core.scraper_class import Scraper
 from ..core.scraper_class import UnparsableException
-from ..core.database import check_exists
+from ..core.seen_cache import filter_seen, SEEN_CACHE_DIR
 import logging
 import feedparser
 import re
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import urlparse
 
 logger = logging.getLogger("INCA")
 
@@ -32,6 +43,200 @@ cookieprocessor = HTTPCookieProcessor()
 opener = urllib2.build_opener(MyHTTPRedirectHandler, cookieprocessor)
 urllib2.install_opener(opener)
 
+USER_AGENTS = ["Wget/1.9",
+               "Mozilla/5.0 (Windows NT 6.1; Win64; x64; rv:47.0) Gecko/20100101 Firefox/47.0"]
+
+class FetchEngine(object):
+    '''
+    Fetches pages concurrently from a pool of threads.
+
+    All threads share one `requests.Session`, so connections to the same
+    host are kept alive and reused. At most `per_host` requests are sent to
+    one host at the same time: requests to a busy host wait in a queue of
+    that host and are only handed to the pool when one of its requests is
+    done, so they never occupy a thread that could serve another host. Requests that time out or fail with a server
+    error are retried `retries` times; if a site refuses a user agent (or
+    returns an empty page) the next one in `user_agents` is tried.
+
+    Parameters
+    ----
+    workers : int (default=16)
+        The number of pages that are fetched at the same time
+    per_host : int (default=4)
+        The maximum number of concurrent requests to a single host
+    timeout : int (default=30)
+        Seconds to wait for a server to respond
+    retries : int (default=2)
+        How often to retry a request after a timeout or server error
+    user_agents : list (default=USER_AGENTS)
+        The user agents to try, in order
+    '''
+
+    def __init__(self, workers=16, per_host=4, timeout=30, retries=2, user_agents=USER_AGENTS):
+        self.workers     = workers
+        self.per_host    = per_host
+        self.timeout     = timeout
+        self.retries     = retries
+        self.user_agents = user_agents
+        self.session     = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor   = ThreadPoolExecutor(max_workers=workers)
+        self._active     = {}
+        self._waiting    = {}
+        self._hosts_lock = threading.Lock()
+
+    def _submit(self, url, function):
+        '''Returns a future for `function()`, which runs as soon as the host of `url` has a free slot'''
+        host = urlparse(url).netloc
+        future = Future()
+        with self._hosts_lock:
+            start = self._active.get(host, 0) < self.per_host
+            if start:
+                self._active[host] = self._active.get(host, 0) + 1
+            else:
+                self._waiting.setdefault(host, deque()).append((function, future))
+        if start:
+            self._start(host, function, future)
+        return future
+
+    def _start(self, host, function, future):
+        def run():
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(function())
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                self._release(host)
+        self._executor.submit(run)
+
+    def _release(self, host):
+        '''Hands the slot of a finished request to the next waiting request for the same host'''
+        with self._hosts_lock:
+            waiting = self._waiting.get(host)
+            if waiting:
+                function, future = waiting.popleft()
+            else:
+                self._waiting.pop(host, None)
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+                return
+        self._start(host, function, future)
+
+    def _get(self, url, headers=None, raise_errors=False):
+        error = None
+        for user_agent in self.user_agents:
+            request_headers = {'User-Agent' : user_agent}
+            request_headers.update(headers or {})
+            for attempt in range(self.retries + 1):
+                try:
+                    response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+                except requests.RequestException as e:
+                    error = e
+                else:
+                    if response.status_code < 500:
+                        break
+                    error = "HTTP {}".format(response.status_code)
+                if attempt < self.retries:
+                    time.sleep(attempt)
+            else:
+                logger.info('Could not open {url} with user agent {user_agent}: {error}'.format(**locals()))
+                continue
+            if response.status_code >= 400:
+                error = "HTTP {}".format(response.status_code)
+            elif response.status_code == 304 or response.content:
+                return response
+            else:
+                error = "empty response"
+            logger.info('Could not open {url} with user agent {user_agent}: {error}'.format(**locals()))
+        if raise_errors:
+            raise IOError('Could not open {url}: {error}'.format(**locals()))
+        return None
+
+    def _fetch(self, url, headers=None, raise_errors=False):
+        response = self._get(url, headers=headers, raise_errors=raise_errors)
+        if response is None:
+            return None
+        return response.content.decode(encoding="utf-8",errors="ignore")
+
+    def request(self, url, headers=None, raise_errors=False):
+        '''Returns the response to a GET request for `url`, or None if it could not be retrieved
+
+        A "304 Not Modified" response (to a conditional request) is returned as is.
+        '''
+        return self._submit(url, lambda: self._get(url, headers=headers, raise_errors=raise_errors)).result()
+
+    def fetch(self, url, headers=None, raise_errors=False):
+        '''Returns the body of `url` as a string, or None if it could not be retrieved'''
+        return self._submit(url, lambda: self._fetch(url, headers=headers, raise_errors=raise_errors)).result()
+
+    def fetch_many(self, urls, headers=None):
+        '''Fetches `urls` concurrently and yields their bodies (or None) in the same order'''
+        futures = [self._submit(url, lambda url=url: self._fetch(url, headers=headers)) for url in urls]
+        return (future.result() for future in futures)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    '''Returns the fetch engine of this process, shared by all rss scrapers'''
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+            atexit.register(_engine.close)
+    return _engine
+
+class FeedState(object):
+    '''
+    Remembers, per feed URL, the ETag and Last-Modified headers and a hash of
+    the content of the last feed that was fully processed, so that unchanged
+    feeds can be skipped on the next run.
+
+    The state is stored as JSON in `path`. As several scrapers (or processes)
+    may share the file, it is re-read before each update.
+    '''
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(SEEN_CACHE_DIR, 'feeds.json')
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as statefile:
+                return json.load(statefile)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, url):
+        '''Returns the stored state of a feed ({} if unknown)'''
+        with self._lock:
+            return self._read().get(url, {})
+
+    def update(self, url, state):
+        '''Store the state of a feed after all its entries were processed'''
+        with self._lock:
+            states = self._read()
+            states[url] = state
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path + '.tmp', 'w') as statefile:
+                    json.dump(states, statefile)
+                os.replace(self.path + '.tmp', self.path)
+            except OSError as e:
+                logger.warning("Unable to store feed state in {self.path}: {e}".format(**locals()))
+
+feed_state = FeedState()
+
+
 
 class rss(Scraper):
     '''
@@ -42,8 +247,14 @@ class rss(Scraper):
     Subclasses should probably overwrite the following functions:
         By overwriting the parsehtml function, more keys can be extracted
         By overwriting the getlink function, modifications to the link can be made, e.g. to bypass cookie walls
+
+    Set `seen_cache = True` (or pass seen_cache=True to get/run) to remember which items are
+    already stored in a local file (see core.seen_cache), so that repeated runs mostly skip
+    the database lookup.
     '''
 
+    seen_cache = False
+
     def __init__(self):
         Scraper.__init__(self)
         self.doctype = "rss"
@@ -67,9 +278,18 @@ class rss(Scraper):
         if type(RSS_URL) is str:
             RSS_URL=[RSS_URL]
 
+        # Feeds that did not change since the last run are skipped. Without saving, there
+        # is no last run to compare with, so then we always parse the feed
+        conditional = save!=False and kwargs.get('conditional', True)
+        self.processed_feeds = []
+
         for thisurl in RSS_URL:
-            rss_body = self.get_page_body(thisurl)
+            rss_body, state = self.get_feed(thisurl, conditional=conditional)
+            if rss_body is None:
+                logger.info("Feed {thisurl} did not change since the last run, skipping it".format(**locals()))
+                continue
             d = feedparser.parse(rss_body)
+            entries = []
             for post in d.entries:
                 try:
                     _id=post.id
@@ -78,71 +298,162 @@ class rss(Scraper):
                 if _id == None:
                     _id=post.link
                 link=re.sub("/$","",self.getlink(post.link))
+                entries.append((post, _id, link))
 
-                # By now, we have retrieved the RSS feed. We now have to determine for the item that
-                # we are currently processing (post in d.entries), whether we want to follow its
-                # link and actually get the full text and process it. If we already have it,
-                # we do not need to (therefore check_exists). But also, if we do not want to
-                # work with the database backend (as indicated by save=False), we probably also
-                # do not want to look something up in the database. We therefore also retrieve it in
-                # that case.
-                if save==False or check_exists(_id)[0]==False:
-                    try:
-                        req=urllib2.Request(link, headers={'User-Agent' : "Wget/1.9"})
-                        htmlsource=urllib2.urlopen(req).read().decode(encoding="utf-8",errors="ignore")
-                    except:
-                        htmlsource=None
-                        logger.info('Could not open link - will not retrieve full article, but will give it another try with different User Agent')
-                    # Some (few) scrapers seem to block certain user agents. Therefore, if code above did
-                    # not succed, try fetching the article pretending to user Firefox on Windows
-                    if not htmlsource or htmlsource=="":
-                        try:
-                            req=urllib2.Request(link, headers={'User-Agent' : "Mozilla/5.0 (Windows NT 6.1; Win64; x64; rv:47.0) Gecko/20100101 Firefox/47.0"})
-                            htmlsource=urllib2.urlopen(req).read().decode(encoding="utf-8",errors="ignore")
-                        except:
-                            htmlsource=None
-                            logger.info('Could not open link - will not retrieve full article')
-   
-                    try:
-                        teaser=re.sub(r"\n|\r\|\t"," ",post.description)
-                    except:
-                        teaser=""
+            # By now, we have retrieved the RSS feed. We now have to determine for the items
+            # whether we want to follow their links and actually get the full text and process
+            # them. If we already have them, we do not need to. The identifiers of all items in
+            # the feed are checked at once (and, if enabled, first in the local seen cache).
+            # But also, if we do not want to work with the database backend (as indicated by
+            # save=False), we probably also do not want to look something up in the database.
+            # We therefore also retrieve everything in that case.
+            if save!=False:
+                use_cache = kwargs.get('seen_cache', self.seen_cache)
+                new = filter_seen([_id for post, _id, link in entries],
+                                  doctype=self.doctype if use_cache else None)
+                entries = [(post, _id, link) for post, _id, link in entries if str(_id) in new]
+
+            # The articles are downloaded concurrently, but parsed (and yielded) in feed order
+            htmlsources = self.fetch_articles([link for post, _id, link in entries])
+            for (post, _id, link), htmlsource in zip(entries, htmlsources):
+                if not htmlsource:
+                    htmlsource=None
+                    logger.info('Could not open link - will not retrieve full article')
+                try:
+                    teaser=re.sub(r"\n|\r\|\t"," ",post.description)
+                except:
+                    teaser=""
+                try:
+                    datum=datetime.datetime(*feedparser._parse_date(post.published)[:6])
+                except:
                     try:
-                        datum=datetime.datetime(*feedparser._parse_date(post.published)[:6])
+                        # alternative date format as used by nos.nl
+                        datum=datetime.datetime(*feedparser._parse_date(post.published[5:16])[:6])
                     except:
+                        #print("Couldn't parse publishing date")
+                        datum=None
+                doc = {"_id":_id,
+                       "title_rss":post.title,
+                       "teaser_rss":teaser,
+                       "publication_date":datum,
+                       "htmlsource":htmlsource,
+                       "feedurl":thisurl,
+                       "url":re.sub("/$","",post.link)}
+                if htmlsource is not None:
+                    # TODO: CHECK IF PARSEHTML returns None, if so, raise custom exception
+                    parsed = self.parsehtml(doc['htmlsource'])
+                    if parsed is None or parsed =={}:
                         try:
-                            # alternative date format as used by nos.nl
-                            datum=datetime.datetime(*feedparser._parse_date(post.published[5:16])[:6])
-                        except:
-                            #print("Couldn't parse publishing date")
-                            datum=None
-                    doc = {"_id":_id,
-                           "title_rss":post.title,
-                           "teaser_rss":teaser,
-                           "publication_date":datum,
-                           "htmlsource":htmlsource,
-                           "feedurl":thisurl,
-                           "url":re.sub("/$","",post.link)}
-                    if htmlsource is not None:
-                        # TODO: CHECK IF PARSEHTML returns None, if so, raise custom exception
-                        parsed = self.parsehtml(doc['htmlsource'])
-                        if parsed is None or parsed =={}:
-                            try:
-                                raise UnparsableException
-                            except UnparsableException:
-                                pass
-                        else:
-                            doc.update(parsed)
-                    parsedurl = self.parseurl(link)
-                    doc.update(parsedurl)
-                    docnoemptykeys={k: v for k, v in doc.items() if v or v ==False}
-                    yield docnoemptykeys
+                            raise UnparsableException
+                        except UnparsableException:
+                            pass
+                    else:
+                        doc.update(parsed)
+                parsedurl = self.parseurl(link)
+                doc.update(parsedurl)
+                docnoemptykeys={k: v for k, v in doc.items() if v or v ==False}
+                yield docnoemptykeys
+
+            # only once all entries are stored (see after_save), the next run can skip this version of the feed
+            if conditional:
+                self.processed_feeds.append((thisurl, state))
+
+    def after_save(self):
+        '''Stores the state of the feeds of which all entries were saved by `run`'''
+        for url, state in getattr(self, 'processed_feeds', []):
+            feed_state.update(url, state)
+        self.processed_feeds = []
+
+    def get_feed(self, url, conditional=True):
+        '''
+        Retrieves a feed, unless it did not change since it was last processed.
+
+        The feed is requested with If-None-Match/If-Modified-Since headers based on the
+        ETag and Last-Modified headers of the previous response. If the server answers
+        "304 Not Modified", or the content is identical to that of the last run, the feed
+        is considered unchanged. Scrapers that overwrite get_page_body (e.g. to pass a
+        cookie wall) are only compared by content.
+
+        Returns
+        ----
+        tuple
+            (the body of the feed or None if it is unchanged, the state to store in
+            feed_state once the feed is processed)
+        '''
+        previous = feed_state.get(url) if conditional else {}
+        state = {}
+        if type(self).get_page_body is rss.get_page_body:
+            headers = {}
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+            response = get_engine().request(url, headers=headers, raise_errors=True)
+            if response.status_code == 304:
+                return None, previous
+            body = response.content.decode(encoding="utf-8",errors="ignore")
+            state = {'etag'          : response.headers.get('ETag'),
+                     'last_modified' : response.headers.get('Last-Modified')}
+        else:
+            body = self.get_page_body(url)
+        state['hash'] = md5(body.encode('utf-8')).hexdigest()
+        if conditional and previous.get('hash') == state['hash']:
+            if state != previous:
+                feed_state.update(url, state)
+            return None, state
+        return body, state
+
+    def fetch_articles(self, links):
+        '''
+        Downloads the articles behind `links` concurrently, using the shared
+        fetch engine. Returns an iterator over the html sources (None for links
+        that could not be retrieved), in the order of `links`.
+
+        Some sites block certain user agents; the engine then retries with
+        another one (see `USER_AGENTS`).
+        '''
+        return get_engine().fetch_many(links)
+
+    @staticmethod
+    def run_many(scrapers, save=True, workers=8, **kwargs):
+        '''
+        Runs many rss scrapers concurrently, e.g. for a full sweep of all outlets.
+
+        Parameters
+        ----
+        scrapers : list
+            rss scraper classes or instances
+        save : bool (default=True)
+            passed to the `run` method of each scraper
+        workers : int (default=8)
+            The number of scrapers that run at the same time. Article downloads
+            of all scrapers share one fetch engine, which limits the number of
+            concurrent requests per host.
+        **kwargs
+            passed to the `run` method of each scraper
+
+        Returns
+        ----
+        dict
+            {doctype : the return value of `run`, or the exception it raised}
+        '''
+        scrapers = [scraper() if isinstance(scraper, type) else scraper for scraper in scrapers]
+
+        def run_one(scraper):
+            try:
+                return scraper.run(save, **kwargs)
+            except Exception as e:
+                logger.warning("{scraper.doctype} failed: {e}".format(**locals()))
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(run_one, scrapers)
+            return {getattr(scraper, 'doctype', scraper.__class__.__name__):result
+                    for scraper, result in zip(scrapers, results)}
 
     def get_page_body(self,url,**kwargs):
         '''Makes an HTTP request to the given URL and returns a string containing the response body'''
-        request = urllib2.Request(url, headers={'User-Agent' : "Wget/1.9"})
-        response_body = urllib2.urlopen(request).read().decode(encoding="utf-8",errors="ignore")
-        return response_body
+        return get_engine().fetch(url, raise_errors=True)
 
     def parsehtml(self,htmlsource):
         '''
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+'''
+Compares the time it takes to start INCA with lazy plugin discovery (the
+default) and with all plugins imported up front (`Inca(lazy=False)`).
+
+Each variant runs in a fresh interpreter, so module caches do not carry
+over between runs. The first lazy run also builds the plugin manifest;
+later runs reuse it.
+
+usage:
+    python3 scripts/benchmark_startup.py [repetitions]
+'''
+
+import subprocess
+import sys
+import time
+
+SNIPPET = "from inca import Inca; myinca = Inca(prompt='noprompt', verbose=False, lazy={lazy}); {access}"
+
+VARIANTS = [
+    ('eager', SNIPPET.format(lazy=False, access='')),
+    ('lazy', SNIPPET.format(lazy=True, access='')),
+    ('lazy + one scraper', SNIPPET.format(lazy=True, access='myinca.rssscrapers.nu')),
+]
+
+def timed(code):
+    start = time.time()
+    subprocess.check_call([sys.executable, '-c', code])
+    return time.time() - start
+
+if __name__ == '__main__':
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    timed(VARIANTS[1][1]) # build the manifest
+    for name, code in VARIANTS:
+        timings = [timed(code) for _ in range(repetitions)]
+        print("{name:20} best {best:6.2f}s  mean {mean:6.2f}s".format(
+            name=name, best=min(timings), mean=sum(timings)/len(timings)))
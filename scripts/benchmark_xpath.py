@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+'''
+Benchmarks the parsehtml method of an rss scraper on stored articles, with
+compiled (cached) XPath expressions and with plain `element.xpath` calls.
+
+The html is taken from the `htmlsource` field of stored documents of the
+scraper's doctype, or from html files given with --files.
+
+usage:
+    python3 scripts/benchmark_xpath.py ad --samples 500
+    python3 scripts/benchmark_xpath.py nu --files samples/*.html
+'''
+
+import argparse
+import time
+import itertools
+import importlib
+
+from inca.core.database import scroll_query
+
+def load_samples(doctype, samples):
+    query = {'query':{'term':{'doctype':doctype}}}
+    documents = scroll_query(query, fields=['htmlsource'], log_interval=0)
+    return [doc['_source']['htmlsource'] for doc in itertools.islice(documents, samples)
+            if doc['_source'].get('htmlsource')]
+
+def timed(scraper, htmlsources, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.time()
+        for htmlsource in htmlsources:
+            scraper.parsehtml(htmlsource)
+        timings.append(time.time() - start)
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scraper', help='name of a scraper in inca.rssscrapers.news_scraper, e.g. ad')
+    parser.add_argument('--module', default='inca.rssscrapers.news_scraper')
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--files', nargs='*')
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    module = importlib.import_module(args.module)
+    scraper = getattr(module, args.scraper)()
+    if args.files:
+        htmlsources = [open(filename, encoding='utf-8', errors='ignore').read() for filename in args.files]
+    else:
+        htmlsources = load_samples(scraper.doctype, args.samples)
+    print("{} samples of {}".format(len(htmlsources), scraper.doctype))
+
+    compiled = timed(scraper, htmlsources, args.repetitions)
+    module.xpath = lambda node, expression, **variables: node.xpath(expression, **variables)
+    plain = timed(scraper, htmlsources, args.repetitions)
+
+    print("plain xpath    {:8.3f}s  {:6.2f} ms/article".format(plain, 1000 * plain / max(len(htmlsources), 1)))
+    print("compiled xpath {:8.3f}s  {:6.2f} ms/article".format(compiled, 1000 * compiled / max(len(htmlsources), 1)))